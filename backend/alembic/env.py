@@ -18,8 +18,12 @@ from app.models.user import User
 from app.models.role import Role
 from app.models.product import Product
 from app.models.product_variation import ProductVariation
+from app.models.product_summary import ProductSummary
 from app.models.order import Order
 from app.models.order_item import OrderItem
+from app.models.login_throttle import LoginThrottle
+from app.models.stock_reservation import StockReservation
+from app.models.stock_shard import StockShard
 
 
 
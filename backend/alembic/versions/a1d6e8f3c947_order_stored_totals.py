@@ -0,0 +1,40 @@
+"""stored order subtotal and item count
+
+Revision ID: a1d6e8f3c947
+Revises: f9c24b7e6a15
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1d6e8f3c947'
+down_revision: Union[str, Sequence[str], None] = 'f9c24b7e6a15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('orders', sa.Column('subtotal', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False))
+    op.add_column('orders', sa.Column('item_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        """
+        UPDATE orders o SET subtotal = t.subtotal, item_count = t.item_count
+        FROM (
+            SELECT order_id, sum(quantity * unit_price) AS subtotal, sum(quantity) AS item_count
+            FROM order_items GROUP BY order_id
+        ) t
+        WHERE o.id = t.order_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('orders', 'item_count')
+    op.drop_column('orders', 'subtotal')
@@ -0,0 +1,75 @@
+"""product full-text and trigram search
+
+Revision ID: a7d29e3b5c14
+Revises: f2b8d4e61a93
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d29e3b5c14'
+down_revision: Union[str, Sequence[str], None] = 'f2b8d4e61a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Kept in sync by a trigger instead of a STORED generated column: adding one of
+# those rewrites products under ACCESS EXCLUSIVE. Existing rows are backfilled in
+# short batches so reads and writes keep going during the upgrade.
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce({row}name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce({row}description, '')), 'B')"
+)
+BACKFILL_BATCH = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column('products', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION products_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {SEARCH_VECTOR.format(row="NEW.")};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(
+        "CREATE TRIGGER trg_products_search_vector BEFORE INSERT OR UPDATE OF name, description "
+        "ON products FOR EACH ROW EXECUTE FUNCTION products_search_vector_update()"
+    )
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        backfill = sa.text(f"""
+            WITH batch AS (
+                SELECT id FROM products WHERE id > CAST(:last_id AS uuid) ORDER BY id LIMIT :batch
+            ), filled AS (
+                UPDATE products p SET search_vector = {SEARCH_VECTOR.format(row="p.")}
+                FROM batch WHERE p.id = batch.id
+            )
+            SELECT id FROM batch ORDER BY id DESC LIMIT 1
+        """)
+        last_id = "00000000-0000-0000-0000-000000000000"
+        while last_id is not None:
+            last_id = conn.execute(backfill, {"last_id": last_id, "batch": BACKFILL_BATCH}).scalar()
+        op.create_index('ix_products_search_vector', 'products', ['search_vector'], unique=False, postgresql_using='gin', postgresql_concurrently=True)
+        op.create_index('ix_products_name_trgm', 'products', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}, postgresql_concurrently=True)
+        op.create_index('ix_products_description_trgm', 'products', ['description'], unique=False, postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'}, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_products_description_trgm', table_name='products', postgresql_concurrently=True)
+        op.drop_index('ix_products_name_trgm', table_name='products', postgresql_concurrently=True)
+        op.drop_index('ix_products_search_vector', table_name='products', postgresql_concurrently=True)
+    op.execute("DROP TRIGGER IF EXISTS trg_products_search_vector ON products")
+    op.execute("DROP FUNCTION IF EXISTS products_search_vector_update()")
+    op.drop_column('products', 'search_vector')
@@ -0,0 +1,71 @@
+"""normalized variant colour/size keys
+
+Revision ID: b3f60c8a9e27
+Revises: a7d29e3b5c14
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f60c8a9e27'
+down_revision: Union[str, Sequence[str], None] = 'a7d29e3b5c14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Kept in sync by a trigger instead of STORED generated columns, which would
+# rewrite product_variations under ACCESS EXCLUSIVE and stall every cart and
+# checkout for the duration. Existing rows are backfilled in short batches.
+BACKFILL_BATCH = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('product_variations', sa.Column('colour_key', sa.String(), nullable=True))
+    op.add_column('product_variations', sa.Column('size_key', sa.String(), nullable=True))
+    op.execute("""
+        CREATE OR REPLACE FUNCTION product_variations_keys_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.colour_key := lower(btrim(NEW.colour));
+            NEW.size_key := lower(btrim(NEW.size));
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(
+        "CREATE TRIGGER trg_product_variations_keys BEFORE INSERT OR UPDATE OF colour, size "
+        "ON product_variations FOR EACH ROW EXECUTE FUNCTION product_variations_keys_update()"
+    )
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        backfill = sa.text("""
+            WITH batch AS (
+                SELECT id FROM product_variations WHERE id > CAST(:last_id AS uuid) ORDER BY id LIMIT :batch
+            ), filled AS (
+                UPDATE product_variations v
+                SET colour_key = lower(btrim(v.colour)), size_key = lower(btrim(v.size))
+                FROM batch WHERE v.id = batch.id
+            )
+            SELECT id FROM batch ORDER BY id DESC LIMIT 1
+        """)
+        last_id = "00000000-0000-0000-0000-000000000000"
+        while last_id is not None:
+            last_id = conn.execute(backfill, {"last_id": last_id, "batch": BACKFILL_BATCH}).scalar()
+        op.create_index('ix_product_variations_active_colour_key', 'product_variations', ['colour_key', 'product_id'], unique=False, postgresql_where=sa.text('is_active'), postgresql_concurrently=True)
+        op.create_index('ix_product_variations_active_size_key', 'product_variations', ['size_key', 'product_id'], unique=False, postgresql_where=sa.text('is_active'), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_product_variations_active_size_key', table_name='product_variations', postgresql_concurrently=True)
+        op.drop_index('ix_product_variations_active_colour_key', table_name='product_variations', postgresql_concurrently=True)
+    op.execute("DROP TRIGGER IF EXISTS trg_product_variations_keys ON product_variations")
+    op.execute("DROP FUNCTION IF EXISTS product_variations_keys_update()")
+    op.drop_column('product_variations', 'size_key')
+    op.drop_column('product_variations', 'colour_key')
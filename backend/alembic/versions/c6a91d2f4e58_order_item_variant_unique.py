@@ -0,0 +1,57 @@
+"""unique cart line per (order, variant)
+
+Revision ID: c6a91d2f4e58
+Revises: b3f60c8a9e27
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6a91d2f4e58'
+down_revision: Union[str, Sequence[str], None] = 'b3f60c8a9e27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Concurrent add_item calls could insert the same variant twice. Fold those
+    # lines into one (quantities summed, the kept line's price snapshot wins)
+    # before the constraint goes on; both steps share this transaction.
+    op.execute(
+        """
+        WITH dup AS (
+            SELECT order_id, variant_id, min(id::text)::uuid AS keep_id, sum(quantity) AS quantity
+            FROM order_items
+            WHERE variant_id IS NOT NULL
+            GROUP BY order_id, variant_id
+            HAVING count(*) > 1
+        )
+        UPDATE order_items oi SET quantity = dup.quantity
+        FROM dup
+        WHERE oi.id = dup.keep_id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM order_items oi
+        USING (
+            SELECT order_id, variant_id, min(id::text)::uuid AS keep_id
+            FROM order_items
+            WHERE variant_id IS NOT NULL
+            GROUP BY order_id, variant_id
+            HAVING count(*) > 1
+        ) dup
+        WHERE oi.order_id = dup.order_id AND oi.variant_id = dup.variant_id AND oi.id <> dup.keep_id
+        """
+    )
+    op.create_unique_constraint('uq_order_items_order_variant', 'order_items', ['order_id', 'variant_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_order_items_order_variant', 'order_items', type_='unique')
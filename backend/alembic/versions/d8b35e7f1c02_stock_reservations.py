@@ -0,0 +1,46 @@
+"""cart stock reservations
+
+Revision ID: d8b35e7f1c02
+Revises: c6a91d2f4e58
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8b35e7f1c02'
+down_revision: Union[str, Sequence[str], None] = 'c6a91d2f4e58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # constant default: no table rewrite on Postgres 11+
+    op.add_column('product_variations', sa.Column('reserved', sa.Integer(), server_default='0', nullable=False))
+    op.create_check_constraint('ck_product_variations_reserved_nonnegative', 'product_variations', 'reserved >= 0')
+    op.create_table('stock_reservations',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('order_id', sa.UUID(), nullable=False),
+    sa.Column('variant_id', sa.UUID(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    sa.ForeignKeyConstraint(['variant_id'], ['product_variations.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('order_id', 'variant_id', name='uq_stock_reservations_order_variant')
+    )
+    op.create_index('ix_stock_reservations_expires_at', 'stock_reservations', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_stock_reservations_expires_at', table_name='stock_reservations')
+    op.drop_table('stock_reservations')
+    op.drop_constraint('ck_product_variations_reserved_nonnegative', 'product_variations', type_='check')
+    op.drop_column('product_variations', 'reserved')
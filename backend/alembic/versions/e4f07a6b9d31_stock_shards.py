@@ -0,0 +1,46 @@
+"""sharded stock counters for hot variants
+
+Revision ID: e4f07a6b9d31
+Revises: d8b35e7f1c02
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4f07a6b9d31'
+down_revision: Union[str, Sequence[str], None] = 'd8b35e7f1c02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('product_variations', sa.Column('stock_shards', sa.Integer(), server_default='0', nullable=False))
+    op.create_table('product_variation_stock_shards',
+    sa.Column('variant_id', sa.UUID(), nullable=False),
+    sa.Column('shard_no', sa.Integer(), nullable=False),
+    sa.Column('stock', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.CheckConstraint('stock >= 0', name='ck_product_variation_stock_shards_stock_nonnegative'),
+    sa.ForeignKeyConstraint(['variant_id'], ['product_variations.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('variant_id', 'shard_no')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # fold sharded stock back into the variant rows before dropping the shards
+    op.execute(
+        """
+        UPDATE product_variations v SET stock = s.total
+        FROM (SELECT variant_id, sum(stock) AS total FROM product_variation_stock_shards GROUP BY variant_id) s
+        WHERE v.id = s.variant_id AND v.stock_shards > 0
+        """
+    )
+    op.drop_table('product_variation_stock_shards')
+    op.drop_column('product_variations', 'stock_shards')
@@ -0,0 +1,42 @@
+"""indexes for listing, order history and order items
+
+Revision ID: e5a3c1f08d72
+Revises: d41e7a9c2b10
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a3c1f08d72'
+down_revision: Union[str, Sequence[str], None] = 'd41e7a9c2b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    # product_variations.product_id is already served by uq_product_colour_size.
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_products_user_id'), 'products', ['user_id'], unique=False, postgresql_concurrently=True)
+        op.create_index('ix_products_active_created_at', 'products', ['created_at', 'id'], unique=False, postgresql_where=sa.text('is_active'), postgresql_concurrently=True)
+        op.create_index('ix_product_variations_active_product_price', 'product_variations', ['product_id', 'unit_price'], unique=False, postgresql_where=sa.text('is_active'), postgresql_concurrently=True)
+        op.create_index('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_order_items_product_id'), 'order_items', ['product_id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_order_items_product_id'), table_name='order_items', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_order_items_order_id'), table_name='order_items', postgresql_concurrently=True)
+        op.drop_index('ix_orders_user_id_created_at', table_name='orders', postgresql_concurrently=True)
+        op.drop_index('ix_product_variations_active_product_price', table_name='product_variations', postgresql_concurrently=True)
+        op.drop_index('ix_products_active_created_at', table_name='products', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_products_user_id'), table_name='products', postgresql_concurrently=True)
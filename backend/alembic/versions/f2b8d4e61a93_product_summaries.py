@@ -0,0 +1,58 @@
+"""product listing summaries
+
+Revision ID: f2b8d4e61a93
+Revises: e5a3c1f08d72
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8d4e61a93'
+down_revision: Union[str, Sequence[str], None] = 'e5a3c1f08d72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('product_summaries',
+    sa.Column('product_id', sa.UUID(), nullable=False),
+    sa.Column('min_price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('max_price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('total_stock', sa.Integer(), nullable=False),
+    sa.Column('active_variant_count', sa.Integer(), nullable=False),
+    sa.Column('in_stock', sa.Boolean(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+    op.create_index('ix_product_summaries_min_price', 'product_summaries', ['min_price', 'product_id'], unique=False, postgresql_where=sa.text('min_price IS NOT NULL'))
+
+    # backfill from the current variants
+    op.execute(
+        """
+        INSERT INTO product_summaries
+            (product_id, min_price, max_price, total_stock, active_variant_count, in_stock, updated_at)
+        SELECT p.id,
+               min(v.unit_price),
+               max(v.unit_price),
+               coalesce(sum(v.stock), 0),
+               count(v.id),
+               coalesce(bool_or(v.stock > 0), false),
+               now()
+        FROM products p
+        LEFT JOIN product_variations v ON v.product_id = p.id AND v.is_active
+        GROUP BY p.id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_product_summaries_min_price', table_name='product_summaries')
+    op.drop_table('product_summaries')
@@ -0,0 +1,32 @@
+"""order history keyset index
+
+Revision ID: f9c24b7e6a15
+Revises: e4f07a6b9d31
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f9c24b7e6a15'
+down_revision: Union[str, Sequence[str], None] = 'e4f07a6b9d31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # id breaks created_at ties, so (created_at, id) cursors stay on the index
+    with op.get_context().autocommit_block():
+        op.create_index('ix_orders_user_id_created_at_id', 'orders', ['user_id', 'created_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_orders_user_id_created_at', table_name='orders', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_orders_user_id_created_at', 'orders', ['user_id', 'created_at'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_orders_user_id_created_at_id', table_name='orders', postgresql_concurrently=True)
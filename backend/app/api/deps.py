@@ -1,16 +1,50 @@
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
+from fastapi.security.utils import get_authorization_scheme_param
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import SessionLocal
+from app.db.session import (  # noqa: F401  (get_db is shared with auth so one session per request)
+    get_db,
+    get_async_db,
+    use_replica,
+    READ_YOUR_WRITES_COOKIE,
+    ReadSessionLocal,
+    AsyncReadSessionLocal,
+)
 from app.models.user import User
-from app.api.routes.auth import get_current_user  # reuse your existing auth dependency
+from app.api.routes.auth import get_current_user, token_subject  # reuse your existing auth dependency
+from app.api.routes.auth import get_current_user_async  # noqa: F401  (re-exported for the DB_ASYNC routes)
 
-def get_db():
-    db = SessionLocal()
-    try:
+def _request_user_id(request: Request) -> str | None:
+    scheme, token = get_authorization_scheme_param(request.headers.get("Authorization"))
+    return token_subject(token) if scheme.lower() == "bearer" else None
+
+def _replica_allowed(request: Request) -> bool:
+    return use_replica(_request_user_id(request), request.cookies.get(READ_YOUR_WRITES_COOKIE))
+
+def get_read_db(request: Request, db: Session = Depends(get_db)):
+    """
+    Session for read-only endpoints: the replica when DATABASE_READ_URL is set,
+    otherwise (or right after the caller's own write) the request's primary session.
+    """
+    if not _replica_allowed(request):
         yield db
+        return
+    replica = ReadSessionLocal()
+    replica.info["replica"] = True
+    try:
+        yield replica
     finally:
-        db.close()
+        replica.close()
+
+async def get_async_read_db(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Async counterpart of get_read_db."""
+    if AsyncReadSessionLocal is None or not _replica_allowed(request):
+        yield db
+        return
+    async with AsyncReadSessionLocal() as replica:
+        replica.info["replica"] = True
+        yield replica
 
 def require_role_ids(allowed: set[int]):
     def _checker(user: User = Depends(get_current_user)) -> User:
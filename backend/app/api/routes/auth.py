@@ -1,18 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 from jose import JWTError, jwt
 import os
 from dotenv import load_dotenv
-import shutil
 from pathlib import Path
 import uuid
 
 
-from app.db.session import SessionLocal
+from app.db.session import get_db, get_async_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserOut, Token
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.security import hash_password_async, verify_password_async, create_access_token
+from app.core.user_cache import user_cache, user_changed
+from app.core.rate_limit import client_ip, login_throttle
 
 load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "change-me")
@@ -21,48 +25,107 @@ ALGORITHM = os.getenv("ALGORITHM", "HS256")
 router = APIRouter(tags=["auth"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# register/login/update-profile are async so bcrypt is awaited on the event loop
+# instead of parking a threadpool thread; their (sync) DB work still runs in the
+# threadpool.
 
-@router.post("/register", response_model=UserOut)
-def register(payload: UserCreate, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.email == payload.email).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Email already registered")
+def _email_taken(db: Session, email: str) -> bool:
+    return db.query(User.id).filter(User.email == email).first() is not None
 
-    user = User(email=payload.email, hashed_password=hash_password(payload.password))
+def _create_user(db: Session, email: str, hashed_password: str) -> User:
+    user = User(email=email, hashed_password=hashed_password)
     db.add(user)
     db.commit()
     db.refresh(user)
-    return UserOut(id=str(user.id), email=user.email)
+    return user
+
+@router.post("/register", response_model=UserOut)
+async def register(payload: UserCreate, db: Session = Depends(get_db)):
+    if await run_in_threadpool(_email_taken, db, payload.email):
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    hashed = await hash_password_async(payload.password)
+    user = await run_in_threadpool(_create_user, db, payload.email, hashed)
+    return UserOut(id=str(user.id), email=user.email, role_id=user.role_id)
+
+def _login_lookup(db: Session, ip: str, email: str) -> User | None:
+    # shed abusive traffic before the user lookup and bcrypt verify
+    login_throttle.check(ip, email)
+    return db.query(User).filter(User.email == email).first()
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_login_lookup, db, client_ip(request), form_data.username)
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     token = create_access_token(subject=str(user.id))
     return Token(access_token=token)
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-        if not user_id:
+# never held in the process cache; loaded on access if a caller ever needs it
+_SNAPSHOT_EXCLUDED = {"hashed_password"}
+
+def _user_snapshot(user: User) -> dict:
+    return {
+        attr.key: getattr(user, attr.key)
+        for attr in sa_inspect(User).column_attrs
+        if attr.key not in _SNAPSHOT_EXCLUDED
+    }
+
+def _user_from_snapshot(db: Session, snapshot: dict) -> User:
+    """Attach a cached user to this session without a SELECT (still updatable)."""
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+def _resolve_user(db: Session, token: str) -> User:
+    cached_token = user_cache.get_token(token)
+    if cached_token:
+        user_id, exp = cached_token
+    else:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            user_id = payload.get("sub")
+            exp = payload.get("exp")
+            if not user_id:
+                raise HTTPException(status_code=401, detail="Invalid token")
+        except JWTError:
             raise HTTPException(status_code=401, detail="Invalid token")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+        if exp:
+            user_cache.put_token(token, user_id, exp)
+
+    db.info["user_id"] = user_id  # lets the session router apply read-your-writes
+    snapshot = user_cache.get_user(user_id)
+    if snapshot:
+        return _user_from_snapshot(db, snapshot)
 
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
+
+    if exp:
+        user_cache.put_user(user_id, _user_snapshot(user), exp)
     return user
 
+def token_subject(token: str | None) -> str | None:
+    """User id from a bearer token without touching the DB (None if absent or invalid)."""
+    if not token:
+        return None
+    cached_token = user_cache.get_token(token)
+    if cached_token:
+        return cached_token[0]
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+    return _resolve_user(db, token)
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> User:
+    """Same lookup on the request's AsyncSession (used by the DB_ASYNC read routes)."""
+    return await db.run_sync(_resolve_user, token)
+
 @router.get("/me", response_model=UserOut)
 def me(current_user: User = Depends(get_current_user)):
     return UserOut(
@@ -75,23 +138,27 @@ def me(current_user: User = Depends(get_current_user)):
         updated_at=current_user.updated_at
     )
 
+def _save_profile(db: Session, user: User, name: str | None, hashed_password: str | None) -> None:
+    if name:
+        user.name = name
+    if hashed_password:
+        user.hashed_password = hashed_password
+    db.add(user)
+    user_changed(db, user.id)
+    db.commit()
+    db.refresh(user)
+
 @router.put("/update-profile", response_model=UserOut)
-def update_profile(
+async def update_profile(
     name: str | None = None,
     password: str | None = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Update user profile (name and/or password)"""
-    if name:
-        current_user.name = name
-    if password:
-        current_user.hashed_password = hash_password(password)
-    
-    db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
-    
+    hashed = await hash_password_async(password) if password else None
+    await run_in_threadpool(_save_profile, db, current_user, name, hashed)
+
     return UserOut(
         id=str(current_user.id),
         email=current_user.email,
@@ -139,6 +206,7 @@ def upload_profile_picture(
 
     current_user.profile_picture = f"/uploads/profiles/{filename}"
     db.add(current_user)
+    user_changed(db, current_user.id)
     db.commit()
     db.refresh(current_user)
 
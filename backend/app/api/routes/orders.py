@@ -1,169 +1,388 @@
+import base64
+import json
 import uuid
-from decimal import Decimal
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Annotated
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-
-from app.api.deps import get_db, get_current_user, require_role_ids
+from sqlalchemy import Integer, and_, cast, column, delete, func, literal, select, text, tuple_, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, insert
+
+from app.api.deps import (
+    get_db,
+    get_read_db,
+    get_async_read_db,
+    get_current_user,
+    get_current_user_async,
+    require_role_ids,
+)
+from app.db.instrumentation import query_budget
+from app.db.session import ASYNC_DB_ENABLED
 from app.models.user import User
 from app.models.order import Order
 from app.models.order_item import OrderItem
 from app.models.product import Product
-from app.models.product_variation import ProductVariation
+from app.models.product_variation import ProductVariation, available_stock
+from app.models.stock_reservation import StockReservation
+from app.services.catalog_cache import stock_changed
+from app.services.order_totals import recompute_order_totals
+from app.services.product_summary import refresh_product_summaries
+from app.services.reservations import hold_stock, lock_variants, release_holds
+from app.services.stock_shards import take_from_shards
 from app.schemas.order import (
     OrderCreateOut,
     OrderItemCreate,
+    OrderItemsBatch,
     OrderItemOut,
     OrderOut,
     OrderDetailOut,
+    OrderHistoryQuery,
     OrderStatusUpdate,
+    PaginatedOrders,
 )
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
 SELLER_ROLE_IDS = {1, 2}
 
+# statements per request, auth lookup included (see app.db.instrumentation).
+# Checkout is a fixed ~10 plus 2-3 per line of a sharded (hot) variant.
+READ_QUERY_BUDGET = query_budget(3)
+CHECKOUT_QUERY_BUDGET = query_budget(16)
+
 
 @router.post("", response_model=OrderCreateOut)
 def create_cart(
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    order = Order(user_id=user.id, status="cart")
-    db.add(order)
-    db.commit()
+    """Return the user's open cart, creating one only if there is none."""
+    try:
+        # serializes concurrent calls per user, so they can't both create a cart
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": f"cart:{user.id}"})
+        order = (
+            db.query(Order)
+            .filter(and_(Order.user_id == user.id, Order.status == "cart"))
+            .order_by(Order.created_at.desc(), Order.id.desc())
+            .first()
+        )
+        if order is None:
+            order = Order(user_id=user.id, status="cart")
+            db.add(order)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     db.refresh(order)
     return order
 
 
-@router.post("/{order_id}/items", response_model=OrderItemOut)
-def add_item(
-    order_id: uuid.UUID,
-    payload: OrderItemCreate,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
-):
-    order = db.query(Order).filter(and_(Order.id == order_id, Order.user_id == user.id)).first()
+def _lock_cart(db: Session, order_id: uuid.UUID, user_id: uuid.UUID) -> Order:
+    # FOR UPDATE serializes cart edits with each other and with checkout
+    order = (
+        db.query(Order)
+        .filter(and_(Order.id == order_id, Order.user_id == user_id))
+        .with_for_update()
+        .first()
+    )
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     if order.status != "cart":
         raise HTTPException(status_code=400, detail="Order is not editable")
+    return order
 
-    product = db.query(Product).filter(Product.id == payload.product_id).first()
-    if not product or not product.is_active:
-        raise HTTPException(status_code=404, detail="Product not available")
-
-    if not payload.variant_id:
-        # If you require variants always, enforce it:
-        raise HTTPException(status_code=400, detail="variant_id is required for this product")
-
-    variant = (
-        db.query(ProductVariation)
-        .filter(ProductVariation.id == payload.variant_id)
-        .filter(ProductVariation.product_id == product.id)
-        .filter(ProductVariation.is_active.is_(True))
-        .first()
-    )
-    if not variant:
-        raise HTTPException(status_code=404, detail="Variant not found")
 
-    existing_item = (
-        db.query(OrderItem)
-        .filter(
+def _check_cart_lines(db: Session, order: Order, lines: list[OrderItemCreate]) -> tuple[list, list[dict]]:
+    """
+    Validate all lines (same variant summed) against products, variants and
+    available stock with one joined query. Returns (rows, problems).
+    """
+    wanted: dict[tuple, int] = {}
+    problems = []
+    for line in lines:
+        if not line.variant_id:
+            # If you require variants always, enforce it:
+            problems.append({"product_id": str(line.product_id), "variant_id": None, "status": 400,
+                             "detail": "variant_id is required for this product"})
+            continue
+        key = (line.variant_id, line.product_id)
+        wanted[key] = wanted.get(key, 0) + line.quantity
+    if not wanted:
+        return [], problems
+
+    requested = values(
+        column("variant_id", PG_UUID(as_uuid=True)),
+        column("product_id", PG_UUID(as_uuid=True)),
+        column("quantity", Integer),
+        name="requested",
+    ).data([(variant_id, product_id, quantity) for (variant_id, product_id), quantity in wanted.items()])
+    # VALUES parameters arrive untyped, so cast before comparing with uuid columns
+    variant_id = cast(requested.c.variant_id, PG_UUID(as_uuid=True))
+    product_id = cast(requested.c.product_id, PG_UUID(as_uuid=True))
+    rows = (
+        db.query(
+            variant_id.label("variant_id"),
+            product_id.label("product_id"),
+            cast(requested.c.quantity, Integer).label("quantity"),
+            Product.id.label("available_product_id"),
+            ProductVariation.id.label("available_variant_id"),
+            ProductVariation.unit_price,
+            ProductVariation.stock_shards,
+            available_stock.label("available"),
+        )
+        .select_from(requested)
+        .outerjoin(Product, and_(Product.id == product_id, Product.is_active.is_(True)))
+        .outerjoin(
+            ProductVariation,
             and_(
-                OrderItem.order_id == order.id,
-                OrderItem.product_id == product.id,
-                OrderItem.variant_id == payload.variant_id,
-            )
+                ProductVariation.id == variant_id,
+                ProductVariation.product_id == Product.id,
+                ProductVariation.is_active.is_(True),
+            ),
         )
-        .first()
+        .all()
     )
 
-    if existing_item:
-        new_quantity = existing_item.quantity + payload.quantity
-        if variant.stock < new_quantity:
-            raise HTTPException(status_code=400, detail="Not enough stock")
-        existing_item.quantity = new_quantity
-        db.add(existing_item)
-        db.commit()
-        db.refresh(existing_item)
-        return existing_item
-
-    if variant.stock < payload.quantity:
-        raise HTTPException(status_code=400, detail="Not enough stock")
-
-    item = OrderItem(
-        order_id=order.id,
-        product_id=product.id,
-        variant_id=payload.variant_id,
-        quantity=payload.quantity,
-        unit_price=variant.unit_price,  # snapshot price at time of add
+    for row in rows:
+        if row.available_product_id is None:
+            status, detail = 404, "Product not available"
+        elif row.available_variant_id is None:
+            status, detail = 404, "Variant not found"
+        elif row.available < row.quantity:
+            status, detail = 400, "Not enough stock"
+        else:
+            continue
+        problems.append({"product_id": str(row.product_id), "variant_id": str(row.variant_id), "status": status, "detail": detail})
+    return rows, problems
+
+
+def _upsert_cart_lines(db: Session, order: Order, rows: list) -> list:
+    """Insert new lines and add to existing ones in one statement; returns the resulting lines."""
+    stmt = insert(OrderItem).values([
+        {
+            "order_id": order.id,
+            "product_id": row.product_id,
+            "variant_id": row.variant_id,
+            "quantity": row.quantity,
+            "unit_price": row.unit_price,  # snapshot price at time of add
+        }
+        for row in rows
+    ])
+    # an existing line keeps its original price snapshot
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_order_items_order_variant",
+        set_={"quantity": OrderItem.quantity + stmt.excluded.quantity},
     )
-    db.add(item)
-    db.commit()
-    db.refresh(item)
-    return item
+    return db.execute(
+        stmt.returning(
+            OrderItem.id,
+            OrderItem.order_id,
+            OrderItem.product_id,
+            OrderItem.variant_id,
+            OrderItem.quantity,
+            OrderItem.unit_price,
+        )
+    ).all()
+
+
+def _place_in_cart(db: Session, order: Order, lines: list[OrderItemCreate]) -> tuple[list, list[dict]]:
+    """Check the lines, hold their stock and merge them into the cart. Returns (items, problems)."""
+    rows, problems = _check_cart_lines(db, order, lines)
+    if problems:
+        return [], problems
+
+    # hot (sharded) SKUs take no holds; their stock is only checked at checkout
+    holds = {row.variant_id: row.quantity for row in rows if not row.stock_shards}
+    short = set(hold_stock(db, order.id, holds)) if holds else set()
+    if short:
+        # someone else's hold got there between the check and the hold
+        return [], [
+            {"product_id": str(row.product_id), "variant_id": str(row.variant_id), "status": 400, "detail": "Not enough stock"}
+            for row in rows if row.variant_id in short
+        ]
+
+    items = _upsert_cart_lines(db, order, rows)
+    # added units are priced at their line's snapshot (an existing line keeps its price)
+    added = {row.variant_id: row.quantity for row in rows}
+    order.item_count += sum(added.values())
+    order.subtotal += sum(added[item.variant_id] * item.unit_price for item in items)
+    # held stock is no longer shown as available; sharded lines hold nothing,
+    # so a hot SKU's carts don't queue on its product and summary rows
+    held_products = [row.product_id for row in rows if not row.stock_shards]
+    refresh_product_summaries(db, held_products)
+    stock_changed(db, held_products)
+    return items, []
 
 
-@router.delete("/{order_id}/items/{item_id}")
-def remove_item(
+@router.post("/{order_id}/items", response_model=OrderItemOut)
+def add_item(
     order_id: uuid.UUID,
-    item_id: uuid.UUID,
+    payload: OrderItemCreate,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    order = db.query(Order).filter(and_(Order.id == order_id, Order.user_id == user.id)).first()
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-    if order.status != "cart":
-        raise HTTPException(status_code=400, detail="Order is not editable")
-
-    item = db.query(OrderItem).filter(and_(OrderItem.id == item_id, OrderItem.order_id == order.id)).first()
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
-
-    db.delete(item)
-    db.commit()
-    return {"message": "Item removed"}
+    try:
+        order = _lock_cart(db, order_id, user.id)
+        items, problems = _place_in_cart(db, order, [payload])
+        if problems:
+            raise HTTPException(status_code=problems[0]["status"], detail=problems[0]["detail"])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return items[0]
 
 
-@router.get("/me", response_model=list[OrderOut])
-def my_orders(
+@router.post("/{order_id}/items/batch", response_model=OrderDetailOut)
+def add_items(
+    order_id: uuid.UUID,
+    payload: OrderItemsBatch,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    return (
-        db.query(Order)
-        .filter(Order.user_id == user.id)
-        .order_by(Order.created_at.desc())
-        .all()
-    )
+    """Add several lines at once (all or nothing) and return the updated cart."""
+    try:
+        order = _lock_cart(db, order_id, user.id)
+        _, problems = _place_in_cart(db, order, payload.items)
+        if problems:
+            raise HTTPException(
+                status_code=400,
+                detail=[{k: v for k, v in p.items() if k != "status"} for p in problems],
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return _get_order(db, order_id, user.id)
 
 
-@router.get("/{order_id}", response_model=OrderDetailOut)
-def get_order(
+@router.delete("/{order_id}/items/{item_id}")
+def remove_item(
     order_id: uuid.UUID,
+    item_id: uuid.UUID,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    order = db.query(Order).filter(and_(Order.id == order_id, Order.user_id == user.id)).first()
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
+    try:
+        order = _lock_cart(db, order_id, user.id)
+
+        item = db.query(OrderItem).filter(and_(OrderItem.id == item_id, OrderItem.order_id == order.id)).first()
+        if not item:
+            raise HTTPException(status_code=404, detail="Item not found")
+
+        product_ids = release_holds(db, order.id, [item.variant_id]) if item.variant_id else set()
+        order.item_count -= item.quantity
+        order.subtotal -= item.quantity * item.unit_price
+        db.delete(item)
+        refresh_product_summaries(db, product_ids)
+        stock_changed(db, product_ids)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return {"message": "Item removed"}
 
-    items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-    total = sum((Decimal(i.quantity) * i.unit_price for i in items), Decimal("0.00"))
 
-    return {"order": order, "items": items, "total": total}
+def _encode_cursor(created_at: datetime, order_id: uuid.UUID) -> str:
+    raw = json.dumps({"c": created_at.isoformat(), "id": str(order_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    """Return (created_at, order id) of the last order of the previous page."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(data["c"]), uuid.UUID(data["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _my_orders(db: Session, user_id: uuid.UUID, params: OrderHistoryQuery) -> dict:
+    """
+    Newest first, keyset-paginated on (created_at, id). Item count and total
+    are the order's stored totals, so order_items isn't read at all.
+    """
+    query = db.query(Order).filter(Order.user_id == user_id)
+    if params.status:
+        query = query.filter(Order.status == params.status)
+    if params.cursor:
+        last_created_at, last_id = _decode_cursor(params.cursor)
+        query = query.filter(
+            tuple_(Order.created_at, Order.id)
+            < tuple_(literal(last_created_at, Order.created_at.type), literal(last_id, Order.id.type))
+        )
+    orders = query.order_by(Order.created_at.desc(), Order.id.desc()).limit(params.page_size + 1).all()
+
+    next_cursor = None
+    has_more = len(orders) > params.page_size
+    if has_more:
+        orders = orders[:params.page_size]
+        next_cursor = _encode_cursor(orders[-1].created_at, orders[-1].id)
+
+    items = []
+    for order in orders:
+        item = OrderOut.model_validate(order).model_dump()
+        item.update(item_count=order.item_count, total=order.subtotal)
+        items.append(item)
+    return {"items": items, "has_more": has_more, "page_size": params.page_size, "next_cursor": next_cursor}
 
 
-@router.post("/{order_id}/checkout")
+def _get_order(db: Session, order_id: uuid.UUID, user_id: uuid.UUID) -> dict:
+    order = db.query(Order).filter(and_(Order.id == order_id, Order.user_id == user_id)).first()
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+
+    items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
+    return {"order": order, "items": items, "total": order.subtotal}
+
+
+# See products.py: DB_ASYNC serves these reads from AsyncSession with the same query code.
+if ASYNC_DB_ENABLED:
+    @router.get("/me", response_model=PaginatedOrders, dependencies=[Depends(READ_QUERY_BUDGET)])
+    async def my_orders(
+        params: Annotated[OrderHistoryQuery, Query()],
+        db: AsyncSession = Depends(get_async_read_db),
+        user: User = Depends(get_current_user_async),
+    ):
+        return await db.run_sync(_my_orders, user.id, params)
+
+    @router.get("/{order_id}", response_model=OrderDetailOut, dependencies=[Depends(READ_QUERY_BUDGET)])
+    async def get_order(
+        order_id: uuid.UUID,
+        db: AsyncSession = Depends(get_async_read_db),
+        user: User = Depends(get_current_user_async),
+    ):
+        return await db.run_sync(_get_order, order_id, user.id)
+
+else:
+
+    @router.get("/me", response_model=PaginatedOrders, dependencies=[Depends(READ_QUERY_BUDGET)])
+    def my_orders(
+        params: Annotated[OrderHistoryQuery, Query()],
+        db: Session = Depends(get_read_db),
+        user: User = Depends(get_current_user),
+    ):
+        return _my_orders(db, user.id, params)
+
+    @router.get("/{order_id}", response_model=OrderDetailOut, dependencies=[Depends(READ_QUERY_BUDGET)])
+    def get_order(
+        order_id: uuid.UUID,
+        db: Session = Depends(get_read_db),
+        user: User = Depends(get_current_user),
+    ):
+        return _get_order(db, order_id, user.id)
+
+
+@router.post("/{order_id}/checkout", dependencies=[Depends(CHECKOUT_QUERY_BUDGET)])
 def checkout(
     order_id: uuid.UUID,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    with db.begin():
+    # The session is shared with get_current_user and may already be in a
+    # transaction, so commit/rollback explicitly instead of db.begin().
+    try:
         order = (
             db.query(Order)
             .filter(and_(Order.id == order_id, Order.user_id == user.id))
@@ -175,27 +394,101 @@ def checkout(
         if order.status != "cart":
             raise HTTPException(status_code=400, detail="Order cannot be checked out")
 
-        items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-        if not items:
+        lines = (
+            db.query(
+                OrderItem.product_id,
+                OrderItem.variant_id,
+                OrderItem.quantity,
+                ProductVariation.stock_shards,
+                ProductVariation.is_active,
+            )
+            .outerjoin(ProductVariation, ProductVariation.id == OrderItem.variant_id)
+            .filter(OrderItem.order_id == order.id)
+            .all()
+        )
+        if not lines:
             raise HTTPException(status_code=400, detail="Cart is empty")
-
-        # Reduce stock (locked)
-        for item in items:
-            if item.variant_id:
-                variant = (
-                    db.query(ProductVariation)
-                    .filter(ProductVariation.id == item.variant_id)
-                    .with_for_update()
-                    .first()
-                )
-                if not variant or not variant.is_active:
-                    raise HTTPException(status_code=400, detail="A variant is no longer available")
-                if variant.stock < item.quantity:
-                    raise HTTPException(status_code=400, detail="Insufficient stock during checkout")
-                variant.stock -= item.quantity
+        # sharded (hot) variants aren't locked here: see take_from_shards below
+        sharded = sorted((line for line in lines if line.stock_shards), key=lambda line: line.variant_id)
+        if any(not line.is_active for line in sharded):
+            raise HTTPException(status_code=400, detail="A variant is no longer available")
+        plain_ids = {line.variant_id for line in lines if line.variant_id and not line.stock_shards}
+        product_ids = {line.product_id for line in lines if not line.stock_shards}
+
+        # Lock every variant in the cart in one statement, always in id order,
+        # so two checkouts sharing SKUs can't deadlock on each other.
+        lock_variants(db, plain_ids)
+
+        # One statement: consume the cart's holds (DELETE ... RETURNING), then
+        # decrement stock and reserved together with UPDATE ... FROM. Held units
+        # are already set aside, so only the unheld remainder (holds that were
+        # swept) is checked against available stock. The outer SELECT returns
+        # the cart lines the UPDATE skipped (gone, inactive or short on stock).
+        cart = (
+            select(OrderItem.variant_id, func.sum(OrderItem.quantity).label("quantity"))
+            .where(OrderItem.order_id == order.id, OrderItem.variant_id.in_(plain_ids))
+            .group_by(OrderItem.variant_id)
+            .cte("cart")
+        )
+        held = (
+            delete(StockReservation)
+            .where(StockReservation.order_id == order.id)
+            .returning(StockReservation.variant_id, StockReservation.quantity)
+            .cte("held")
+        )
+        wanted = (
+            select(cart.c.variant_id, cart.c.quantity, func.coalesce(held.c.quantity, 0).label("held"))
+            .select_from(cart.outerjoin(held, held.c.variant_id == cart.c.variant_id))
+            .cte("wanted")
+        )
+        moved = (
+            update(ProductVariation)
+            .where(
+                ProductVariation.id == wanted.c.variant_id,
+                ProductVariation.is_active.is_(True),
+                ProductVariation.stock_shards == 0,  # sharded by a seller since we read the cart
+                ProductVariation.stock - ProductVariation.reserved >= wanted.c.quantity - wanted.c.held,
+            )
+            .values(
+                stock=ProductVariation.stock - wanted.c.quantity,
+                reserved=ProductVariation.reserved - wanted.c.held,
+            )
+            .returning(ProductVariation.id)
+            .cte("moved")
+        )
+        failed = db.execute(
+            select(wanted.c.variant_id, ProductVariation.is_active)
+            .select_from(wanted.outerjoin(ProductVariation, ProductVariation.id == wanted.c.variant_id))
+            .where(wanted.c.variant_id.notin_(select(moved.c.id)))
+        ).all()
+        if any(not row.is_active for row in failed):
+            raise HTTPException(status_code=400, detail="A variant is no longer available")
+        if failed:
+            raise HTTPException(status_code=400, detail="Insufficient stock during checkout")
+
+        # In variant id order, so slow-path shard locks are taken in a fixed order.
+        # Refreshing the summary on every sale would put the hot product's
+        # summary row back on the critical path, so it's only refreshed when
+        # the SKU sells out (listings sum total_stock from the variants).
+        for line in sharded:
+            left = take_from_shards(db, line.variant_id, line.quantity)
+            if left is None:
+                raise HTTPException(status_code=400, detail="Insufficient stock during checkout")
+            if left == 0:
+                product_ids.add(line.product_id)
+
+        refresh_product_summaries(db, product_ids)
+        # the lines are final now: store exact totals rather than the running ones
+        recompute_order_totals(db, [order.id])
 
         order.status = "paid"
         order.paid_at = datetime.utcnow()
+        # stock moved (shards on every sale): drop cached reads showing these products
+        stock_changed(db, {line.product_id for line in lines})
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
 
     return {"message": "Checked out", "order_id": str(order.id)}
 
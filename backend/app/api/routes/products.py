@@ -1,169 +1,511 @@
+import base64
+import html
+import json
+import os
 import uuid
-from typing import Optional, Literal
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from pydantic_core import to_json
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy import func, asc, desc, and_, or_, exists, literal, null, select, text, tuple_
+from sqlalchemy.dialects.postgresql import array
+
+from app.api.deps import get_read_db, get_async_read_db
+from app.db.instrumentation import query_budget
+from app.db.session import ASYNC_DB_ENABLED
+from app.models.product import Product, SEARCH_CONFIG
+from app.models.product_summary import ProductSummary
+from app.models.product_variation import ProductVariation, available_stock
+from app.services.catalog_cache import STOCK, catalog_version, count_cache, replica_lag, response_cache
+from app.schemas.product import (
+    FacetValue,
+    PaginatedProducts,
+    PriceBucket,
+    ProductFacets,
+    ProductListQuery,
+    ProductOut,
+)
 
-from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, asc, desc, and_, or_
+router = APIRouter(prefix="/products", tags=["products"])
+
+# statements per request (see app.db.instrumentation): listing = count + facets
+# + page + variants, detail = product + variants; cache hits issue none
+LIST_QUERY_BUDGET = query_budget(6)
+DETAIL_QUERY_BUDGET = query_budget(3)
+
+# price facet thresholds: "<25", "25-50", ..., "200+"
+PRICE_FACET_BUCKETS = [
+    Decimal(b) for b in os.getenv("PRICE_FACET_BUCKETS", "25,50,100,200").split(",") if b.strip()
+]
+
+# ts_headline wraps matches in these control characters (stripped from the
+# document first); the snippet is HTML-escaped before they become <mark> tags,
+# so product text can't inject markup.
+_MATCH_START, _MATCH_STOP = "\x02", "\x03"
+
+# Read path works on column tuples: no ORM identity map / hydration and no
+# per-object model_validate. Payload dicts list keys in the same order as the
+# ProductVariationOut / ProductOut / PaginatedProducts fields, and
+# pydantic_core.to_json formats UUID/Decimal/datetime exactly as the models do,
+# so the bytes match PaginatedProducts(...).model_dump_json().
+_PRODUCT_COLUMNS = (
+    Product.id,
+    Product.user_id,
+    Product.name,
+    Product.description,
+    Product.is_active,
+    Product.created_at,
+    Product.updated_at,
+)
+_SUMMARY_COLUMNS = (
+    ProductSummary.product_id.label("summary_product_id"),
+    ProductSummary.min_price,
+    ProductSummary.max_price,
+)
+_VARIANT_COLUMNS = (
+    ProductVariation.id,
+    ProductVariation.product_id,
+    ProductVariation.colour,
+    ProductVariation.size,
+    ProductVariation.sku,
+    ProductVariation.unit_price,
+    available_stock.label("stock"),  # shoppers see stock net of cart holds
+    ProductVariation.is_active,
+    ProductVariation.created_at,
+    ProductVariation.updated_at,
+)
+
+
+def _load_variants(db: Session, product_ids: list, active_only: bool) -> dict:
+    """Variant payloads of the given products in one query, grouped by product id."""
+    by_product = {pid: [] for pid in product_ids}
+    if not product_ids:
+        return by_product
+    query = select(*_VARIANT_COLUMNS).where(ProductVariation.product_id.in_(product_ids))
+    if active_only:
+        query = query.where(ProductVariation.is_active)
+    for row in db.execute(query.order_by(ProductVariation.created_at, ProductVariation.id)):
+        by_product[row.product_id].append(row._asdict())
+    return by_product
 
-from app.api.deps import get_db
-from app.models.product import Product
-from app.models.product_variation import ProductVariation
-from app.schemas.product import PaginatedProducts, ProductOut, ProductVariationOut
 
-router = APIRouter(prefix="/products", tags=["products"])
+def _render_snippet(snippet: str | None) -> str | None:
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(_MATCH_START, "<mark>").replace(_MATCH_STOP, "</mark>")
 
-@router.get("", response_model=PaginatedProducts)
-def list_products(
-    db: Session = Depends(get_db),
-
-    # pagination
-    page: int = Query(1, ge=1),
-    page_size: int = Query(12, ge=1, le=100),
-
-    # filters
-    q: Optional[str] = Query(None, description="Search in product name"),
-    user_id: Optional[uuid.UUID] = None,
-    active_only: bool = True,
-
-    colour: Optional[str] = None,
-    size: Optional[str] = None,
-    min_price: Optional[float] = Query(None, ge=0),
-    max_price: Optional[float] = Query(None, ge=0),
-    in_stock_only: bool = False,
-
-    # sorting
-    sort_by: Literal["created_at", "name", "price"] = "created_at",
-    sort_dir: Literal["asc", "desc"] = "desc",
-):
+
+def _product_payload(row, variants: list, active_only: bool) -> dict:
+    if active_only and row.summary_product_id is not None:
+        # summary rows cover active variants, which is exactly what we show
+        min_price, max_price = row.min_price, row.max_price
+    else:
+        prices = [v["unit_price"] for v in variants]
+        min_price = min(prices) if prices else None
+        max_price = max(prices) if prices else None
+    # summed from the variants shown: the summary's figure lags for sharded SKUs
+    total_stock = sum(v["stock"] for v in variants)
+    return {
+        "id": row.id,
+        "user_id": row.user_id,
+        "name": row.name,
+        "description": row.description,
+        "is_active": row.is_active,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+        "variants": variants,
+        "min_price": min_price,
+        "max_price": max_price,
+        "total_stock": total_stock,
+        "snippet": _render_snippet(row.snippet),
+    }
+
+
+def _encode_cursor(sort_by: str, sort_dir: str, value, product_id: uuid.UUID) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, Decimal):
+        value = str(value)
+    raw = json.dumps({"s": sort_by, "d": sort_dir, "v": value, "id": str(product_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort_by: str, sort_dir: str) -> tuple:
+    """Return (sort value, product id) of the last row of the previous page."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        if data["s"] != sort_by or data["d"] != sort_dir:
+            raise ValueError("sort mismatch")
+        value = data["v"]
+        if sort_by == "created_at":
+            value = datetime.fromisoformat(value)
+        elif sort_by == "price":
+            value = Decimal(value)
+        elif not isinstance(value, str):
+            raise ValueError("name must be a string")
+        return value, uuid.UUID(data["id"])
+    except (ValueError, KeyError, TypeError, InvalidOperation):
+        raise HTTPException(status_code=400, detail="Invalid cursor for this sort order")
+
+
+# params that don't change which products match
+_NON_FILTER_PARAMS = {"page", "page_size", "cursor", "count", "facets", "sort_by", "sort_dir"}
+
+
+def _filter_signature(params: ProductListQuery) -> str:
+    filters = params.model_dump(mode="json", exclude=_NON_FILTER_PARAMS)
+    if params.sort_by == "price":
+        filters["has_price"] = True  # price sort drops products without variants
+    return json.dumps(filters, sort_keys=True)
+
+
+def _is_broad(params: ProductListQuery) -> bool:
+    filters = params.model_dump(exclude=_NON_FILTER_PARAMS | {"active_only"}, exclude_defaults=True)
+    return not filters and params.sort_by != "price"
+
+
+def _planner_estimate(db: Session, base) -> int:
+    """Row estimate from EXPLAIN; no scan, can be off by a few percent."""
+    sql = base.with_entities(Product.id).order_by(None).statement.compile(
+        dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _count_products(db: Session, base, params: ProductListQuery) -> tuple[int | None, bool]:
+    """(total, total_is_exact) according to params.count."""
+    if params.count == "none":
+        return None, False
+    if params.count == "estimated" and _is_broad(params):
+        return _planner_estimate(db, base), False
+
+    key = (catalog_version.current, _filter_signature(params))
+    total = count_cache.get(key)
+    if total is None:
+        since = catalog_version.seq
+        # one row per product, so no DISTINCT needed
+        total = base.with_entities(func.count(Product.id)).order_by(None).scalar() or 0
+        tags = {STOCK} if params.in_stock_only else set()
+        count_cache.put(key, total, tags, since, replica_lag(db))
+    return total, True
+
+
+def _facet_counts(db: Session, base, active_only: bool) -> ProductFacets:
     """
-    Public product listing (buyer-facing).
-    - Joins product_variations so we can filter by price/colour/size/stock.
-    - Returns min_price/max_price/total_stock computed from variants.
+    Colour, size and price-bucket counts (distinct matching products) in one
+    aggregate: GROUPING SETS over the active variants of the filtered products.
     """
+    matching = base.with_entities(Product.id).order_by(None).subquery()
+    variant_rows = select(
+        ProductVariation.product_id,
+        ProductVariation.colour_key.label("colour"),
+        ProductVariation.size_key.label("size"),
+        func.width_bucket(ProductVariation.unit_price, array(PRICE_FACET_BUCKETS)).label("bucket"),
+    ).where(ProductVariation.product_id.in_(select(matching.c.id)))
+    if active_only:
+        variant_rows = variant_rows.where(ProductVariation.is_active)
+    v = variant_rows.subquery()
 
-    variation_filters = any(
-        [
-            colour,
-            size,
-            min_price is not None,
-            max_price is not None,
-            in_stock_only,
-            sort_by == "price",
-        ]
+    stmt = (
+        select(v.c.colour, v.c.size, v.c.bucket, func.count(func.distinct(v.c.product_id)))
+        .group_by(func.grouping_sets(v.c.colour, v.c.size, v.c.bucket))
     )
 
-    # base query (join variants when needed)
-    if variation_filters:
-        base = db.query(Product).join(ProductVariation, ProductVariation.product_id == Product.id)
+    facets = ProductFacets()
+    buckets = {}
+    # each row belongs to exactly one grouping set; the other two columns are NULL
+    for colour, size, bucket, count in db.execute(stmt):
+        if colour is not None:
+            facets.colour.append(FacetValue(value=colour, count=count))
+        elif size is not None:
+            facets.size.append(FacetValue(value=size, count=count))
+        elif bucket is not None:
+            buckets[bucket] = count
+
+    facets.colour.sort(key=lambda f: (-f.count, f.value))
+    facets.size.sort(key=lambda f: (-f.count, f.value))
+    for i in sorted(buckets):
+        facets.price.append(
+            PriceBucket(
+                min=PRICE_FACET_BUCKETS[i - 1] if i > 0 else None,
+                max=PRICE_FACET_BUCKETS[i] if i < len(PRICE_FACET_BUCKETS) else None,
+                count=buckets[i],
+            )
+        )
+    return facets
+
+
+def _list_products(db: Session, params: ProductListQuery) -> tuple[bytes, list]:
+    """
+    Public product listing (buyer-facing), rendered straight to PaginatedProducts
+    JSON; returned with the ids of the products on the page.
+    - Filters/sorts on the one-row-per-product summary where it can; per-variant
+      filters (colour/size, or combined price/stock bounds) use EXISTS on variants.
+    - q matches the name/description tsvector, or by trigram similarity the name
+      or a word in the description (typos); sort_by=relevance ranks on these and
+      items carry a highlighted snippet.
+    - Returns min_price/max_price from the summary; total_stock sums the variants shown.
+    """
+    page, page_size, cursor = params.page, params.page_size, params.cursor
+    q, user_id, active_only = params.q, params.user_id, params.active_only
+    colour, size = params.colour, params.size
+    min_price, max_price, in_stock_only = params.min_price, params.max_price, params.in_stock_only
+    sort_by, sort_dir = params.sort_by, params.sort_dir
+
+    if sort_by == "relevance" and not q:
+        raise HTTPException(status_code=400, detail="sort_by=relevance requires q")
+    if sort_by == "relevance" and cursor:
+        raise HTTPException(status_code=400, detail="Cursor pagination is not supported for sort_by=relevance")
+
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, q) if q else None
+    if q:
+        snippet = func.ts_headline(
+            SEARCH_CONFIG,
+            func.translate(func.concat_ws(" ", Product.name, Product.description), _MATCH_START + _MATCH_STOP, ""),
+            tsquery,
+            f"StartSel={_MATCH_START}, StopSel={_MATCH_STOP}, MaxWords=25, MinWords=8",
+        )
     else:
-        base = db.query(Product).outerjoin(ProductVariation, ProductVariation.product_id == Product.id)
+        snippet = null()
+
+    base = (
+        db.query(*_PRODUCT_COLUMNS, *_SUMMARY_COLUMNS, snippet.label("snippet"))
+        .select_from(Product)
+        .outerjoin(ProductSummary, ProductSummary.product_id == Product.id)
+    )
 
     conditions = []
 
     if active_only:
-        conditions.append(Product.is_active.is_(True))
-        if variation_filters:
-            conditions.append(ProductVariation.is_active.is_(True))
-        else:
-            conditions.append(
-                or_(ProductVariation.is_active.is_(True), ProductVariation.id.is_(None))
-            )
+        conditions.append(Product.is_active)
 
     if q:
-        conditions.append(Product.name.ilike(f"%{q}%"))
+        conditions.append(
+            or_(
+                Product.search_vector.op("@@")(tsquery),
+                Product.name.op("%")(q),
+                Product.description.op("%>")(q),
+            )
+        )
 
     if user_id:
         conditions.append(Product.user_id == user_id)
 
-    if colour:
-        conditions.append(ProductVariation.colour.ilike(colour))
-
-    if size:
-        conditions.append(ProductVariation.size.ilike(size))
-
-    if min_price is not None:
-        conditions.append(ProductVariation.unit_price >= min_price)
-
-    if max_price is not None:
-        conditions.append(ProductVariation.unit_price <= max_price)
+    # A single price bound or in-stock check over active variants is answered
+    # by the summary; anything that must hold for one variant at once is not.
+    variant_bounds = (min_price is not None) + (max_price is not None) + int(in_stock_only)
+    if active_only and not colour and not size and variant_bounds <= 1:
+        if min_price is not None:
+            conditions.append(ProductSummary.max_price >= min_price)
+        if max_price is not None:
+            conditions.append(ProductSummary.min_price <= max_price)
+        if in_stock_only:
+            conditions.append(ProductSummary.in_stock.is_(True))
+    else:
+        variant_conditions = []
+        if active_only:
+            variant_conditions.append(ProductVariation.is_active)
+        if colour:
+            variant_conditions.append(ProductVariation.colour_key == colour.strip().lower())
+        if size:
+            variant_conditions.append(ProductVariation.size_key == size.strip().lower())
+        if min_price is not None:
+            variant_conditions.append(ProductVariation.unit_price >= min_price)
+        if max_price is not None:
+            variant_conditions.append(ProductVariation.unit_price <= max_price)
+        if in_stock_only:
+            variant_conditions.append(available_stock > 0)
+        if variant_bounds or colour or size:
+            conditions.append(
+                exists().where(ProductVariation.product_id == Product.id, *variant_conditions)
+            )
 
-    if in_stock_only:
-        conditions.append(ProductVariation.stock > 0)
+    if sort_by == "price":
+        # products without an (active) variant have no price to sort by
+        conditions.append(ProductSummary.min_price.isnot(None))
 
     if conditions:
         base = base.filter(and_(*conditions))
 
-    # total count of distinct products
-    total = base.with_entities(func.count(func.distinct(Product.id))).scalar() or 0
+    total, total_is_exact = _count_products(db, base, params)
+    facets = _facet_counts(db, base, active_only) if params.facets else None
 
-    # sorting
+    # sorting (id breaks ties so pages are stable and cursors unambiguous)
     sort_fn = asc if sort_dir == "asc" else desc
 
     if sort_by == "name":
-        base = base.order_by(sort_fn(Product.name))
+        sort_col = Product.name
     elif sort_by == "price":
-        # sort by MIN variant price per product
-        base = base.group_by(Product.id).order_by(sort_fn(func.min(ProductVariation.unit_price)))
+        sort_col = ProductSummary.min_price
+    elif sort_by == "relevance":
+        sort_col = (
+            func.ts_rank_cd(Product.search_vector, tsquery)
+            + func.similarity(Product.name, q)
+            + func.coalesce(func.word_similarity(q, Product.description), 0) / 2
+        )
     else:
-        base = base.order_by(sort_fn(Product.created_at))
-
-    # pagination
-    offset = (page - 1) * page_size
-
-    # load products + variants
-    # If sort_by == "price" we already grouped; otherwise we may see duplicates due to join.
-    # Easiest: select distinct product ids in a subquery, then fetch with joinedload.
-    product_ids_subq = (
-        base.with_entities(Product.id)
-        .distinct()
-        .offset(offset)
-        .limit(page_size)
-        .subquery()
-    )
-
-    products = (
-        db.query(Product)
-        .options(joinedload(Product.variations))
-        .filter(Product.id.in_(product_ids_subq))
-        .all()
+        sort_col = Product.created_at
+    base = base.order_by(sort_fn(sort_col), sort_fn(Product.id))
+
+    # pagination: keyset when a cursor is given (flat cost at any depth),
+    # otherwise the old page/page_size offset
+    if cursor:
+        last_value, last_id = _decode_cursor(cursor, sort_by, sort_dir)
+        key = tuple_(sort_col, Product.id)
+        last_key = tuple_(literal(last_value, sort_col.type), literal(last_id, Product.id.type))
+        base = base.filter(key > last_key if sort_dir == "asc" else key < last_key)
+    else:
+        base = base.offset((page - 1) * page_size)
+    rows = base.limit(page_size + 1).all()
+
+    next_cursor = None
+    has_more = len(rows) > page_size
+    if has_more:
+        rows = rows[:page_size]
+        last = rows[-1]
+        if sort_by == "name":
+            next_cursor = _encode_cursor(sort_by, sort_dir, last.name, last.id)
+        elif sort_by == "price":
+            next_cursor = _encode_cursor(sort_by, sort_dir, last.min_price, last.id)
+        elif sort_by == "created_at":
+            next_cursor = _encode_cursor(sort_by, sort_dir, last.created_at, last.id)
+
+    variants = _load_variants(db, [row.id for row in rows], active_only)
+    body = to_json(
+        {
+            "items": [_product_payload(row, variants[row.id], active_only) for row in rows],
+            "total": total,
+            "total_is_exact": total_is_exact,
+            "has_more": has_more,
+            "page": page,
+            "page_size": page_size,
+            "next_cursor": next_cursor,
+            "facets": facets,
+        }
     )
+    return body, [row.id for row in rows]
 
-    # compute listing stats
-    items = []
-    for p in products:
-        active_vars = [v for v in getattr(p, "variations", []) if (not active_only or v.is_active)]
-        prices = [float(v.unit_price) for v in active_vars] if active_vars else []
-        stocks = [int(v.stock) for v in active_vars] if active_vars else []
 
-        out = ProductOut.model_validate(p)
-        out.variants = [ProductVariationOut.model_validate(v) for v in active_vars]
-        out.min_price = min(prices) if prices else None
-        out.max_price = max(prices) if prices else None
-        out.total_stock = sum(stocks) if stocks else 0
-        items.append(out)
-
-    return PaginatedProducts(items=items, total=total, page=page, page_size=page_size)
-
-
-@router.get("/{product_id}", response_model=ProductOut)
-def get_product(product_id: uuid.UUID, db: Session = Depends(get_db), active_only: bool = True):
-    product = (
-        db.query(Product)
-        .options(joinedload(Product.variations))
+def _get_product(db: Session, product_id: uuid.UUID, active_only: bool) -> bytes:
+    """Single product rendered straight to ProductOut JSON."""
+    row = (
+        db.query(*_PRODUCT_COLUMNS, *_SUMMARY_COLUMNS, null().label("snippet"))
+        .select_from(Product)
+        .outerjoin(ProductSummary, ProductSummary.product_id == Product.id)
         .filter(Product.id == product_id)
         .first()
     )
-    if not product:
+    if not row:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    out = ProductOut.model_validate(product)
-    vars_all = getattr(product, "variations", [])
-    if active_only:
-        vars_all = [v for v in vars_all if v.is_active]
-    out.variants = [ProductVariationOut.model_validate(v) for v in vars_all]
-
-    prices = [float(v.unit_price) for v in vars_all]
-    out.min_price = min(prices) if prices else None
-    out.max_price = max(prices) if prices else None
-    out.total_stock = sum(int(v.stock) for v in vars_all) if vars_all else 0
-    return out
+    variants = _load_variants(db, [row.id], active_only)[row.id]
+    return to_json(_product_payload(row, variants, active_only))
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _cached_response(request: Request, entry: tuple[str, bytes]) -> Response:
+    """200 with the cached body, or 304 if the client already has this ETag."""
+    etag, body = entry
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Catalog reads are served from response_cache. Keys carry the catalog version
+# read *before* querying, so a catalog write that lands mid-request can't be
+# cached under the newer version. Entries are tagged with the products they
+# show (and STOCK when filtered on availability) so cart holds and checkout
+# only drop those; `since` keeps a read that raced one of them out of the cache.
+def _list_key(params: ProductListQuery) -> tuple:
+    return (catalog_version.current, "list", params.model_dump_json())
+
+
+def _product_key(product_id: uuid.UUID, active_only: bool) -> tuple:
+    return (catalog_version.current, "product", str(product_id), active_only)
+
+
+def _list_tags(params: ProductListQuery, product_ids) -> set:
+    tags = {str(pid) for pid in product_ids}
+    if params.in_stock_only:
+        tags.add(STOCK)
+    return tags
+
+
+# DB_ASYNC switches these read endpoints to AsyncSession. The query code is
+# shared: run_sync drives it on the asyncpg connection without a threadpool hop.
+if ASYNC_DB_ENABLED:
+    @router.get("", response_model=PaginatedProducts, dependencies=[Depends(LIST_QUERY_BUDGET)])
+    async def list_products(
+        request: Request,
+        params: Annotated[ProductListQuery, Query()],
+        db: AsyncSession = Depends(get_async_read_db),
+    ):
+        key = _list_key(params)
+        entry = response_cache.get(key)
+        if entry is None:
+            since = catalog_version.seq
+            body, product_ids = await db.run_sync(_list_products, params)
+            entry = response_cache.store(key, body, _list_tags(params, product_ids), since, replica_lag(db))
+        return _cached_response(request, entry)
+
+    @router.get("/{product_id}", response_model=ProductOut, dependencies=[Depends(DETAIL_QUERY_BUDGET)])
+    async def get_product(
+        request: Request,
+        product_id: uuid.UUID,
+        db: AsyncSession = Depends(get_async_read_db),
+        active_only: bool = True,
+    ):
+        key = _product_key(product_id, active_only)
+        entry = response_cache.get(key)
+        if entry is None:
+            since = catalog_version.seq
+            body = await db.run_sync(_get_product, product_id, active_only)
+            entry = response_cache.store(key, body, {str(product_id)}, since, replica_lag(db))
+        return _cached_response(request, entry)
+
+else:
+
+    @router.get("", response_model=PaginatedProducts, dependencies=[Depends(LIST_QUERY_BUDGET)])
+    def list_products(
+        request: Request,
+        params: Annotated[ProductListQuery, Query()],
+        db: Session = Depends(get_read_db),
+    ):
+        key = _list_key(params)
+        entry = response_cache.get(key)
+        if entry is None:
+            since = catalog_version.seq
+            body, product_ids = _list_products(db, params)
+            entry = response_cache.store(key, body, _list_tags(params, product_ids), since, replica_lag(db))
+        return _cached_response(request, entry)
+
+    @router.get("/{product_id}", response_model=ProductOut, dependencies=[Depends(DETAIL_QUERY_BUDGET)])
+    def get_product(
+        request: Request,
+        product_id: uuid.UUID,
+        db: Session = Depends(get_read_db),
+        active_only: bool = True,
+    ):
+        key = _product_key(product_id, active_only)
+        entry = response_cache.get(key)
+        if entry is None:
+            since = catalog_version.seq
+            body = _get_product(db, product_id, active_only)
+            entry = response_cache.store(key, body, {str(product_id)}, since, replica_lag(db))
+        return _cached_response(request, entry)
@@ -1,24 +1,56 @@
 import uuid
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Boolean, Integer, Numeric, case, cast, column, func, update, values
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db, require_role_ids
+from app.db.session import READ_YOUR_WRITES_COOKIE, ReadSessionLocal, SessionLocal, use_replica
 from app.models.user import User
 from app.models.product import Product
-from app.models.product_variation import ProductVariation
-from app.schemas.product import ProductCreate, VariantCreate, ProductUpdate, ProductToggleActive, ProductOut
+from app.models.product_variation import ProductVariation, on_hand_stock
+from app.services.catalog_cache import catalog_changed
+from app.services.catalog_export import csv_chunks, export_query, ndjson_chunks
+from app.services.catalog_import import (
+    CATALOG_IMPORT_BATCH_ROWS,
+    CATALOG_IMPORT_MAX_BYTES,
+    CatalogImport,
+    CatalogImportError,
+    import_format,
+    record_decoder,
+)
+from app.services.product_summary import lock_products, refresh_product_summaries
+from app.services.reservations import lock_variants
+from app.services.stock_shards import STOCK_SHARDS_MAX, lock_shards, reshard, set_shard_totals
+from app.schemas.product import (
+    CatalogBatchResult,
+    CatalogBatchUpdate,
+    CatalogImportResult,
+    ProductCreate,
+    VariantCreate,
+    VariantShards,
+    ProductUpdate,
+    ProductToggleActive,
+    ProductOut,
+)
 
 router = APIRouter(prefix="/seller", tags=["seller"])
 
 ADMIN_OR_SELLER = {1, 2}
 
-def _ensure_owner_or_admin(user: User, product: Product):
+def _can_edit(user: User, owner_id) -> bool:
     """Admin can edit anything, seller can only edit own products"""
     if user.role_id == 1:  # admin
-        return
-    if user.role_id == 2 and product.user_id == user.id:  # seller
-        return
-    raise HTTPException(status_code=403, detail="Not allowed")
+        return True
+    return user.role_id == 2 and owner_id == user.id  # seller
+
+def _ensure_owner_or_admin(user: User, product: Product):
+    if not _can_edit(user, product.user_id):
+        raise HTTPException(status_code=403, detail="Not allowed")
 
 @router.post("/products", response_model=ProductOut)
 def create_product(
@@ -33,10 +65,93 @@ def create_product(
         is_active=True,
     )
     db.add(product)
+    db.flush()
+    refresh_product_summaries(db, [product.id])
+    catalog_changed(db)
     db.commit()
     db.refresh(product)
     return product
 
+@router.post("/products/import", response_model=CatalogImportResult)
+async def import_catalog(
+    request: Request,
+    format: Literal["csv", "ndjson"] | None = None,
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+    user: User = Depends(require_role_ids(ADMIN_OR_SELLER)),
+):
+    """
+    Bulk create/update the caller's products and variants, one variant per row
+    (name, description, colour, size, unit_price, stock) as CSV with a header or
+    NDJSON. The body is streamed; invalid rows are skipped and reported. Stock
+    is never set below the units held in carts. dry_run=true reports what would change and rolls back.
+    """
+    fmt = format or import_format(request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson, or pass ?format=")
+
+    too_large = f"Imports are limited to {CATALOG_IMPORT_MAX_BYTES} bytes"
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > CATALOG_IMPORT_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=too_large)
+
+    decoder = record_decoder(fmt)
+    importer = CatalogImport(db, user.id)
+    try:
+        batch = []
+        received = 0
+        async for chunk in request.stream():
+            # checked as it arrives too: chunked uploads carry no Content-Length
+            received += len(chunk)
+            if received > CATALOG_IMPORT_MAX_BYTES:
+                raise CatalogImportError(too_large, status_code=413)
+            batch.extend(decoder.feed(chunk))
+            if len(batch) >= CATALOG_IMPORT_BATCH_ROWS:
+                await run_in_threadpool(importer.load_batch, batch)
+                batch = []
+        batch.extend(decoder.feed(b"", final=True))
+        if batch:
+            await run_in_threadpool(importer.load_batch, batch)
+        result = await run_in_threadpool(importer.finish, dry_run)
+    except Exception as exc:
+        await run_in_threadpool(db.rollback)
+        if isinstance(exc, CatalogImportError):
+            raise HTTPException(status_code=exc.status_code, detail=exc.detail)
+        raise
+
+    return result
+
+@router.get("/products/export")
+def export_catalog(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    user_id: uuid.UUID | None = None,
+    updated_since: datetime | None = None,
+    active_only: bool = False,
+    user: User = Depends(require_role_ids(ADMIN_OR_SELLER)),
+):
+    """
+    Stream products and variants as NDJSON (one product per line, variants
+    nested) or CSV (one line per variant). Sellers export their own catalog;
+    admins any seller's (user_id) or everything. updated_since limits the dump
+    to products that changed, or had a variant (or its stock shards) change, since then.
+    """
+    if user.role_id != 1:
+        if user_id is not None and user_id != user.id:
+            raise HTTPException(status_code=403, detail="Not allowed")
+        user_id = user.id
+
+    query = export_query(user_id, updated_since, active_only)
+    replica = use_replica(str(user.id), request.cookies.get(READ_YOUR_WRITES_COOKIE))
+    session_factory = ReadSessionLocal if replica else SessionLocal
+    if format == "csv":
+        return StreamingResponse(
+            csv_chunks(session_factory, query),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="catalog.csv"'},
+        )
+    return StreamingResponse(ndjson_chunks(session_factory, query), media_type="application/x-ndjson")
+
 @router.put("/products/{product_id}", response_model=ProductOut)
 def update_product(
     product_id: uuid.UUID,
@@ -57,6 +172,7 @@ def update_product(
         product.description = payload.description
 
     db.add(product)
+    catalog_changed(db)
     db.commit()
     db.refresh(product)
     return product
@@ -77,6 +193,8 @@ def toggle_product_active(
 
     product.is_active = payload.is_active
     db.add(product)
+    refresh_product_summaries(db, [product.id])
+    catalog_changed(db)
     db.commit()
     db.refresh(product)
     return {"id": str(product.id), "is_active": product.is_active}
@@ -108,10 +226,203 @@ def add_variant(
     )
     db.add(variant)
     try:
-        db.commit()
+        db.flush()
     except Exception:
         db.rollback()
         raise HTTPException(status_code=400, detail="Variant already exists for this product (colour+size).")
 
+    refresh_product_summaries(db, [product.id])
+    catalog_changed(db)
+    db.commit()
     db.refresh(variant)
     return variant
+
+@router.put("/variants/{variant_id}/shards")
+def set_variant_shards(
+    variant_id: uuid.UUID,
+    payload: VariantShards,
+    db: Session = Depends(get_db),
+    user: User = Depends(require_role_ids(ADMIN_OR_SELLER)),
+):
+    """
+    Hot-SKU mode: spread a variant's stock over `shards` counter rows so
+    concurrent checkouts of it don't queue on one row, or fold it back into a
+    plain stock column with shards=0. Sharded variants take no cart holds.
+    """
+    if payload.shards > STOCK_SHARDS_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {STOCK_SHARDS_MAX} shards")
+    try:
+        variant = db.query(ProductVariation).filter(ProductVariation.id == variant_id).with_for_update().first()
+        if not variant:
+            raise HTTPException(status_code=404, detail="Variant not found")
+        owner_id = db.query(Product.user_id).filter(Product.id == variant.product_id).scalar()
+        if not _can_edit(user, owner_id):
+            raise HTTPException(status_code=403, detail="Not allowed")
+
+        stock = reshard(db, variant, payload.shards)
+        refresh_product_summaries(db, [variant.product_id])
+        catalog_changed(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return {"id": str(variant_id), "stock_shards": payload.shards, "stock": stock}
+
+def _check_owners(user: User, ids: list, owners: dict) -> tuple[list, dict]:
+    """Split ids into editable ones and {id: "not_found" | "forbidden"}."""
+    allowed, failed = [], {}
+    for item_id in ids:
+        if item_id not in owners:
+            failed[item_id] = "not_found"
+        elif not _can_edit(user, owners[item_id]):
+            failed[item_id] = "forbidden"
+        else:
+            allowed.append(item_id)
+    return allowed, failed
+
+@router.post("/batch", response_model=CatalogBatchResult)
+def batch_update(
+    payload: CatalogBatchUpdate,
+    db: Session = Depends(get_db),
+    user: User = Depends(require_role_ids(ADMIN_OR_SELLER)),
+):
+    """
+    Apply many variant (stock / stock_delta / unit_price / is_active) and product
+    (is_active) changes in one transaction. Items that are missing, not yours or
+    would take stock below what carts hold (`reserved`) are skipped and reported;
+    the rest are applied.
+    """
+    variant_ids = [change.id for change in payload.variants]
+    product_ids = [change.id for change in payload.products]
+
+    variant_rows = (
+        db.query(ProductVariation.id, Product.user_id, ProductVariation.stock_shards)
+        .join(Product, Product.id == ProductVariation.product_id)
+        .filter(ProductVariation.id.in_(variant_ids))
+        .all()
+    ) if variant_ids else []
+    variant_owners = {row.id: row.user_id for row in variant_rows}
+    sharded = {row.id for row in variant_rows if row.stock_shards}
+    product_owners = dict(
+        db.query(Product.id, Product.user_id).filter(Product.id.in_(product_ids)).all()
+    ) if product_ids else {}
+    allowed_variants, variant_failed = _check_owners(user, variant_ids, variant_owners)
+    allowed_products, product_failed = _check_owners(user, product_ids, product_owners)
+
+    touched_products = set()
+    updated_variants, updated_products = {}, {}
+    try:
+        allowed = set(allowed_variants)
+        # lock order: variants (id order), then shards, then products
+        lock_variants(db, allowed)
+        # sharded variants' stock changes go to their shards; the row update
+        # below then only touches price / is_active for them
+        shard_changes = [
+            c for c in payload.variants
+            if c.id in allowed and c.id in sharded and (c.stock is not None or c.stock_delta is not None)
+        ]
+        if shard_changes:
+            current = lock_shards(db, [c.id for c in shard_changes])
+            totals = {
+                c.id: c.stock if c.stock is not None else current.get(c.id, 0) + c.stock_delta
+                for c in shard_changes
+            }
+            allowed -= {item_id for item_id, total in totals.items() if total < 0}
+            set_shard_totals(db, {item_id: total for item_id, total in totals.items() if total >= 0})
+
+        rows = [
+            (c.id, None, None, c.unit_price, c.is_active) if c.id in sharded
+            else (c.id, c.stock, c.stock_delta, c.unit_price, c.is_active)
+            for c in payload.variants if c.id in allowed
+        ]
+        if rows:
+            changes = values(
+                column("id", UUID(as_uuid=True)),
+                column("stock", Integer),
+                column("stock_delta", Integer),
+                column("unit_price", Numeric(10, 2)),
+                column("is_active", Boolean),
+                name="changes",
+            ).data(rows)
+            # all-NULL VALUES columns come back as text, so cast everything
+            new_stock = case(
+                (changes.c.stock.isnot(None), cast(changes.c.stock, Integer)),
+                else_=ProductVariation.stock + func.coalesce(cast(changes.c.stock_delta, Integer), 0),
+            )
+            result = db.execute(
+                update(ProductVariation)
+                .where(
+                    ProductVariation.id == cast(changes.c.id, UUID(as_uuid=True)),
+                    # held units are promised to carts, so stock can't drop below them
+                    new_stock >= ProductVariation.reserved,
+                )
+                .values(
+                    stock=new_stock,
+                    unit_price=func.coalesce(cast(changes.c.unit_price, Numeric(10, 2)), ProductVariation.unit_price),
+                    is_active=func.coalesce(cast(changes.c.is_active, Boolean), ProductVariation.is_active),
+                )
+                .returning(
+                    ProductVariation.id,
+                    ProductVariation.product_id,
+                    on_hand_stock.label("stock"),
+                    ProductVariation.unit_price,
+                    ProductVariation.is_active,
+                )
+            )
+            for row in result:
+                updated_variants[row.id] = row
+                touched_products.add(row.product_id)
+
+        allowed = set(allowed_products)
+        rows = [(c.id, c.is_active) for c in payload.products if c.id in allowed]
+        if rows:
+            # with the products whose variants changed, so all go in one id order
+            lock_products(db, touched_products | allowed)
+            changes = values(column("id", UUID(as_uuid=True)), column("is_active", Boolean), name="changes").data(rows)
+            result = db.execute(
+                update(Product)
+                .where(Product.id == cast(changes.c.id, UUID(as_uuid=True)))
+                .values(is_active=cast(changes.c.is_active, Boolean))
+                .returning(Product.id, Product.is_active)
+            )
+            for row in result:
+                updated_products[row.id] = row
+                touched_products.add(row.id)
+
+        refresh_product_summaries(db, touched_products)
+        if touched_products:
+            catalog_changed(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    variant_results = []
+    for item_id in variant_ids:
+        row = updated_variants.get(item_id)
+        if row is None:
+            # owned and present but filtered out by the stock guard
+            variant_results.append({"id": item_id, "status": variant_failed.get(item_id, "insufficient_stock")})
+        else:
+            variant_results.append({
+                "id": item_id,
+                "status": "updated",
+                "stock": row.stock,
+                "unit_price": row.unit_price,
+                "is_active": row.is_active,
+            })
+    product_results = []
+    for item_id in product_ids:
+        row = updated_products.get(item_id)
+        if row is None:
+            product_results.append({"id": item_id, "status": product_failed.get(item_id, "not_found")})
+        else:
+            product_results.append({"id": item_id, "status": "updated", "is_active": row.is_active})
+
+    updated = len(updated_variants) + len(updated_products)
+    return {
+        "updated": updated,
+        "failed": len(variant_ids) + len(product_ids) - updated,
+        "variants": variant_results,
+        "products": product_results,
+    }
@@ -1,10 +1,20 @@
 from datetime import date
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db, require_role_ids
+from app.core.rate_limit import login_throttle
+from app.core.security import password_pool
+from app.core.user_cache import user_cache
+from app.db.pool import pool_stats
+from app.services.catalog_cache import count_cache, response_cache
+from app.services.order_totals import check_order_totals
 
 router = APIRouter(prefix="/stats", tags=["stats"])
 
 LAUNCH_DATE = date(2025, 2, 15)
+ADMIN_ONLY = {1}
 
 
 @router.get("/days-since-launch")
@@ -16,3 +26,49 @@ def days_since_launch():
         "today": today.isoformat(),
         "days_since_launch": max(days, 0),
     }
+
+
+@router.get("/user-cache", dependencies=[Depends(require_role_ids(ADMIN_ONLY))])
+def user_cache_stats():
+    """Hit/miss counters for the authenticated-user cache (each hit is one DB lookup saved)."""
+    return user_cache.stats()
+
+
+@router.get("/password-pool", dependencies=[Depends(require_role_ids(ADMIN_ONLY))])
+def password_pool_stats():
+    """Queue wait vs bcrypt time for the password process pool."""
+    return password_pool.stats()
+
+
+@router.get("/login-throttle", dependencies=[Depends(require_role_ids(ADMIN_ONLY))])
+def login_throttle_stats():
+    return login_throttle.stats()
+
+
+@router.get("/db-pool", dependencies=[Depends(require_role_ids(ADMIN_ONLY))])
+def db_pool_stats():
+    """Checkout wait, in-use/overflow counts and timeouts per engine pool (this worker only)."""
+    return pool_stats()
+
+
+@router.get("/catalog-count-cache", dependencies=[Depends(require_role_ids(ADMIN_ONLY))])
+def catalog_count_cache_stats():
+    return count_cache.stats()
+
+
+@router.get("/catalog-response-cache", dependencies=[Depends(require_role_ids(ADMIN_ONLY))])
+def catalog_response_cache_stats():
+    """Hit rate and body bytes held by the GET /products response cache."""
+    return response_cache.stats()
+
+
+@router.get("/order-totals", dependencies=[Depends(require_role_ids(ADMIN_ONLY))])
+def order_totals_drift(db: Session = Depends(get_db)):
+    """Orders whose stored subtotal/item_count disagree with their items (a sample of them)."""
+    return check_order_totals(db)
+
+
+@router.post("/order-totals/repair", dependencies=[Depends(require_role_ids(ADMIN_ONLY))])
+def repair_order_totals(db: Session = Depends(get_db)):
+    """Rewrite drifted orders' stored totals from their items."""
+    return check_order_totals(db, repair=True)
@@ -0,0 +1,193 @@
+import ipaddress
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+from fastapi import Request
+from sqlalchemy import text
+
+from app.db.session import engine
+
+load_dotenv()
+
+LOGIN_THROTTLE_BACKEND = os.getenv("LOGIN_THROTTLE_BACKEND", "memory")  # memory/postgres
+LOGIN_THROTTLE_WINDOW_SECONDS = int(os.getenv("LOGIN_THROTTLE_WINDOW_SECONDS", "60"))
+LOGIN_THROTTLE_IP_LIMIT = int(os.getenv("LOGIN_THROTTLE_IP_LIMIT", "20"))
+LOGIN_THROTTLE_EMAIL_LIMIT = int(os.getenv("LOGIN_THROTTLE_EMAIL_LIMIT", "5"))
+LOGIN_THROTTLE_MAX_KEYS = int(os.getenv("LOGIN_THROTTLE_MAX_KEYS", "100000"))
+# Reverse proxies (IPs or CIDRs, comma-separated) whose X-Forwarded-For is
+# believed; without them every client behind the proxy shares its IP limit.
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(entry.strip(), strict=False)
+    for entry in os.getenv("TRUSTED_PROXIES", "").split(",")
+    if entry.strip()
+]
+
+
+class LoginThrottled(Exception):
+    """Raised when a login attempt is over its limit (mapped to 429)."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Too many login attempts")
+        self.retry_after = retry_after
+
+
+def _weighted_count(prev_count: int, curr_count: int, window_start: int, window: int, now: float) -> float:
+    # sliding-window counter: the previous window counts in proportion to how
+    # much of it still overlaps the last `window` seconds
+    overlap = 1.0 - (now - window_start) / window
+    return prev_count * max(overlap, 0.0) + curr_count
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> str:
+    """
+    The address to throttle: the peer, or when the peer is a trusted proxy, the
+    right-most X-Forwarded-For hop that isn't one (earlier hops are client-supplied).
+    """
+    host = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(host):
+        return host
+    hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else host
+
+
+class SlidingWindowLimiter:
+    """
+    Per-key sliding-window counter held in process memory.
+    Each key costs three ints (window start, previous and current count);
+    the least recently used keys are evicted past `max_keys`.
+    """
+
+    def __init__(self, window_seconds: int, max_keys: int):
+        self.window = window_seconds
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, list[int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def hit(self, key: str, limit: int) -> bool:
+        """Count one attempt for `key`; return False when it is over `limit`."""
+        now = time.time()
+        window_start = int(now // self.window) * self.window
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [window_start, 0, 0]
+                self._buckets[key] = bucket
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._buckets.move_to_end(key)
+
+            if bucket[0] != window_start:
+                # roll forward; anything older than one window is forgotten
+                bucket[1] = bucket[2] if window_start - bucket[0] == self.window else 0
+                bucket[2] = 0
+                bucket[0] = window_start
+            bucket[2] += 1
+            count = _weighted_count(bucket[1], bucket[2], window_start, self.window, now)
+        return count <= limit
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"backend": "memory", "keys": len(self._buckets), "evictions": self.evictions}
+
+
+class PostgresWindowLimiter:
+    """
+    Same sliding-window counter, stored in `login_throttle` so every worker
+    shares it. Each hit commits on its own short connection, not the caller's
+    session.
+    """
+
+    CLEANUP_EVERY = 500
+
+    def __init__(self, window_seconds: int):
+        self.window = window_seconds
+        self._calls = 0
+
+    def hit(self, key: str, limit: int) -> bool:
+        now = time.time()
+        window_start = int(now // self.window) * self.window
+        with engine.begin() as conn:
+            row = conn.execute(
+                text(
+                    """
+                    WITH hit AS (
+                        INSERT INTO login_throttle (key, window_start, count)
+                        VALUES (:key, :window_start, 1)
+                        ON CONFLICT (key, window_start)
+                        DO UPDATE SET count = login_throttle.count + 1
+                        RETURNING count
+                    )
+                    SELECT
+                        (SELECT count FROM hit) AS curr_count,
+                        COALESCE(
+                            (SELECT count FROM login_throttle WHERE key = :key AND window_start = :prev_start),
+                            0
+                        ) AS prev_count
+                    """
+                ),
+                {"key": key, "window_start": window_start, "prev_start": window_start - self.window},
+            ).one()
+
+            self._calls += 1
+            if self._calls % self.CLEANUP_EVERY == 0:
+                conn.execute(
+                    text("DELETE FROM login_throttle WHERE window_start < :cutoff"),
+                    {"cutoff": window_start - self.window},
+                )
+
+        count = _weighted_count(row.prev_count, row.curr_count, window_start, self.window, now)
+        return count <= limit
+
+    def stats(self) -> dict:
+        return {"backend": "postgres"}
+
+
+class LoginThrottle:
+    """Per-IP and per-email limits checked before any user lookup or bcrypt call."""
+
+    def __init__(self, limiter, ip_limit: int, email_limit: int):
+        self.limiter = limiter
+        self.ip_limit = ip_limit
+        self.email_limit = email_limit
+        self.rejected = 0
+
+    def check(self, ip: str, email: str) -> None:
+        allowed = self.limiter.hit(f"ip:{ip}", self.ip_limit)
+        if allowed:
+            allowed = self.limiter.hit(f"email:{email.strip().lower()}", self.email_limit)
+        if not allowed:
+            self.rejected += 1
+            raise LoginThrottled(retry_after=self.limiter.window)
+
+    def stats(self) -> dict:
+        return {
+            **self.limiter.stats(),
+            "window_seconds": self.limiter.window,
+            "ip_limit": self.ip_limit,
+            "email_limit": self.email_limit,
+            "rejected": self.rejected,
+        }
+
+
+if LOGIN_THROTTLE_BACKEND == "postgres":
+    _limiter = PostgresWindowLimiter(LOGIN_THROTTLE_WINDOW_SECONDS)
+else:
+    _limiter = SlidingWindowLimiter(LOGIN_THROTTLE_WINDOW_SECONDS, LOGIN_THROTTLE_MAX_KEYS)
+
+login_throttle = LoginThrottle(_limiter, LOGIN_THROTTLE_IP_LIMIT, LOGIN_THROTTLE_EMAIL_LIMIT)
@@ -1,8 +1,14 @@
+import asyncio
 import os
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from jose import jwt
 from passlib.context import CryptContext
 from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
 
 load_dotenv()
 
@@ -10,13 +16,150 @@ SECRET_KEY = os.getenv("SECRET_KEY", "change-me")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+# bcrypt runs in a dedicated process pool so login bursts don't hold the GIL
+# while catalog/cart requests wait. 0 workers = hash inline (old behaviour).
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", "2"))
+PASSWORD_POOL_MAX_QUEUE = int(os.getenv("PASSWORD_POOL_MAX_QUEUE", "32"))
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+
+class PasswordPoolBusy(RuntimeError):
+    """Raised when too many password operations are already queued (mapped to 503)."""
+
+
+def _timed_hash(password: str) -> tuple[str, float]:
+    started = time.perf_counter()
+    hashed = pwd_context.hash(password)
+    return hashed, time.perf_counter() - started
+
+
+def _timed_verify(password: str, hashed_password: str) -> tuple[bool, float]:
+    started = time.perf_counter()
+    ok = pwd_context.verify(password, hashed_password)
+    return ok, time.perf_counter() - started
+
+
+class PasswordPool:
+    """Process pool with a bounded number of in-flight jobs and wait/hash timing."""
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: ProcessPoolExecutor | None = None
+        self._slots = threading.BoundedSemaphore(workers + max_queue) if workers > 0 else None
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.hash_seconds_total = 0.0
+        self.hash_seconds_max = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a threaded server process is unsafe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _record(self, total: float, hash_time: float) -> None:
+        wait = max(total - hash_time, 0.0)
+        with self._lock:
+            self.completed += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+            self.hash_seconds_total += hash_time
+            self.hash_seconds_max = max(self.hash_seconds_max, hash_time)
+
+    def _acquire(self) -> None:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordPoolBusy("Password hashing queue is full")
+        with self._lock:
+            self.in_flight += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def run(self, fn, *args):
+        """Blocking variant for sync callers (holds the calling thread while queued)."""
+        if self._slots is None:
+            result, hash_time = fn(*args)
+            self._record(hash_time, hash_time)
+            return result
+
+        self._acquire()
+        started = time.perf_counter()
+        try:
+            result, hash_time = self._get_executor().submit(fn, *args).result()
+        finally:
+            self._release()
+        self._record(time.perf_counter() - started, hash_time)
+        return result
+
+    async def run_async(self, fn, *args):
+        """
+        Await the job on the event loop. Queued jobs hold no AnyIO threadpool
+        token, so a login burst can't starve sync routes of worker threads.
+        """
+        if self._slots is None:
+            result, hash_time = await run_in_threadpool(fn, *args)
+            self._record(hash_time, hash_time)
+            return result
+
+        self._acquire()
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, hash_time = await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self._release()
+        self._record(time.perf_counter() - started, hash_time)
+        return result
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            done = self.completed or 1
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_queue_wait_ms": round(self.wait_seconds_total / done * 1000, 3),
+                "max_queue_wait_ms": round(self.wait_seconds_max * 1000, 3),
+                "avg_hash_ms": round(self.hash_seconds_total / done * 1000, 3),
+                "max_hash_ms": round(self.hash_seconds_max * 1000, 3),
+            }
+
+
+password_pool = PasswordPool(PASSWORD_POOL_WORKERS, PASSWORD_POOL_MAX_QUEUE)
+
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_pool.run(_timed_hash, password)
 
 def verify_password(password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(password, hashed_password)
+    return password_pool.run(_timed_verify, password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    return await password_pool.run_async(_timed_hash, password)
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    return await password_pool.run_async(_timed_verify, password, hashed_password)
 
 def create_access_token(subject: str) -> str:
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
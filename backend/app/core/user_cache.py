@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from app.db.notifications import listen
+from app.db.session import SessionLocal
+
+load_dotenv()
+
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+# Upper bound on how stale a role/profile can be if a change notification is
+# lost (listener reconnecting); normally every worker drops it on commit.
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+
+# user_changed() NOTIFYs the user id here; every worker drops its snapshot
+USER_CHANNEL = "user_changed"
+
+
+class UserIdentityCache:
+    """
+    Bounded TTL/LRU cache for authenticated users.
+    - tokens map a verified JWT to (user_id, exp) so repeat requests skip decoding.
+    - users map user_id to a column snapshot so repeat requests skip the DB lookup.
+    Entries never outlive the token `exp` they were cached under.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._tokens: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._users: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def _put(self, store: OrderedDict, key: str, value) -> None:
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > self.max_entries:
+            store.popitem(last=False)
+            self.evictions += 1
+
+    def _get(self, store: OrderedDict, key: str):
+        entry = store.get(key)
+        if entry is None:
+            return None
+        if entry[-1] <= time.time():
+            del store[key]
+            return None
+        store.move_to_end(key)
+        return entry
+
+    def get_token(self, token: str) -> tuple[str, float] | None:
+        """Return (user_id, exp) for a token that was already verified and is not expired."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            return self._get(self._tokens, token)
+
+    def put_token(self, token: str, user_id: str, exp: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._put(self._tokens, token, (user_id, float(exp)))
+
+    def get_user(self, user_id: str) -> dict | None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._get(self._users, user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return dict(entry[0])
+
+    def put_user(self, user_id: str, snapshot: dict, exp: float) -> None:
+        if not self.enabled:
+            return
+        expires_at = min(time.time() + self.ttl_seconds, float(exp))
+        with self._lock:
+            self._put(self._users, user_id, (dict(snapshot), expires_at))
+
+    def invalidate(self, user_id) -> None:
+        """Drop the cached snapshot so the next request reloads the user from the DB."""
+        with self._lock:
+            if self._users.pop(str(user_id), None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+            self._users.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "tokens": len(self._tokens),
+                "users": len(self._users),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+user_cache = UserIdentityCache(USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL_SECONDS)
+
+
+def user_changed(db: Session, user_id) -> None:
+    """
+    Call inside the transaction that changes a user (role, profile, password).
+    When it commits, this worker and every other one drop the cached snapshot.
+    """
+    db.execute(select(func.pg_notify(USER_CHANNEL, str(user_id))))
+    db.info.setdefault("users_changed", set()).add(str(user_id))
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_user_changes(session):
+    for user_id in session.info.pop("users_changed", ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_user_changes(session):
+    session.info.pop("users_changed", None)
+
+
+# other workers' changes; after a reconnect we may have missed some, so drop all
+listen(USER_CHANNEL, user_cache.invalidate, user_cache.clear)
@@ -8,5 +8,9 @@ from app.models.role import Role  # noqa: F401
 from app.models.user import User  # noqa: F401
 from app.models.product import Product  # noqa: F401
 from app.models.product_variation import ProductVariation  # noqa: F401
+from app.models.product_summary import ProductSummary  # noqa: F401
 from app.models.order import Order  # noqa: F401
 from app.models.order_item import OrderItem  # noqa: F401
+from app.models.login_throttle import LoginThrottle  # noqa: F401
+from app.models.stock_reservation import StockReservation  # noqa: F401
+from app.models.stock_shard import StockShard  # noqa: F401
@@ -0,0 +1,154 @@
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dotenv import load_dotenv
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+load_dotenv()
+
+SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "true").lower() in ("1", "true", "yes")
+# flag a statement shape repeated this many times in one request (0 = off)
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "5"))
+# test mode: requests over their query budget fail with 500 instead of just logging
+SQL_QUERY_BUDGET_STRICT = os.getenv("SQL_QUERY_BUDGET_STRICT", "false").lower() in ("1", "true", "yes")
+
+logger = logging.getLogger("app.sql")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class RequestQueryStats:
+    """Statements issued while serving one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement: str | None = None
+        self.shapes: Counter[str] = Counter()
+        self.budget: int | None = None
+
+    def record(self, statement: str, seconds: float) -> None:
+        shape = _WHITESPACE.sub(" ", statement).strip()
+        self.count += 1
+        self.total_seconds += seconds
+        self.shapes[shape] += 1
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = shape
+
+    def repeated_shapes(self) -> list[dict]:
+        if SQL_N_PLUS_ONE_THRESHOLD <= 0:
+            return []
+        return [
+            {"count": n, "statement": shape[:200]}
+            for shape, n in self.shapes.most_common()
+            if n >= SQL_N_PLUS_ONE_THRESHOLD
+        ]
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+    def server_timing(self) -> str:
+        return (
+            f'db;dur={self.total_seconds * 1000:.2f};desc="{self.count} queries", '
+            f"db-slowest;dur={self.slowest_seconds * 1000:.2f}"
+        )
+
+
+_current_stats: ContextVar[RequestQueryStats | None] = ContextVar("request_query_stats", default=None)
+
+
+def current_query_stats() -> RequestQueryStats | None:
+    return _current_stats.get()
+
+
+def query_budget(max_statements: int):
+    """Route dependency declaring how many statements the route may issue."""
+    def _set_budget():
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.budget = max_statements
+    return _set_budget
+
+
+# Listening on the Engine class covers every engine, including the sync side
+# of the async engines.
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # a failed statement never reaches after_cursor_execute: drop its start
+    # time so the next statement on this pooled connection is timed correctly
+    conn = exception_context.connection
+    if conn is not None and exception_context.execution_context is not None:
+        started = conn.info.get("query_started")
+        if started:
+            started.pop()
+
+
+async def sql_instrumentation_middleware(request: Request, call_next):
+    if not SQL_INSTRUMENTATION:
+        return await call_next(request)
+
+    # The stats object is shared (not copied) with the endpoint's task/thread,
+    # so statements recorded there are visible here.
+    stats = RequestQueryStats()
+    token = _current_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        _current_stats.reset(token)
+
+    repeated = stats.repeated_shapes()
+    logger.info(
+        json.dumps(
+            {
+                "event": "request_sql",
+                "method": request.method,
+                "path": request.url.path,
+                "status": response.status_code,
+                "queries": stats.count,
+                "db_ms": round(stats.total_seconds * 1000, 2),
+                "slowest_ms": round(stats.slowest_seconds * 1000, 2),
+                "slowest_sql": (stats.slowest_statement or "")[:200],
+                "budget": stats.budget,
+                "n_plus_one": repeated,
+            }
+        )
+    )
+    if repeated:
+        logger.warning("Possible N+1 on %s %s: %s", request.method, request.url.path, repeated)
+
+    if stats.over_budget:
+        logger.warning(
+            "Query budget exceeded on %s %s: %s > %s",
+            request.method, request.url.path, stats.count, stats.budget,
+        )
+        if SQL_QUERY_BUDGET_STRICT:
+            return JSONResponse(
+                status_code=500,
+                content={"detail": f"Query budget exceeded: {stats.count} > {stats.budget}"},
+            )
+
+    response.headers["Server-Timing"] = stats.server_timing()
+    return response
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import os
+from dotenv import load_dotenv
+
+from app.db.session import engine
+
+load_dotenv()
+
+# how long a worker waits before reconnecting its LISTEN connection
+NOTIFY_LISTEN_RETRY_SECONDS = float(os.getenv("NOTIFY_LISTEN_RETRY_SECONDS", "5"))
+
+logger = logging.getLogger("app.notifications")
+
+# channel -> (on_notify(payload), on_reconnect()); see listen()
+_handlers: dict = {}
+
+
+def listen(channel: str, on_notify, on_reconnect) -> None:
+    """
+    Have every worker's listener call on_notify(payload) for each NOTIFY on
+    `channel`, and on_reconnect() whenever it (re)connects, since anything sent
+    while it was away is lost. Register at import time, before the app starts.
+    """
+    _handlers[channel] = (on_notify, on_reconnect)
+
+
+def _connect():
+    """Open the LISTEN connection (blocking; run in a thread)."""
+    conn = engine.raw_connection()
+    listener = conn.driver_connection
+    conn.detach()  # held for the life of the worker, not a pool slot
+    try:
+        listener.autocommit = True
+        with listener.cursor() as cursor:
+            for channel in _handlers:
+                cursor.execute(f"LISTEN {channel}")
+    except Exception:
+        conn.close()
+        raise
+    return conn, listener
+
+
+async def run_listener() -> None:
+    """
+    Background loop started from the app lifespan: one LISTEN connection per
+    worker for all registered channels, dispatching notifications as they arrive.
+    Connecting happens in a thread; reading only once the socket is readable,
+    so neither blocks the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        conn = None
+        try:
+            conn, listener = await asyncio.to_thread(_connect)
+            for _, on_reconnect in _handlers.values():
+                on_reconnect()
+
+            ready = asyncio.Event()
+            fd = listener.fileno()
+            loop.add_reader(fd, ready.set)
+            try:
+                while True:
+                    await ready.wait()
+                    ready.clear()
+                    listener.poll()
+                    for notification in listener.notifies:
+                        handler = _handlers.get(notification.channel)
+                        if handler is not None:
+                            handler[0](notification.payload)
+                    listener.notifies.clear()
+            finally:
+                loop.remove_reader(fd)
+        except Exception:
+            logger.exception("Notification listener failed; reconnecting")
+        finally:
+            if conn is not None:
+                await asyncio.to_thread(conn.close)
+        await asyncio.sleep(NOTIFY_LISTEN_RETRY_SECONDS)
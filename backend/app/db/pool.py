@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+load_dotenv()
+
+# Explicit settings win; otherwise, when DB_MAX_CONNECTIONS is given, each
+# worker gets an equal share of Postgres max_connections (minus a reserve for
+# psql/migrations). Nothing set = SQLAlchemy defaults (5 + 10 overflow).
+DB_POOL_SIZE = os.getenv("DB_POOL_SIZE")
+DB_MAX_OVERFLOW = os.getenv("DB_MAX_OVERFLOW")
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_MAX_CONNECTIONS = os.getenv("DB_MAX_CONNECTIONS")
+DB_RESERVED_CONNECTIONS = int(os.getenv("DB_RESERVED_CONNECTIONS", "5"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))  # uvicorn --workers
+
+
+class PoolMetrics:
+    """Checkout latency, saturation and timeout counters for one engine's pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.pool = None
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.peak_in_use = 0
+        self.peak_overflow = 0
+
+    def record(self, pool, wait: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.pool = pool
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+            self.peak_in_use = max(self.peak_in_use, pool.checkedout())
+            self.peak_overflow = max(self.peak_overflow, pool.overflow())
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            pool = self.pool
+            out = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_checkout_wait_ms": round(self.wait_seconds_total / (self.checkouts or 1) * 1000, 3),
+                "max_checkout_wait_ms": round(self.wait_seconds_max * 1000, 3),
+                "peak_in_use": self.peak_in_use,
+                "peak_overflow": self.peak_overflow,
+            }
+        if pool is not None:
+            out.update(
+                pool_size=pool.size(),
+                max_overflow=pool._max_overflow,
+                in_use=pool.checkedout(),
+                idle=pool.checkedin(),
+                overflow=pool.overflow(),
+            )
+        return out
+
+
+pool_metrics: dict[str, PoolMetrics] = {}
+
+
+def _metrics_for(name: str) -> PoolMetrics:
+    if name not in pool_metrics:
+        pool_metrics[name] = PoolMetrics(name)
+    return pool_metrics[name]
+
+
+class _InstrumentedPoolMixin:
+    # Timed around _do_get so we see the wait for a free slot, not just the
+    # "checkout" event that fires once a connection was already handed out.
+    def _do_get(self):
+        metrics = _metrics_for(self.logging_name or "default")
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            metrics.record(self, time.perf_counter() - started, timed_out=True)
+            raise
+        metrics.record(self, time.perf_counter() - started)
+        return conn
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _auto_size(pools_per_worker: int) -> tuple[int, int] | None:
+    if not DB_MAX_CONNECTIONS:
+        return None
+    budget = (int(DB_MAX_CONNECTIONS) - DB_RESERVED_CONNECTIONS) // (max(WEB_CONCURRENCY, 1) * pools_per_worker)
+    budget = max(budget, 2)
+    overflow = budget // 4
+    return budget - overflow, overflow
+
+
+def pool_options(name: str, asyncio: bool = False, pools_per_worker: int = 1) -> dict:
+    """create_engine/create_async_engine kwargs for an instrumented, env-sized pool."""
+    options = {
+        "poolclass": InstrumentedAsyncQueuePool if asyncio else InstrumentedQueuePool,
+        "pool_logging_name": name,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    sized = _auto_size(pools_per_worker)
+    if sized:
+        options["pool_size"], options["max_overflow"] = sized
+    if DB_POOL_SIZE:
+        options["pool_size"] = int(DB_POOL_SIZE)
+    if DB_MAX_OVERFLOW:
+        options["max_overflow"] = int(DB_MAX_OVERFLOW)
+    return options
+
+
+def pool_stats() -> dict:
+    return {name: metrics.snapshot() for name, metrics in pool_metrics.items()}
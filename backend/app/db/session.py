@@ -1,13 +1,197 @@
-from sqlalchemy import create_engine
+import hashlib
+import hmac
+import math
+import threading
+import time
+from contextvars import ContextVar
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
 
+from app.db.pool import pool_options
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL is not set. Create backend/.env from backend/.env.example.")
 
-engine = create_engine(DATABASE_URL)
+# DB_ASYNC=true serves the hot read endpoints from an asyncpg-backed AsyncSession
+# instead of psycopg2 sessions on the AnyIO threadpool.
+ASYNC_DB_ENABLED = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+# Optional read replica for catalog/order-history reads. Writes, checkout and
+# anything a user reads within READ_YOUR_WRITES_SECONDS of their own commit
+# stay on the primary.
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+# each worker holds one sync pool, plus an async one when DB_ASYNC is on
+POOLS_PER_WORKER = 2 if ASYNC_DB_ENABLED else 1
+
+engine = create_engine(DATABASE_URL, **pool_options("primary", pools_per_worker=POOLS_PER_WORKER))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+read_engine = None
+ReadSessionLocal = None
+if DATABASE_READ_URL:
+    read_engine = create_engine(DATABASE_READ_URL, **pool_options("replica", pools_per_worker=POOLS_PER_WORKER))
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+async_engine = None
+AsyncSessionLocal = None
+async_read_engine = None
+AsyncReadSessionLocal = None
+
+
+def _async_url(url: str):
+    """postgresql:// or postgresql+psycopg2:// -> postgresql+asyncpg://"""
+    return make_url(url).set(drivername="postgresql+asyncpg")
+
+
+if ASYNC_DB_ENABLED:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_engine = create_async_engine(
+        _async_url(DATABASE_URL),
+        **pool_options("primary-async", asyncio=True, pools_per_worker=POOLS_PER_WORKER),
+    )
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    if DATABASE_READ_URL:
+        async_read_engine = create_async_engine(
+            _async_url(DATABASE_READ_URL),
+            **pool_options("replica-async", asyncio=True, pools_per_worker=POOLS_PER_WORKER),
+        )
+        AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
+
+class RecentWriters:
+    """
+    user_id -> time of their last commit on the primary, for read-your-writes.
+    Process-local; other workers learn about the write from the
+    READ_YOUR_WRITES_COOKIE set on the response. Keep READ_YOUR_WRITES_SECONDS
+    above the replica lag.
+    """
+
+    def __init__(self, window_seconds: float, max_entries: int = 100000):
+        self.window = window_seconds
+        self.max_entries = max_entries
+        self._last_write: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, user_id) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._last_write[str(user_id)] = now
+            if len(self._last_write) > self.max_entries:
+                cutoff = now - self.window
+                self._last_write = {k: t for k, t in self._last_write.items() if t > cutoff}
+
+    def is_recent(self, user_id) -> bool:
+        if not user_id:
+            return False
+        with self._lock:
+            last = self._last_write.get(str(user_id))
+        return last is not None and time.monotonic() - last < self.window
+
+
+recent_writers = RecentWriters(READ_YOUR_WRITES_SECONDS)
+
+# Set on responses to requests that committed as a signed-in user, holding
+# "<user id>.<until>.<signature>": any worker keeps their reads on the primary
+# until then, whichever one served the write.
+READ_YOUR_WRITES_COOKIE = "rw_until"
+_SIGNING_KEY = os.getenv("SECRET_KEY", "change-me").encode()
+
+# user id of a commit made while serving the current request; see read_your_writes_middleware
+_request_writes: ContextVar[dict | None] = ContextVar("request_writes", default=None)
+
+
+def _signature(value: str) -> str:
+    return hmac.new(_SIGNING_KEY, f"rw:{value}".encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def write_marker(user_id, until: float) -> str:
+    value = f"{user_id}.{math.ceil(until)}"
+    return f"{value}.{_signature(value)}"
+
+
+def _marker_is_recent(user_id, marker: str | None) -> bool:
+    parts = (marker or "").rsplit(".", 2)
+    if len(parts) != 3 or not parts[1].isdigit():
+        return False
+    marked_user, until, signature = parts
+    return (
+        marked_user == str(user_id)
+        and hmac.compare_digest(signature, _signature(f"{marked_user}.{until}"))
+        and int(until) > time.time()
+    )
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _remember_writer(session):
+    # routes only commit when they write; get_current_user tags the session
+    user_id = session.info.get("user_id")
+    if user_id:
+        recent_writers.mark(user_id)
+        writes = _request_writes.get()
+        if writes is not None:
+            writes["user_id"] = user_id
+
+
+async def read_your_writes_middleware(request: Request, call_next):
+    """Sets READ_YOUR_WRITES_COOKIE when the request committed as a signed-in user."""
+    if ReadSessionLocal is None:
+        return await call_next(request)
+
+    # shared (not copied) with the endpoint's task/thread, like the SQL stats
+    writes = {}
+    token = _request_writes.set(writes)
+    try:
+        response = await call_next(request)
+    finally:
+        _request_writes.reset(token)
+    if "user_id" in writes:
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE,
+            write_marker(writes["user_id"], time.time() + READ_YOUR_WRITES_SECONDS),
+            max_age=math.ceil(READ_YOUR_WRITES_SECONDS),
+            httponly=True,
+            samesite="lax",
+        )
+    return response
+
+
+def get_db():
+    """
+    Request-scoped session. Auth and route code must depend on this same
+    function so FastAPI's dependency cache hands both one session (and so
+    at most one pooled connection) per request.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    """Async counterpart of get_db, only available when DB_ASYNC is enabled."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def use_replica(user_id, marker: str | None = None) -> bool:
+    """
+    Session router: replica for reads unless there is none or the user just
+    wrote, here or (per `marker`, their READ_YOUR_WRITES_COOKIE) on any worker.
+    """
+    return (
+        ReadSessionLocal is not None
+        and not recent_writers.is_recent(user_id)
+        and not _marker_is_recent(user_id, marker)
+    )
@@ -1,21 +1,45 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 import os
 
 from app.db import base  # this imports all models (side-effect)
 
-from app.db.session import engine
+from app.db.session import engine, read_your_writes_middleware
 from app.db.base import Base
 from app.models.user import User  # ensures model is registered
+from app.core.security import PasswordPoolBusy, password_pool
+from app.core.rate_limit import LoginThrottled
+from app.db.instrumentation import sql_instrumentation_middleware
+from app.db.notifications import run_listener
+from app.services.reservations import STOCK_HOLD_SWEEP_SECONDS, run_hold_sweeper
 from app.api.routes.auth import router as auth_router
 from app.api.routes.seller import router as seller_router
 from app.api.routes.products import router as products_router
 from app.api.routes.orders import router as orders_router
 from app.api.routes.stats import router as stats_router
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # every worker sweeps; SKIP LOCKED keeps them out of each other's way
+    sweeper = asyncio.create_task(run_hold_sweeper()) if STOCK_HOLD_SWEEP_SECONDS > 0 else None
+    # applies other workers' catalog and user changes to this worker's caches
+    listener = asyncio.create_task(run_listener())
+    yield
+    for task in (sweeper, listener):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    password_pool.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000")
 allow_origins = [origin.strip() for origin in cors_origins.split(",") if origin.strip()]
@@ -28,10 +52,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# per-request statement count / DB time -> Server-Timing header + log line
+app.middleware("http")(sql_instrumentation_middleware)
+# tells every worker (via a signed cookie) to keep a user who just wrote off the replica
+app.middleware("http")(read_your_writes_middleware)
+
 # Mount uploads directory for serving static files
 Path("uploads/profiles").mkdir(parents=True, exist_ok=True)
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
+
+@app.exception_handler(PasswordPoolBusy)
+async def password_pool_busy_handler(request: Request, exc: PasswordPoolBusy):
+    # fail fast instead of queueing more bcrypt work behind a login storm
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(LoginThrottled)
+async def login_throttled_handler(request: Request, exc: LoginThrottled):
+    return JSONResponse(status_code=429, content={"detail": str(exc)}, headers={"Retry-After": str(exc.retry_after)})
+
+
 app.include_router(auth_router)
 app.include_router(seller_router)
 app.include_router(products_router)
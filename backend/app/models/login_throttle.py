@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, BigInteger, Integer
+from app.db.base import Base
+
+class LoginThrottle(Base):
+    """Shared sliding-window counters, used when LOGIN_THROTTLE_BACKEND=postgres."""
+    __tablename__ = "login_throttle"
+
+    key = Column(String, primary_key=True)              # "ip:1.2.3.4" / "email:a@b.c"
+    window_start = Column(BigInteger, primary_key=True)  # unix seconds, aligned to the window
+    count = Column(Integer, nullable=False, default=0)
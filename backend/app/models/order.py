@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, DateTime, func, String, ForeignKey
+from sqlalchemy import Column, DateTime, func, String, ForeignKey, Index, Integer, Numeric
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.base import Base
 
@@ -9,10 +9,19 @@ class Order(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)  # buyer
     status = Column(String, nullable=False, default="cart")  # cart/paid/shipped/delivered
+    # sum of quantity * unit_price / quantity over the order's items, kept in step
+    # by the cart routes and checked by app.services.order_totals
+    subtotal = Column(Numeric(12, 2), nullable=False, default=0, server_default="0")
+    item_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     paid_at = Column(DateTime(timezone=True), nullable=True)
     shipped_at = Column(DateTime(timezone=True), nullable=True)
     delivered_at = Column(DateTime(timezone=True), nullable=True)
     cancelled_at = Column(DateTime(timezone=True), nullable=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        # order history: WHERE user_id = ? ORDER BY created_at DESC, id DESC (keyset pages)
+        Index("ix_orders_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
     
\ No newline at end of file
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, Integer, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, ForeignKey, Numeric, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from app.db.base import Base
 
@@ -7,13 +7,18 @@ class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    order_id = Column(UUID(as_uuid=True), ForeignKey("orders.id"), nullable=False)
-    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id"), nullable=False)
+    order_id = Column(UUID(as_uuid=True), ForeignKey("orders.id"), nullable=False, index=True)
+    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id"), nullable=False, index=True)
     variant_id = Column(UUID(as_uuid=True), ForeignKey("product_variations.id"), nullable=True)
 
     quantity = Column(Integer, nullable=False)
     unit_price = Column(Numeric(10, 2), nullable=False)
 
+    __table_args__ = (
+        # one line per variant in a cart; add-to-cart upserts on it
+        UniqueConstraint("order_id", "variant_id", name="uq_order_items_order_variant"),
+    )
+
     @property
     def total_price(self):
-        return float(self.quantity) * float(self.unit_price)
+        return self.quantity * self.unit_price
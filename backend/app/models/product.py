@@ -1,19 +1,50 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, func, Boolean, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, DateTime, func, Boolean, ForeignKey, Index, text, DDL, FetchedValue, event
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from app.db.base import Base
 
+# text search config used by the search_vector trigger and by queries against it
+SEARCH_CONFIG = "simple"
+
 class Product(Base):
     __tablename__ = "products"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)  # seller
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)  # seller
     name = Column(String, nullable=False)
     description = Column(String, nullable=True)
     is_active = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     deleted_at = Column(DateTime(timezone=True), nullable=True)
+    # name weighted above description, set by the trg_products_search_vector
+    # trigger (below); deferred so normal loads don't fetch it
+    search_vector = deferred(Column(TSVECTOR, FetchedValue(), server_onupdate=FetchedValue()))
+
+    variations = relationship("ProductVariation", back_populates="product", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # default listing: active products newest first
+        Index("ix_products_active_created_at", "created_at", "id", postgresql_where=text("is_active")),
+        # q=...: full-text match, plus trigram similarity on name/description for typos
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_products_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_products_description_trgm", "description", postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"}),
+    )
+
 
-    variations = relationship("ProductVariation", back_populates="product", cascade="all, delete-orphan")
\ No newline at end of file
+# A trigger rather than a STORED generated column, which can't be added to a
+# live table without rewriting it (see migration a7d29e3b5c14).
+event.listen(Product.__table__, "after_create", DDL(f"""
+    CREATE OR REPLACE FUNCTION products_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    CREATE TRIGGER trg_products_search_vector BEFORE INSERT OR UPDATE OF name, description
+    ON products FOR EACH ROW EXECUTE FUNCTION products_search_vector_update();
+"""))
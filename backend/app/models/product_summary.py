@@ -0,0 +1,23 @@
+from sqlalchemy import Column, DateTime, func, Boolean, ForeignKey, Integer, Numeric, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.base import Base
+
+class ProductSummary(Base):
+    """
+    One narrow row per product with listing stats over its active variants.
+    Maintained by app.services.product_summary.refresh_product_summaries.
+    """
+    __tablename__ = "product_summaries"
+
+    product_id = Column(UUID(as_uuid=True), ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    min_price = Column(Numeric(10, 2), nullable=True)   # NULL = no active variants
+    max_price = Column(Numeric(10, 2), nullable=True)
+    total_stock = Column(Integer, nullable=False, default=0)
+    active_variant_count = Column(Integer, nullable=False, default=0)
+    in_stock = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # sort_by=price
+        Index("ix_product_summaries_min_price", "min_price", "product_id", postgresql_where=text("min_price IS NOT NULL")),
+    )
@@ -1,8 +1,9 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, func, Boolean, ForeignKey, Integer, Numeric, UniqueConstraint
+from sqlalchemy import Column, String, DateTime, func, Boolean, ForeignKey, Integer, Numeric, UniqueConstraint, Index, text, CheckConstraint, case, select, DDL, FetchedValue, event
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.db.base import Base
+from app.models.stock_shard import StockShard
 
 class ProductVariation(Base):
     __tablename__ = "product_variations"
@@ -13,9 +14,18 @@ class ProductVariation(Base):
     colour = Column(String, nullable=False)
     size = Column(String, nullable=False)
     sku = Column(String, unique=True, nullable=True)
+    # case/space-normalized copies for indexed filtering and facet counts,
+    # set by the trg_product_variations_keys trigger (below)
+    colour_key = Column(String, FetchedValue(), server_onupdate=FetchedValue())
+    size_key = Column(String, FetchedValue(), server_onupdate=FetchedValue())
 
     unit_price = Column(Numeric(10, 2), nullable=False)
     stock = Column(Integer, default=0, nullable=False)
+    # units held by cart reservations until they are checked out or swept (see StockReservation)
+    reserved = Column(Integer, default=0, server_default="0", nullable=False)
+    # hot-SKU mode: > 0 means stock lives in that many StockShard rows (and
+    # `stock` / `reserved` are unused); set via PUT /seller/variants/{id}/shards
+    stock_shards = Column(Integer, default=0, server_default="0", nullable=False)
 
     is_active = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -24,8 +34,48 @@ class ProductVariation(Base):
     product = relationship("Product", back_populates="variations")
 
     __table_args__ = (
+        # also serves product_id lookups (leading column)
         UniqueConstraint("product_id", "colour", "size", name="uq_product_colour_size"),
+        CheckConstraint("reserved >= 0", name="ck_product_variations_reserved_nonnegative"),
+        # price filter / min(unit_price) over active variants
+        Index("ix_product_variations_active_product_price", "product_id", "unit_price", postgresql_where=text("is_active")),
+        # colour=/size= filters
+        Index("ix_product_variations_active_colour_key", "colour_key", "product_id", postgresql_where=text("is_active")),
+        Index("ix_product_variations_active_size_key", "size_key", "product_id", postgresql_where=text("is_active")),
     )
     def __repr__(self) -> str:
         return f"<ProductVariation(id={self.id}, product_id={self.product_id}, colour={self.colour!r}, size={self.size!r}, sku={self.sku!r})>"
-    
\ No newline at end of file
+
+
+# A trigger rather than STORED generated columns, which can't be added to a
+# live table without rewriting it (see migration b3f60c8a9e27).
+event.listen(ProductVariation.__table__, "after_create", DDL("""
+    CREATE OR REPLACE FUNCTION product_variations_keys_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.colour_key := lower(btrim(NEW.colour));
+        NEW.size_key := lower(btrim(NEW.size));
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    CREATE TRIGGER trg_product_variations_keys BEFORE INSERT OR UPDATE OF colour, size
+    ON product_variations FOR EACH ROW EXECUTE FUNCTION product_variations_keys_update();
+"""))
+    
+
+
+_shard_total = (
+    select(func.coalesce(func.sum(StockShard.stock), 0))
+    .where(StockShard.variant_id == ProductVariation.id)
+    .correlate(ProductVariation)
+    .scalar_subquery()
+)
+
+# units on hand: the shard counters for hot SKUs, the row itself otherwise
+on_hand_stock = case((ProductVariation.stock_shards > 0, _shard_total), else_=ProductVariation.stock)
+
+# what shoppers can still buy; seller edits keep stock >= reserved, and
+# sharded SKUs don't take holds
+available_stock = case(
+    (ProductVariation.stock_shards > 0, _shard_total),
+    else_=func.greatest(ProductVariation.stock - ProductVariation.reserved, 0),
+)
@@ -0,0 +1,25 @@
+import uuid
+from sqlalchemy import Column, DateTime, func, ForeignKey, Integer, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.base import Base
+
+class StockReservation(Base):
+    """
+    Stock held for a cart line until expires_at. The held quantity is also
+    counted in ProductVariation.reserved; app.services.reservations keeps
+    the two in step.
+    """
+    __tablename__ = "stock_reservations"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    order_id = Column(UUID(as_uuid=True), ForeignKey("orders.id"), nullable=False)
+    variant_id = Column(UUID(as_uuid=True), ForeignKey("product_variations.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("order_id", "variant_id", name="uq_stock_reservations_order_variant"),
+        # sweeper: oldest expired holds first
+        Index("ix_stock_reservations_expires_at", "expires_at"),
+    )
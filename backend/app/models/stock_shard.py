@@ -0,0 +1,21 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, CheckConstraint, func
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.base import Base
+
+class StockShard(Base):
+    """
+    One of ProductVariation.stock_shards counters that together hold a hot
+    variant's stock, so concurrent checkouts update different rows.
+    Maintained by app.services.stock_shards.
+    """
+    __tablename__ = "product_variation_stock_shards"
+
+    variant_id = Column(UUID(as_uuid=True), ForeignKey("product_variations.id", ondelete="CASCADE"), primary_key=True)
+    shard_no = Column(Integer, primary_key=True)  # 0 .. stock_shards - 1
+    stock = Column(Integer, nullable=False, default=0)
+    # stock changes only touch the shards, so incremental exports look here too
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        CheckConstraint("stock >= 0", name="ck_product_variation_stock_shards_stock_nonnegative"),
+    )
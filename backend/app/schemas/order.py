@@ -1,5 +1,5 @@
 import uuid
-from typing import Literal
+from typing import Literal, Optional
 from pydantic import BaseModel, Field
 from decimal import Decimal
 from datetime import datetime
@@ -18,6 +18,10 @@ class OrderItemCreate(BaseModel):
     quantity: int = Field(ge=1)
 
 
+class OrderItemsBatch(BaseModel):
+    items: list[OrderItemCreate] = Field(min_length=1, max_length=500)
+
+
 class OrderItemOut(BaseModel):
     id: uuid.UUID
     order_id: uuid.UUID
@@ -43,6 +47,26 @@ class OrderOut(BaseModel):
         from_attributes = True
 
 
+class OrderSummaryOut(OrderOut):
+    item_count: int  # units across all lines
+    total: Decimal
+
+
+class PaginatedOrders(BaseModel):
+    items: list[OrderSummaryOut]
+    has_more: bool = False
+    page_size: int
+    next_cursor: str | None = None
+
+
+class OrderHistoryQuery(BaseModel):
+    """Query parameters of GET /orders/me (shared by the sync and async routes)."""
+
+    status: Optional[Literal["cart", "paid", "shipped", "delivered"]] = None
+    page_size: int = Field(20, ge=1, le=100)
+    cursor: Optional[str] = Field(None, description="next_cursor of the previous page")
+
+
 class OrderDetailOut(BaseModel):
     order: OrderOut
     items: list[OrderItemOut]
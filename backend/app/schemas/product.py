@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from decimal import Decimal
-from typing import List, Optional
+from typing import List, Literal, Optional
 from uuid import UUID
 from datetime import datetime
 
@@ -41,6 +41,7 @@ class ProductOut(BaseModel):
     min_price: Decimal | None = None
     max_price: Decimal | None = None
     total_stock: int = 0
+    snippet: str | None = None  # HTML-escaped search hit with <mark>ed terms (only when q is given)
 
     class Config:
         from_attributes = True
@@ -52,8 +53,122 @@ class ProductUpdate(BaseModel):
 class ProductToggleActive(BaseModel):
     is_active: bool
 
+class FacetValue(BaseModel):
+    value: str
+    count: int
+
+class PriceBucket(BaseModel):
+    min: Decimal | None = None   # inclusive; None = open-ended
+    max: Decimal | None = None   # exclusive; None = open-ended
+    count: int
+
+class ProductFacets(BaseModel):
+    """Products matching the current filters, per colour / size / price bucket."""
+    colour: List[FacetValue] = []
+    size: List[FacetValue] = []
+    price: List[PriceBucket] = []
+
 class PaginatedProducts(BaseModel):
     items: List[ProductOut]
-    total: int
+    total: int | None          # None when count=none
+    total_is_exact: bool = True
+    has_more: bool = False
     page: int
     page_size: int
+    next_cursor: str | None = None  # None on the last page, and always for sort_by=relevance
+    facets: ProductFacets | None = None
+
+class ImportRowError(BaseModel):
+    row: int                  # 1-based data row (CSV header and blank lines not counted)
+    field: str | None = None
+    message: str
+
+class CatalogImportResult(BaseModel):
+    dry_run: bool
+    rows_received: int
+    rows_imported: int
+    rows_rejected: int
+    products_created: int
+    products_updated: int
+    variants_created: int
+    variants_updated: int
+    variants_unchanged: int
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False
+
+class VariantChange(BaseModel):
+    id: UUID
+    stock: int | None = Field(default=None, ge=0, le=2**31 - 1)  # absolute stock
+    stock_delta: int | None = Field(default=None, ge=-(2**31), le=2**31 - 1)  # restock (+) / write-off (-)
+    unit_price: Decimal | None = Field(default=None, gt=0, le=Decimal("99999999.99"))
+    is_active: bool | None = None
+
+    @model_validator(mode="after")
+    def _one_stock_change(self):
+        if self.stock is not None and self.stock_delta is not None:
+            raise ValueError("Give stock or stock_delta, not both")
+        return self
+
+class VariantShards(BaseModel):
+    shards: int = Field(ge=0)  # 0 = plain stock column
+
+class ProductChange(BaseModel):
+    id: UUID
+    is_active: bool
+
+class CatalogBatchUpdate(BaseModel):
+    variants: List[VariantChange] = Field(default=[], max_length=10000)
+    products: List[ProductChange] = Field(default=[], max_length=10000)
+
+    @model_validator(mode="after")
+    def _unique_ids(self):
+        for name, items in (("variants", self.variants), ("products", self.products)):
+            if len({item.id for item in items}) != len(items):
+                raise ValueError(f"Each id may appear only once in {name}")
+        return self
+
+class BatchItemResult(BaseModel):
+    id: UUID
+    status: Literal["updated", "not_found", "forbidden", "insufficient_stock"]
+    stock: int | None = None
+    unit_price: Decimal | None = None
+    is_active: bool | None = None
+
+class CatalogBatchResult(BaseModel):
+    updated: int
+    failed: int
+    variants: List[BatchItemResult] = []
+    products: List[BatchItemResult] = []
+
+class ProductListQuery(BaseModel):
+    """Query parameters of GET /products (shared by the sync and async routes)."""
+
+    # pagination
+    page: int = Field(1, ge=1)
+    page_size: int = Field(12, ge=1, le=100)
+    cursor: Optional[str] = Field(
+        None, description="next_cursor of the previous page (keyset mode; ignores page; not for sort_by=relevance)"
+    )
+    count: Literal["exact", "estimated", "none"] = Field(
+        "exact",
+        description="exact (cached per filter set), estimated (planner estimate for unfiltered listings) or none",
+    )
+
+    # filters
+    q: Optional[str] = Field(None, description="Full-text search in name and description (typo tolerant on name)")
+    user_id: Optional[UUID] = None
+    active_only: bool = True
+
+    colour: Optional[str] = None
+    size: Optional[str] = None
+    min_price: Optional[float] = Field(None, ge=0)
+    max_price: Optional[float] = Field(None, ge=0)
+    in_stock_only: bool = False
+    facets: bool = Field(False, description="Include colour/size/price-bucket counts for this filter set")
+
+    # sorting
+    sort_by: Literal["created_at", "name", "price", "relevance"] = Field(
+        "created_at",
+        description="relevance requires q and pages by page/page_size only: ranks aren't stable keys, so a cursor is rejected (400)",
+    )
+    sort_dir: Literal["asc", "desc"] = "desc"
@@ -0,0 +1,292 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from dotenv import load_dotenv
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from app.db.notifications import listen
+from app.db.session import READ_YOUR_WRITES_SECONDS, SessionLocal
+
+load_dotenv()
+
+CATALOG_COUNT_CACHE_SIZE = int(os.getenv("CATALOG_COUNT_CACHE_SIZE", "2048"))
+# counts are estimates anyway, so they also age out on their own
+CATALOG_COUNT_CACHE_TTL_SECONDS = int(os.getenv("CATALOG_COUNT_CACHE_TTL_SECONDS", "30"))
+CATALOG_RESPONSE_CACHE_SIZE = int(os.getenv("CATALOG_RESPONSE_CACHE_SIZE", "4096"))
+CATALOG_RESPONSE_CACHE_MAX_BYTES = int(os.getenv("CATALOG_RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CATALOG_RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("CATALOG_RESPONSE_CACHE_TTL_SECONDS", "60"))
+# recent stock changes remembered for reads that started before them
+CATALOG_STOCK_LOG_SIZE = int(os.getenv("CATALOG_STOCK_LOG_SIZE", "1024"))
+
+# Writers NOTIFY this channel inside their transaction (so only once it commits);
+# every worker LISTENs on it (app.db.notifications). The payload is
+# "<process token>" for a catalog change, "<process token> <product id>,..."
+# for a stock change.
+CATALOG_CHANNEL = "catalog_changed"
+# tags our own notifications, which after_commit has already applied
+_PROCESS_TOKEN = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+# NOTIFY payloads must stay under 8000 bytes; larger stock changes go out as catalog changes
+_MAX_PAYLOAD = 7900
+
+# cache tag of entries whose rows or counts depend on availability (in_stock_only)
+STOCK = "stock"
+
+
+class CatalogVersion:
+    """
+    This worker's catalog version. Cache keys include it, so a bump drops every
+    cached catalog read at once. Bumped on commit of a write that called
+    catalog_changed(), here directly and in other workers via LISTEN/NOTIFY.
+
+    Stock changes (stock_changed()) don't bump it; they drop only the entries
+    tagged with the products involved (or STOCK) and are logged here so reads
+    that started before them aren't cached afterwards.
+    """
+
+    def __init__(self, log_size: int = CATALOG_STOCK_LOG_SIZE):
+        self._value = 0
+        self._seq = 0
+        self._changed_at = float("-inf")
+        self._stock_log: deque = deque(maxlen=log_size)  # (seq, at, product ids)
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> int:
+        return self._value
+
+    @property
+    def seq(self) -> int:
+        """Counts every change; take it before querying and pass it to put()."""
+        return self._seq
+
+    def bump(self) -> None:
+        with self._lock:
+            self._value += 1
+            self._seq += 1
+            self._changed_at = time.monotonic()
+
+    def log_stock_change(self, product_ids) -> None:
+        with self._lock:
+            self._seq += 1
+            self._stock_log.append((self._seq, time.monotonic(), frozenset(product_ids)))
+
+    def settled(self, tags, since: int, lag_seconds: float = 0) -> bool:
+        """
+        True if no stock change touching `tags` happened after `since` or in the
+        last `lag_seconds`, and no catalog change in the last `lag_seconds`.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if lag_seconds and now - self._changed_at < lag_seconds:
+                return False
+            log = self._stock_log
+            if len(log) == log.maxlen and (log[0][0] > since + 1 or now - log[0][1] < lag_seconds):
+                return False  # the changes we'd need to check were already dropped
+            for seq, at, product_ids in reversed(log):
+                if seq <= since and now - at >= lag_seconds:
+                    break
+                if STOCK in tags or not product_ids.isdisjoint(tags):
+                    return False
+        return True
+
+
+class TTLCache:
+    """
+    Small thread-safe LRU with per-entry TTL and hit/miss counters. Entries
+    carry tags (product ids, STOCK) so stock changes can drop just theirs.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict = OrderedDict()  # key -> (value, expires, tags)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, tags=frozenset(), since: int | None = None, lag_seconds: float = 0) -> None:
+        """
+        Cache `value` under `key`. With `since` (catalog_version.seq taken before
+        the read), skip it if a change to its tags has landed since.
+        """
+        if not self._fits(value):
+            return
+        with self._lock:
+            # checked under our lock: a change logged after this is still
+            # followed by its invalidate(), which then removes the entry
+            if since is not None and not catalog_version.settled(tags, since, lag_seconds):
+                return
+            self._drop(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds, frozenset(tags))
+            self._added(value)
+            while self._over_limit():
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, product_ids) -> int:
+        """Drop entries tagged with any of `product_ids` or with STOCK; returns how many."""
+        product_ids = set(product_ids)
+        with self._lock:
+            stale = [key for key, (_, _, tags) in self._entries.items() if STOCK in tags or not product_ids.isdisjoint(tags)]
+            for key in stale:
+                self._drop(key)
+        return len(stale)
+
+    def _fits(self, value) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def _added(self, value) -> None:
+        pass
+
+    def _over_limit(self) -> bool:
+        return len(self._entries) > self.max_entries
+
+    def _drop(self, key) -> None:
+        self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class ResponseCache(TTLCache):
+    """
+    Rendered catalog responses as (etag, body) pairs, bounded by entry count
+    and by total body bytes.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: int):
+        super().__init__(max_entries, ttl_seconds)
+        self.max_bytes = max_bytes
+        self.bytes = 0
+
+    def store(self, key, body: bytes, tags=frozenset(), since: int | None = None, lag_seconds: float = 0) -> tuple[str, bytes]:
+        """Cache `body` under `key` (see put) with a strong ETag and return (etag, body)."""
+        entry = (f'"{hashlib.sha256(body).hexdigest()[:32]}"', body)
+        self.put(key, entry, tags, since, lag_seconds)
+        return entry
+
+    def _fits(self, value) -> bool:
+        return super()._fits(value) and len(value[1]) <= self.max_bytes
+
+    def _added(self, value) -> None:
+        self.bytes += len(value[1])
+
+    def _over_limit(self) -> bool:
+        return super()._over_limit() or self.bytes > self.max_bytes
+
+    def _drop(self, key) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= len(old[0][1])
+
+    def stats(self) -> dict:
+        out = super().stats()
+        with self._lock:
+            out.update(bytes=self.bytes, max_bytes=self.max_bytes)
+        return out
+
+
+catalog_version = CatalogVersion()
+count_cache = TTLCache(CATALOG_COUNT_CACHE_SIZE, CATALOG_COUNT_CACHE_TTL_SECONDS)
+response_cache = ResponseCache(
+    CATALOG_RESPONSE_CACHE_SIZE, CATALOG_RESPONSE_CACHE_MAX_BYTES, CATALOG_RESPONSE_CACHE_TTL_SECONDS
+)
+
+
+def catalog_changed(db: Session) -> None:
+    """
+    Call inside the transaction of any write that can change listing results.
+    Takes effect when it commits: in this worker at once, in the others via NOTIFY.
+    """
+    db.execute(select(func.pg_notify(CATALOG_CHANNEL, _PROCESS_TOKEN)))
+    db.info["catalog_changed"] = True
+
+
+def stock_changed(db: Session, product_ids) -> None:
+    """
+    Like catalog_changed, for writes that only move available stock (cart holds,
+    releases, checkout): drops just the cached reads showing these products and
+    those filtered on availability.
+    """
+    product_ids = {str(pid) for pid in product_ids if pid is not None}
+    if not product_ids:
+        return
+    payload = f"{_PROCESS_TOKEN} {','.join(sorted(product_ids))}"
+    if len(payload) > _MAX_PAYLOAD:
+        catalog_changed(db)
+        return
+    db.execute(select(func.pg_notify(CATALOG_CHANNEL, payload)))
+    db.info.setdefault("stock_changed", set()).update(product_ids)
+
+
+def _apply_stock_change(product_ids) -> None:
+    # log first: a read that checks the log before this is followed by our invalidate()
+    catalog_version.log_stock_change(product_ids)
+    response_cache.invalidate(product_ids)
+    count_cache.invalidate(product_ids)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_catalog_change(session):
+    stock = session.info.pop("stock_changed", None)
+    if session.info.pop("catalog_changed", False):
+        catalog_version.bump()
+    elif stock:
+        _apply_stock_change(stock)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_catalog_change(session):
+    session.info.pop("catalog_changed", None)
+    session.info.pop("stock_changed", None)
+
+
+def replica_lag(db) -> float:
+    """
+    How far reads on `db` may trail committed changes: READ_YOUR_WRITES_SECONDS
+    (kept above the replica lag) on a replica, else 0. Pass it to put()/store()
+    so a lagging replica can't pin pre-change results in the cache.
+    """
+    return READ_YOUR_WRITES_SECONDS if db.info.get("replica") else 0
+
+
+def _apply_notification(payload: str) -> None:
+    token, _, product_ids = payload.partition(" ")
+    if token == _PROCESS_TOKEN:
+        return
+    if product_ids:
+        _apply_stock_change(product_ids.split(","))
+    else:
+        catalog_version.bump()
+
+
+def _resync() -> None:
+    # anything committed while the listener was away
+    catalog_version.bump()
+
+
+listen(CATALOG_CHANNEL, _apply_notification, _resync)
@@ -0,0 +1,140 @@
+import csv
+import io
+import os
+from datetime import datetime
+from itertools import groupby
+from dotenv import load_dotenv
+from pydantic_core import to_json
+from sqlalchemy import and_, case, exists, func, or_, select
+from sqlalchemy.orm import aliased, sessionmaker
+
+from app.models.product import Product
+from app.models.product_variation import ProductVariation, on_hand_stock
+from app.models.stock_shard import StockShard
+
+load_dotenv()
+
+# rows fetched per server-side cursor round trip / bytes buffered per chunk sent
+CATALOG_EXPORT_FETCH_ROWS = int(os.getenv("CATALOG_EXPORT_FETCH_ROWS", "2000"))
+CATALOG_EXPORT_CHUNK_BYTES = int(os.getenv("CATALOG_EXPORT_CHUNK_BYTES", str(64 * 1024)))
+
+PRODUCT_FIELDS = ["id", "user_id", "name", "description", "is_active", "created_at", "updated_at"]
+VARIANT_FIELDS = ["id", "colour", "size", "sku", "unit_price", "stock", "is_active", "created_at", "updated_at"]
+CSV_HEADER = [f"product_{f}" for f in PRODUCT_FIELDS] + [f"variant_{f}" for f in VARIANT_FIELDS]
+
+# sharded SKUs' stock changes only touch their shards, so they count as variant updates
+_shards_updated_at = (
+    select(func.max(StockShard.updated_at))
+    .where(StockShard.variant_id == ProductVariation.id)
+    .correlate(ProductVariation)
+    .scalar_subquery()
+)
+variant_updated_at = case(
+    (ProductVariation.stock_shards > 0, func.greatest(ProductVariation.updated_at, _shards_updated_at)),
+    else_=ProductVariation.updated_at,
+)
+
+_VARIANT_COLUMNS = {
+    "stock": on_hand_stock.label("stock"),  # sharded SKUs sum their shards
+    "updated_at": variant_updated_at.label("updated_at"),
+}
+_COLUMNS = [getattr(Product, f) for f in PRODUCT_FIELDS] + [
+    _VARIANT_COLUMNS.get(f, getattr(ProductVariation, f)) for f in VARIANT_FIELDS
+]
+
+
+def export_query(user_id=None, updated_since: datetime | None = None, active_only: bool = False):
+    """
+    One row per variant (products without variants get one row of NULLs),
+    ordered so a product's rows are adjacent. With updated_since, a product is
+    exported whole when it, any of its variants or their stock shards changed
+    since then.
+    """
+    variant_join = ProductVariation.product_id == Product.id
+    if active_only:
+        variant_join = and_(variant_join, ProductVariation.is_active)
+    query = (
+        select(*_COLUMNS)
+        .select_from(Product)
+        .outerjoin(ProductVariation, variant_join)
+        .where(Product.deleted_at.is_(None))
+        .order_by(Product.id, ProductVariation.id)
+    )
+    if user_id is not None:
+        query = query.where(Product.user_id == user_id)
+    if active_only:
+        query = query.where(Product.is_active)
+    if updated_since is not None:
+        changed = aliased(ProductVariation)
+        query = query.where(
+            or_(
+                func.coalesce(Product.updated_at, Product.created_at) >= updated_since,
+                exists().where(
+                    changed.product_id == Product.id,
+                    func.coalesce(changed.updated_at, changed.created_at) >= updated_since,
+                ),
+                exists().where(
+                    changed.product_id == Product.id,
+                    StockShard.variant_id == changed.id,
+                    StockShard.updated_at >= updated_since,
+                ),
+            )
+        )
+    return query
+
+
+def _rows(session_factory: sessionmaker, query):
+    # own session: the request's session is gone by the time the body streams
+    db = session_factory()
+    try:
+        # yield_per streams through a server-side cursor instead of buffering the result
+        yield from db.execute(query.execution_options(yield_per=CATALOG_EXPORT_FETCH_ROWS))
+    finally:
+        db.close()
+
+
+def _chunked(pieces):
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CATALOG_EXPORT_CHUNK_BYTES:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def ndjson_chunks(session_factory: sessionmaker, query):
+    """One JSON object per product with its variants nested."""
+    split = len(PRODUCT_FIELDS)
+
+    def lines():
+        for _, rows in groupby(_rows(session_factory, query), key=lambda row: row[0]):
+            rows = list(rows)
+            item = dict(zip(PRODUCT_FIELDS, rows[0][:split]))
+            item["variants"] = [dict(zip(VARIANT_FIELDS, row[split:])) for row in rows if row[split] is not None]
+            yield to_json(item) + b"\n"
+
+    return _chunked(lines())
+
+
+def csv_chunks(session_factory: sessionmaker, query):
+    """Flat CSV, one line per variant with its product's columns repeated."""
+    def lines():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def take() -> bytes:
+            data = buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            return data
+
+        writer.writerow(CSV_HEADER)
+        yield take()
+        for row in _rows(session_factory, query):
+            writer.writerow(["" if v is None else v.isoformat() if isinstance(v, datetime) else v for v in row])
+            yield take()
+
+    return _chunked(lines())
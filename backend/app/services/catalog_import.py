@@ -0,0 +1,441 @@
+import codecs
+import csv
+import io
+import json
+import os
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from dotenv import load_dotenv
+from pydantic import ValidationError
+from sqlalchemy import Integer, Numeric, String, case, column, exists, func, literal, literal_column, select, table, text, true, update
+from sqlalchemy.dialects.postgresql import UUID, insert
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+from app.models.product_variation import ProductVariation
+from app.models.stock_shard import StockShard
+from app.schemas.product import ProductCreate, VariantCreate
+from app.services.catalog_cache import catalog_changed
+from app.services.product_summary import refresh_product_summaries
+from app.services.reservations import lock_variants
+from app.services.stock_shards import spread
+
+load_dotenv()
+
+# rows validated and COPYed per round trip to the worker thread
+CATALOG_IMPORT_BATCH_ROWS = int(os.getenv("CATALOG_IMPORT_BATCH_ROWS", "5000"))
+CATALOG_IMPORT_MAX_ROWS = int(os.getenv("CATALOG_IMPORT_MAX_ROWS", "200000"))
+# request body size, and characters in one line / CSV record (a body without
+# newlines, or a quote that is never closed, would otherwise be buffered whole)
+CATALOG_IMPORT_MAX_BYTES = int(os.getenv("CATALOG_IMPORT_MAX_BYTES", str(100 * 1024 * 1024)))
+CATALOG_IMPORT_MAX_LINE_LENGTH = int(os.getenv("CATALOG_IMPORT_MAX_LINE_LENGTH", "65536"))
+# the report lists at most this many row errors (all of them are still counted)
+CATALOG_IMPORT_MAX_ERRORS = int(os.getenv("CATALOG_IMPORT_MAX_ERRORS", "1000"))
+
+REQUIRED_COLUMNS = ["name", "colour", "size", "unit_price", "stock"]
+
+# Numeric(10, 2) / int4 limits, checked up front so one bad row can't fail the COPY
+MAX_UNIT_PRICE = Decimal("99999999.99")
+MAX_STOCK = 2**31 - 1
+
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+staging = table(
+    "catalog_import_staging",
+    column("row_no", Integer),
+    column("name", String),
+    column("description", String),
+    column("colour", String),
+    column("size", String),
+    column("unit_price", Numeric(10, 2)),
+    column("stock", Integer),
+    column("product_id", UUID(as_uuid=True)),
+)
+
+
+class CatalogImportError(ValueError):
+    """The upload as a whole can't be imported (bad header, encoding, too many rows)."""
+
+    def __init__(self, detail: str, status_code: int = 400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+def import_format(content_type: str | None) -> str | None:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return CONTENT_TYPES.get(media_type)
+
+
+def _check_length(length: int) -> None:
+    if length > CATALOG_IMPORT_MAX_LINE_LENGTH:
+        raise CatalogImportError(
+            f"Lines and CSV records are limited to {CATALOG_IMPORT_MAX_LINE_LENGTH} characters", status_code=413
+        )
+
+
+class _RecordDecoder(ABC):
+    """
+    Turns body chunks into (row_no, fields) pairs as they arrive. `fields` is a
+    dict of raw values, or an error message when the row couldn't be parsed.
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._tail: list[str] = []  # pieces of the unfinished last line
+        self._tail_length = 0
+        self.rows = 0
+
+    def feed(self, chunk: bytes, final: bool = False) -> list[tuple[int, dict | str]]:
+        try:
+            decoded = self._decoder.decode(chunk, final)
+        except UnicodeDecodeError:
+            raise CatalogImportError("Body is not valid UTF-8")
+        if "\n" not in decoded and not final:
+            # still inside one line: keep the piece, don't re-join and re-split
+            self._tail.append(decoded)
+            self._tail_length += len(decoded)
+            _check_length(self._tail_length)
+            return []
+        self._tail.append(decoded)
+        lines = "".join(self._tail).split("\n")
+        last = "" if final else lines.pop()
+        self._tail, self._tail_length = [last], len(last)
+        rows = []
+        for line in lines:
+            _check_length(len(line))
+            rows.extend(self._line(line))
+        _check_length(self._tail_length)
+        if final:
+            rows.extend(self._end())
+        return rows
+
+    def _row(self, fields: dict | str) -> tuple[int, dict | str]:
+        self.rows += 1
+        if self.rows > CATALOG_IMPORT_MAX_ROWS:
+            raise CatalogImportError(f"Imports are limited to {CATALOG_IMPORT_MAX_ROWS} rows", status_code=413)
+        return self.rows, fields
+
+    @abstractmethod
+    def _line(self, line: str) -> list:
+        """Rows completed by one input line (none while a record is still open)."""
+
+    def _end(self) -> list:
+        return []
+
+
+class NdjsonDecoder(_RecordDecoder):
+    def _line(self, line):
+        line = line.strip()
+        if not line:
+            return []
+        try:
+            fields = json.loads(line)
+        except ValueError:
+            return [self._row("Invalid JSON")]
+        if not isinstance(fields, dict):
+            return [self._row("Expected one JSON object per line")]
+        return [self._row(fields)]
+
+
+class CsvDecoder(_RecordDecoder):
+    """CSV with a header row; quoted fields may contain newlines."""
+
+    def __init__(self):
+        super().__init__()
+        self.header: list[str] | None = None
+        self._record = ""
+        self._open_quote = False
+
+    def _line(self, line):
+        self._record += line + "\n"
+        _check_length(len(self._record))
+        if line.count('"') % 2:
+            self._open_quote = not self._open_quote
+        if self._open_quote:
+            return []
+        record, self._record = self._record, ""
+        values = next(csv.reader([record]), [])
+        if not any(v.strip() for v in values):
+            return []
+        if self.header is None:
+            self.header = [v.strip().lower() for v in values]
+            missing = [name for name in REQUIRED_COLUMNS if name not in self.header]
+            if missing:
+                raise CatalogImportError(f"CSV header is missing columns: {', '.join(missing)}")
+            return []
+        if len(values) != len(self.header):
+            return [self._row(f"Expected {len(self.header)} columns, got {len(values)}")]
+        fields = dict(zip(self.header, values))
+        fields["description"] = fields.get("description") or None
+        return [self._row(fields)]
+
+    def _end(self):
+        if self._record:
+            return [self._row("Unterminated quoted field")]
+        return []
+
+
+def record_decoder(fmt: str) -> _RecordDecoder:
+    return CsvDecoder() if fmt == "csv" else NdjsonDecoder()
+
+
+def _validate(fields: dict | str) -> tuple[tuple | None, list[tuple[str | None, str]]]:
+    """Return the staging row for valid input, else [(field, message), ...]."""
+    if isinstance(fields, str):
+        return None, [(None, fields)]
+
+    errors = []
+    product = variant = None
+    try:
+        product = ProductCreate.model_validate({"name": fields.get("name"), "description": fields.get("description")})
+    except ValidationError as exc:
+        errors.extend((".".join(str(p) for p in e["loc"]) or None, e["msg"]) for e in exc.errors())
+    try:
+        variant = VariantCreate.model_validate({name: fields.get(name) for name in ("colour", "size", "unit_price", "stock")})
+    except ValidationError as exc:
+        errors.extend((".".join(str(p) for p in e["loc"]) or None, e["msg"]) for e in exc.errors())
+    if variant is not None:
+        if variant.unit_price > MAX_UNIT_PRICE:
+            errors.append(("unit_price", f"Must be at most {MAX_UNIT_PRICE}"))
+        if variant.stock > MAX_STOCK:
+            errors.append(("stock", f"Must be at most {MAX_STOCK}"))
+    if errors:
+        return None, errors
+
+    values = (product.name, product.description, variant.colour, variant.size)
+    if any(v and "\x00" in v for v in values):
+        return None, [(None, "Text fields cannot contain NUL characters")]
+    return (*values, variant.unit_price, variant.stock), []
+
+
+class CatalogImport:
+    """
+    One seller's import, in a single transaction:
+    validated rows are COPYed into a temp staging table batch by batch, then
+    finish() merges the staging table into products / product_variations.
+    Rows are keyed by product name (per seller) and colour + size; a later row
+    for the same key wins.
+    """
+
+    def __init__(self, db: Session, user_id):
+        self.db = db
+        self.user_id = user_id
+        self.rows_received = 0
+        self.rows_imported = 0
+        self.rows_rejected = 0
+        self.errors: list[dict] = []
+        self.error_count = 0
+        self._started = False
+
+    def _start(self) -> None:
+        # serializes imports per seller, so two uploads can't both create the same product name
+        self.db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": f"catalog_import:{self.user_id}"})
+        self.db.execute(text(
+            "CREATE TEMP TABLE catalog_import_staging ("
+            " row_no integer NOT NULL, name text NOT NULL, description text,"
+            " colour text NOT NULL, size text NOT NULL, unit_price numeric(10, 2) NOT NULL,"
+            " stock integer NOT NULL, product_id uuid"
+            ") ON COMMIT DROP"
+        ))
+        self._started = True
+
+    def _reject(self, row_no: int, errors) -> None:
+        self.rows_rejected += 1
+        for field, message in errors:
+            self.error_count += 1
+            if len(self.errors) < CATALOG_IMPORT_MAX_ERRORS:
+                self.errors.append({"row": row_no, "field": field, "message": message})
+
+    def load_batch(self, rows: list[tuple[int, dict | str]]) -> None:
+        """Validate `rows` and COPY the valid ones into the staging table."""
+        if not self._started:
+            self._start()
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        loaded = 0
+        for row_no, fields in rows:
+            self.rows_received += 1
+            values, errors = _validate(fields)
+            if errors:
+                self._reject(row_no, errors)
+                continue
+            # None -> unquoted empty field, which COPY reads as NULL
+            writer.writerow((row_no, *values))
+            loaded += 1
+        if not loaded:
+            return
+
+        buffer.seek(0)
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                "COPY catalog_import_staging (row_no, name, description, colour, size, unit_price, stock) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        finally:
+            cursor.close()
+        self.rows_imported += loaded
+
+    def finish(self, dry_run: bool = False) -> dict:
+        """Merge the staging table, then commit (or roll back for a dry run)."""
+        counts = {
+            "products_created": 0,
+            "products_updated": 0,
+            "variants_created": 0,
+            "variants_updated": 0,
+            "variants_unchanged": 0,
+        }
+        if self.rows_imported:
+            counts = self._merge()
+        if dry_run:
+            self.db.rollback()
+        else:
+            catalog_changed(self.db)
+            self.db.commit()
+        return {
+            "dry_run": dry_run,
+            "rows_received": self.rows_received,
+            "rows_imported": self.rows_imported,
+            "rows_rejected": self.rows_rejected,
+            **counts,
+            "errors": self.errors,
+            "errors_truncated": self.error_count > len(self.errors),
+        }
+
+    def _merge(self) -> dict:
+        db = self.db
+        s = staging
+        owned = (Product.user_id == self.user_id, Product.deleted_at.is_(None))
+        # autovacuum never analyzes temp tables; without stats the planner
+        # assumes a tiny staging table and picks nested loops over the whole file
+        db.execute(text("ANALYZE catalog_import_staging"))
+
+        # last non-empty description given for each product name
+        descriptions = (
+            select(s.c.name, s.c.description)
+            .where(s.c.description.isnot(None))
+            .distinct(s.c.name)
+            .order_by(s.c.name, s.c.row_no.desc())
+            .subquery()
+        )
+        names = select(s.c.name).distinct().subquery()
+
+        created = db.execute(
+            insert(Product)
+            .from_select(
+                ["id", "user_id", "name", "description", "is_active"],
+                select(
+                    func.gen_random_uuid(),
+                    literal(self.user_id, Product.user_id.type),
+                    names.c.name,
+                    descriptions.c.description,
+                    true(),
+                )
+                .select_from(names.outerjoin(descriptions, descriptions.c.name == names.c.name))
+                .where(~exists().where(*owned, Product.name == names.c.name)),
+            )
+            .returning(Product.id)
+        ).scalars().all()
+
+        # a seller may already have several products with one name; the oldest one receives the rows
+        target = (
+            select(Product.id, Product.name)
+            .where(*owned)
+            .distinct(Product.name)
+            .order_by(Product.name, Product.created_at, Product.id)
+            .subquery()
+        )
+        db.execute(update(s).where(s.c.name == target.c.name).values(product_id=target.c.id))
+
+        # Lock the existing variants in id order before the upsert, which would
+        # otherwise lock them in (product_id, colour, size) order and could
+        # deadlock against checkout, cart holds and batch updates. Products are
+        # written after the variants, matching the order those paths use.
+        lock_variants(db, db.execute(
+            select(ProductVariation.id).where(
+                ProductVariation.product_id == s.c.product_id,
+                ProductVariation.colour == s.c.colour,
+                ProductVariation.size == s.c.size,
+            )
+        ).scalars().all())
+
+        latest = (
+            select(func.gen_random_uuid(), s.c.product_id, s.c.colour, s.c.size, s.c.unit_price, s.c.stock, true())
+            .distinct(s.c.product_id, s.c.colour, s.c.size)
+            .order_by(s.c.product_id, s.c.colour, s.c.size, s.c.row_no.desc())
+        )
+        stmt = insert(ProductVariation).from_select(
+            ["id", "product_id", "colour", "size", "unit_price", "stock", "is_active"], latest
+        )
+        plain = ProductVariation.stock_shards == 0
+        # a file can't take stock below what carts hold: it is raised to `reserved`
+        new_stock = func.greatest(stmt.excluded.stock, ProductVariation.reserved)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_product_colour_size",
+            set_={
+                "unit_price": stmt.excluded.unit_price,
+                "stock": case((plain, new_stock), else_=ProductVariation.stock),
+                "updated_at": func.now(),
+            },
+            # rows that already match are left alone (no dead tuple, not reported as updated)
+            where=(
+                ProductVariation.unit_price.is_distinct_from(stmt.excluded.unit_price)
+                | (plain & ProductVariation.stock.is_distinct_from(new_stock))
+            ),
+        )
+        # xmax is 0 only for freshly inserted tuples
+        upserted = db.execute(stmt.returning(ProductVariation.id, literal_column("xmax = 0"))).all()
+
+        # sharded (hot-SKU) variants keep their stock in shards: spread the file's figure over them
+        rows = latest.subquery()
+        share = spread(rows.c.stock, ProductVariation.stock_shards, StockShard.shard_no)
+        resharded = db.execute(
+            update(StockShard)
+            .where(
+                StockShard.variant_id == ProductVariation.id,
+                ProductVariation.stock_shards > 0,
+                ProductVariation.product_id == rows.c.product_id,
+                ProductVariation.colour == rows.c.colour,
+                ProductVariation.size == rows.c.size,
+                StockShard.stock != share,
+            )
+            .values(stock=share)
+            .returning(StockShard.variant_id)
+        ).scalars().all()
+
+        products_updated = db.execute(
+            update(Product)
+            .where(
+                *owned,
+                Product.name == descriptions.c.name,
+                Product.id.in_(select(s.c.product_id)),
+                Product.description.is_distinct_from(descriptions.c.description),
+            )
+            .values(description=descriptions.c.description)
+        ).rowcount
+
+        keys = db.execute(
+            select(func.count()).select_from(select(s.c.product_id, s.c.colour, s.c.size).distinct().subquery())
+        ).scalar_one()
+
+        product_ids = db.execute(select(s.c.product_id).distinct()).scalars().all()
+        refresh_product_summaries(db, product_ids)
+
+        variants_created = sum(1 for _, new in upserted if new)
+        variants_updated = len({variant_id for variant_id, new in upserted if not new} | set(resharded))
+        return {
+            "products_created": len(created),
+            "products_updated": products_updated,
+            "variants_created": variants_created,
+            "variants_updated": variants_updated,
+            "variants_unchanged": keys - variants_created - variants_updated,
+        }
@@ -0,0 +1,80 @@
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models.order import Order
+from app.models.order_item import OrderItem
+
+
+def _line_totals():
+    return (
+        select(
+            OrderItem.order_id,
+            func.sum(OrderItem.quantity * OrderItem.unit_price).label("subtotal"),
+            func.sum(OrderItem.quantity).label("item_count"),
+        )
+        .group_by(OrderItem.order_id)
+        .subquery()
+    )
+
+
+def recompute_order_totals(db: Session, order_ids) -> None:
+    """Set the stored totals of `order_ids` from their items (lock the orders first)."""
+    order_ids = list(order_ids)
+    if not order_ids:
+        return
+    of_order = OrderItem.order_id == Order.id
+    db.execute(
+        update(Order)
+        .where(Order.id.in_(order_ids))
+        .values(
+            subtotal=func.coalesce(
+                select(func.sum(OrderItem.quantity * OrderItem.unit_price)).where(of_order).scalar_subquery(), 0
+            ),
+            item_count=func.coalesce(select(func.sum(OrderItem.quantity)).where(of_order).scalar_subquery(), 0),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def check_order_totals(db: Session, repair: bool = False, sample: int = 20) -> dict:
+    """
+    Recompute every order's totals from order_items in one aggregate pass and
+    report the orders whose stored subtotal / item_count disagree. With repair,
+    those orders are locked (in id order, like cart edits lock them) and their
+    totals rewritten from a fresh read, then committed.
+    """
+    lines = _line_totals()
+    subtotal = func.coalesce(lines.c.subtotal, 0)
+    item_count = func.coalesce(lines.c.item_count, 0)
+    drifted = db.execute(
+        select(
+            Order.id,
+            Order.status,
+            Order.subtotal,
+            Order.item_count,
+            subtotal.label("actual_subtotal"),
+            item_count.label("actual_item_count"),
+        )
+        .select_from(Order)
+        .outerjoin(lines, lines.c.order_id == Order.id)
+        .where(or_(Order.subtotal != subtotal, Order.item_count != item_count))
+        .order_by(Order.id)
+    ).all()
+    checked = db.execute(select(func.count()).select_from(Order)).scalar_one()
+
+    if repair and drifted:
+        ids = [row.id for row in drifted]
+        try:
+            db.execute(select(Order.id).where(Order.id.in_(ids)).order_by(Order.id).with_for_update())
+            recompute_order_totals(db, ids)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    return {
+        "checked": checked,
+        "drifted": len(drifted),
+        "repaired": len(drifted) if repair else 0,
+        "samples": [row._asdict() for row in drifted[:sample]],
+    }
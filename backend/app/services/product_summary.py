@@ -0,0 +1,73 @@
+from sqlalchemy import and_, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+from app.models.product_summary import ProductSummary
+from app.models.product_variation import ProductVariation, available_stock
+
+SUMMARY_COLUMNS = ["product_id", "min_price", "max_price", "total_stock", "active_variant_count", "in_stock", "updated_at"]
+
+
+def summary_select(product_ids=None):
+    """
+    Aggregate active variants per product; products without any still get a row.
+    Stock figures are available stock (held units excluded).
+    """
+    query = (
+        select(
+            Product.id,
+            func.min(ProductVariation.unit_price),
+            func.max(ProductVariation.unit_price),
+            func.coalesce(func.sum(available_stock), 0),
+            func.count(ProductVariation.id),
+            func.coalesce(func.bool_or(available_stock > 0), False),
+            func.now(),
+        )
+        .select_from(Product)
+        .outerjoin(
+            ProductVariation,
+            and_(ProductVariation.product_id == Product.id, ProductVariation.is_active),
+        )
+        .group_by(Product.id)
+    )
+    if product_ids is not None:
+        query = query.where(Product.id.in_(product_ids))
+    return query
+
+
+def lock_products(db: Session, product_ids) -> None:
+    """
+    SELECT ... FOR NO KEY UPDATE the products in id order. Take it after any
+    variant locks; NO KEY UPDATE leaves order_items' FK KEY SHARE locks unblocked.
+    """
+    product_ids = sorted({pid for pid in product_ids if pid is not None})
+    if product_ids:
+        db.execute(
+            select(Product.id)
+            .where(Product.id.in_(product_ids))
+            .order_by(Product.id)
+            .with_for_update(key_share=True)
+        )
+
+
+def refresh_product_summaries(db: Session, product_ids) -> None:
+    """
+    Recompute the summary rows of `product_ids` in one upsert.
+    Call it in the same transaction as the variant/stock write so readers never
+    see a summary that disagrees with committed variants.
+    """
+    product_ids = list({pid for pid in product_ids if pid is not None})
+    if not product_ids:
+        return
+    # Lock the products before aggregating: the INSERT ... SELECT below then
+    # takes its snapshot only once other transactions refreshing them have
+    # committed, so a later commit can't store figures that miss an earlier
+    # one's variant changes.
+    lock_products(db, product_ids)
+    stmt = insert(ProductSummary).from_select(SUMMARY_COLUMNS, summary_select(product_ids))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ProductSummary.product_id],
+        set_={name: stmt.excluded[name] for name in SUMMARY_COLUMNS[1:]},
+    )
+    db.execute(stmt)
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import os
+from datetime import timedelta
+from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Integer, cast, column, delete, func, select, update, values
+from sqlalchemy.dialects.postgresql import UUID, insert
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.product_variation import ProductVariation
+from app.models.stock_reservation import StockReservation
+from app.services.catalog_cache import stock_changed
+from app.services.product_summary import refresh_product_summaries
+
+load_dotenv()
+
+STOCK_HOLD_TTL_SECONDS = int(os.getenv("STOCK_HOLD_TTL_SECONDS", "900"))
+# how often each worker releases expired holds (0 = no sweeper in this process)
+STOCK_HOLD_SWEEP_SECONDS = float(os.getenv("STOCK_HOLD_SWEEP_SECONDS", "30"))
+STOCK_HOLD_SWEEP_BATCH = int(os.getenv("STOCK_HOLD_SWEEP_BATCH", "500"))
+
+logger = logging.getLogger("app.reservations")
+
+# Lock order everywhere: order row -> variants (by id) -> reservations.
+# Checkout, cart edits and the sweeper all follow it, so they can't deadlock.
+
+
+def lock_variants(db: Session, variant_ids, skip_locked: bool = False) -> list:
+    """SELECT ... FOR UPDATE the variants in id order; returns the ids actually locked."""
+    variant_ids = list(variant_ids)
+    if not variant_ids:
+        return []
+    return db.execute(
+        select(ProductVariation.id)
+        .where(ProductVariation.id.in_(variant_ids))
+        .order_by(ProductVariation.id)
+        .with_for_update(skip_locked=skip_locked)
+    ).scalars().all()
+
+
+def _adjust_reserved(db: Session, deltas: dict, require_available: bool = False) -> list:
+    """Add deltas[variant_id] to `reserved` in one UPDATE ... FROM (VALUES); returns (id, product_id) rows updated."""
+    changes = values(
+        column("variant_id", UUID(as_uuid=True)), column("delta", Integer), name="changes"
+    ).data(list(deltas.items()))
+    variant_id = cast(changes.c.variant_id, UUID(as_uuid=True))
+    delta = cast(changes.c.delta, Integer)
+    stmt = (
+        update(ProductVariation)
+        .where(ProductVariation.id == variant_id)
+        # holds aren't catalog edits: keep updated_at (and incremental exports) as they were
+        .values(reserved=ProductVariation.reserved + delta, updated_at=ProductVariation.updated_at)
+    )
+    if require_available:
+        stmt = stmt.where(ProductVariation.stock - ProductVariation.reserved >= delta)
+    return db.execute(stmt.returning(ProductVariation.id, ProductVariation.product_id)).all()
+
+
+def hold_stock(db: Session, order_id, quantities: dict) -> list:
+    """
+    Reserve quantities[variant_id] more units for the cart and (re)start the
+    hold's TTL. Returns the variant ids without enough available stock; the
+    caller rolls back if there are any.
+    """
+    lock_variants(db, quantities)
+    held = {row.id for row in _adjust_reserved(db, quantities, require_available=True)}
+    short = [variant_id for variant_id in quantities if variant_id not in held]
+    if short:
+        return short
+
+    stmt = insert(StockReservation).values([
+        {
+            "order_id": order_id,
+            "variant_id": variant_id,
+            "quantity": quantity,
+            "expires_at": func.now() + timedelta(seconds=STOCK_HOLD_TTL_SECONDS),
+        }
+        for variant_id, quantity in quantities.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_stock_reservations_order_variant",
+        set_={"quantity": StockReservation.quantity + stmt.excluded.quantity, "expires_at": stmt.excluded.expires_at},
+    )
+    db.execute(stmt)
+    return []
+
+
+def _release_locked(db: Session, *criteria) -> tuple[int, set]:
+    # variants of the matching holds must already be locked by the caller
+    released = db.execute(
+        delete(StockReservation)
+        .where(*criteria)
+        .returning(StockReservation.variant_id, StockReservation.quantity)
+    ).all()
+    deltas: dict = {}
+    for variant_id, quantity in released:
+        deltas[variant_id] = deltas.get(variant_id, 0) - quantity
+    if not deltas:
+        return 0, set()
+    return len(released), {row.product_id for row in _adjust_reserved(db, deltas)}
+
+
+def release_holds(db: Session, order_id, variant_ids=None) -> set:
+    """Give back the cart's holds (optionally only on variant_ids); returns affected product ids."""
+    criteria = [StockReservation.order_id == order_id]
+    if variant_ids is not None:
+        criteria.append(StockReservation.variant_id.in_(list(variant_ids)))
+    lock_variants(db, db.execute(select(StockReservation.variant_id).where(*criteria)).scalars().all())
+    return _release_locked(db, *criteria)[1]
+
+
+def sweep_expired_holds(batch_size: int = STOCK_HOLD_SWEEP_BATCH) -> int:
+    """
+    Release expired holds batch by batch, one transaction each. Variants that
+    another transaction has locked (a checkout in progress) are skipped and
+    picked up on a later pass. Returns the number of holds released.
+    """
+    total = 0
+    while True:
+        db = SessionLocal()
+        try:
+            expired = (
+                select(StockReservation.variant_id)
+                .where(StockReservation.expires_at < func.now())
+                .order_by(StockReservation.expires_at)
+                .limit(batch_size)
+            )
+            locked = lock_variants(db, db.execute(expired).scalars().all(), skip_locked=True)
+            count, product_ids = _release_locked(
+                db, StockReservation.variant_id.in_(locked), StockReservation.expires_at < func.now()
+            ) if locked else (0, set())
+            refresh_product_summaries(db, product_ids)
+            stock_changed(db, product_ids)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        total += count
+        if count < batch_size:
+            return total
+
+
+async def run_hold_sweeper() -> None:
+    """Background loop started from the app lifespan."""
+    while True:
+        await asyncio.sleep(STOCK_HOLD_SWEEP_SECONDS)
+        try:
+            released = await run_in_threadpool(sweep_expired_holds)
+            if released:
+                logger.info("Released %s expired stock holds", released)
+        except Exception:
+            logger.exception("Stock hold sweep failed")
@@ -0,0 +1,148 @@
+import os
+from dotenv import load_dotenv
+from sqlalchemy import Integer, case, cast, column, delete, func, insert, select, update, values
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Session
+
+from app.models.product_variation import ProductVariation
+from app.models.stock_reservation import StockReservation
+from app.models.stock_shard import StockShard
+
+load_dotenv()
+
+STOCK_SHARDS_MAX = int(os.getenv("STOCK_SHARDS_MAX", "64"))
+
+# Hot-SKU mode. A variant with stock_shards = N keeps its stock in N StockShard
+# rows instead of product_variations.stock, and takes no cart holds. Checkout
+# decrements one shard it picks at random among the unlocked ones, so
+# concurrent buyers of the same SKU mostly update different rows.
+#
+# Shards come last in the lock order (order row -> variants -> reservations ->
+# shards), and several variants' shards are always locked in variant id order.
+
+
+def spread(total, shards, shard_no):
+    """Shard shard_no's share of total: total // shards, plus one for the first total % shards shards."""
+    return total // shards + case((shard_no < total % shards, 1), else_=0)
+
+
+def lock_shards(db: Session, variant_ids) -> dict:
+    """SELECT ... FOR UPDATE every shard of the variants; returns {variant_id: total stock}."""
+    totals: dict = {}
+    variant_ids = list(variant_ids)
+    if not variant_ids:
+        return totals
+    rows = db.execute(
+        select(StockShard.variant_id, StockShard.stock)
+        .where(StockShard.variant_id.in_(variant_ids))
+        .order_by(StockShard.variant_id, StockShard.shard_no)
+        .with_for_update()
+    )
+    for variant_id, stock in rows:
+        totals[variant_id] = totals.get(variant_id, 0) + stock
+    return totals
+
+
+def set_shard_totals(db: Session, totals: dict) -> None:
+    """Spread totals[variant_id] evenly over each variant's shards (lock them first with lock_shards)."""
+    if not totals:
+        return
+    changes = values(
+        column("variant_id", UUID(as_uuid=True)), column("total", Integer), name="changes"
+    ).data(list(totals.items()))
+    db.execute(
+        update(StockShard)
+        .where(
+            StockShard.variant_id == cast(changes.c.variant_id, UUID(as_uuid=True)),
+            ProductVariation.id == StockShard.variant_id,
+        )
+        .values(stock=spread(cast(changes.c.total, Integer), ProductVariation.stock_shards, StockShard.shard_no))
+    )
+
+
+def reshard(db: Session, variant: ProductVariation, shards: int) -> int:
+    """
+    Move a locked variant's stock into `shards` counters (0 = back to a plain
+    stock column). Turning sharding on releases the variant's cart holds:
+    sharded variants are only checked at checkout. Returns the total stock.
+    """
+    if variant.stock_shards:
+        total = lock_shards(db, [variant.id]).get(variant.id, 0)
+    else:
+        released = db.execute(
+            delete(StockReservation).where(StockReservation.variant_id == variant.id).returning(StockReservation.id)
+        ).all()
+        if released:
+            variant.reserved = 0
+        total = variant.stock
+
+    db.execute(delete(StockShard).where(StockShard.variant_id == variant.id))
+    if shards:
+        db.execute(
+            insert(StockShard),
+            [
+                {"variant_id": variant.id, "shard_no": shard_no, "stock": total // shards + (shard_no < total % shards)}
+                for shard_no in range(shards)
+            ],
+        )
+    variant.stock_shards = shards
+    variant.stock = 0 if shards else total
+    db.flush()
+    return total
+
+
+def take_from_shards(db: Session, variant_id, quantity: int) -> int | None:
+    """
+    Decrement a sharded variant's stock by quantity. Tries one random shard
+    that can cover it, skipping shards other checkouts have locked; if there
+    is none, locks all shards and takes from the fullest ones first.
+    Returns the stock left, or None when there isn't enough.
+    """
+    picked = (
+        select(StockShard.variant_id, StockShard.shard_no)
+        .where(StockShard.variant_id == variant_id, StockShard.stock >= quantity)
+        .order_by(func.random())
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .cte("picked")
+    )
+    taken = db.execute(
+        update(StockShard)
+        .where(
+            StockShard.variant_id == picked.c.variant_id,
+            StockShard.shard_no == picked.c.shard_no,
+            StockShard.stock >= quantity,
+        )
+        .values(stock=StockShard.stock - quantity)
+        .returning(StockShard.shard_no)
+    ).first()
+    if taken is not None:
+        # shards we didn't lock may still change; only "sold out" matters to callers
+        return db.execute(
+            select(func.sum(StockShard.stock)).where(StockShard.variant_id == variant_id)
+        ).scalar_one()
+
+    # slow path: every shard is short or busy, so wait for all of them
+    shards = db.execute(
+        select(StockShard.shard_no, StockShard.stock)
+        .where(StockShard.variant_id == variant_id)
+        .order_by(StockShard.shard_no)
+        .with_for_update()
+    ).all()
+    left = sum(stock for _, stock in shards)
+    if left < quantity:
+        return None
+    remaining, takes = quantity, []
+    for shard_no, stock in sorted(shards, key=lambda shard: -shard.stock):
+        if remaining <= 0:
+            break
+        take = min(stock, remaining)
+        takes.append((shard_no, take))
+        remaining -= take
+    changes = values(column("shard_no", Integer), column("take", Integer), name="changes").data(takes)
+    db.execute(
+        update(StockShard)
+        .where(StockShard.variant_id == variant_id, StockShard.shard_no == cast(changes.c.shard_no, Integer))
+        .values(stock=StockShard.stock - cast(changes.c.take, Integer))
+    )
+    return left - quantity
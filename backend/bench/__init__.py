@@ -0,0 +1,5 @@
+"""
+Load benchmarks. They need a disposable Postgres database: set
+BENCH_DATABASE_URL (its tables are dropped and recreated), then run e.g.
+`python -m bench.sync_vs_async` from backend/. Each prints a small table.
+"""
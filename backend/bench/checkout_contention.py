@@ -0,0 +1,90 @@
+"""
+Checkout under contention: many carts share a small pool of SKUs, each
+holding several of them added in random order, and are checked out
+concurrently. Prints checkouts/s with p50/p99 per SKU pool size, the
+deadlocks Postgres detected meanwhile (pg_stat_database) and how many
+checkouts failed with a 5xx and were retried.
+
+    BENCH_DATABASE_URL=... python -m bench.checkout_contention [--carts 2000] [--lines 5] [--concurrency 32]
+"""
+import argparse
+import random
+
+from bench.common import drive, fill_carts, make_user, print_header, print_row, reset_database, seed_catalog, serve
+
+
+def _deadlocks(engine) -> int:
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_stat_clear_snapshot()"))
+        return conn.execute(
+            text("SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()")
+        ).scalar()
+
+
+def _open_carts(order_ids) -> list:
+    from app.db.session import SessionLocal
+    from app.models.order import Order
+
+    with SessionLocal() as db:
+        return [order_id for (order_id,) in db.query(Order.id).filter(Order.id.in_(order_ids), Order.status == "cart")]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--carts", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=5, help="SKUs per cart")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--pools", default="5,20,200", help="SKU pool sizes to try, comma separated")
+    parser.add_argument("--retries", type=int, default=3, help="times a 5xx checkout is retried")
+    args = parser.parse_args()
+    pools = [int(size) for size in args.pools.split(",")]
+
+    engine = reset_database()
+    # one variant per product, so every SKU also locks its own product summary
+    seed_catalog(max(pools), variants=("Red,S",))
+    from app.db.session import SessionLocal
+    from app.models.product_variation import ProductVariation
+
+    with SessionLocal() as db:
+        all_variants = db.query(ProductVariation.id, ProductVariation.product_id).order_by(ProductVariation.id).all()
+
+    print_header("deadlocks", "retried", "unpaid")
+    with serve() as base_url:
+        for size in pools:
+            variants = random.sample(all_variants, size)
+            buyers = [make_user(3) for _ in range(args.carts)]
+
+            def items_for(i, variants=variants):
+                # distinct SKUs in random order
+                picked = random.sample(variants, min(args.lines, size))
+                return [{"product_id": str(p), "variant_id": str(v), "quantity": 1} for v, p in picked]
+
+            order_ids = fill_carts(base_url, buyers, items_for, args.concurrency)
+            by_order = dict(zip(order_ids, (headers for _, headers in buyers)))
+
+            def checkout(i, pending=order_ids):
+                return "POST", f"/orders/{pending[i]}/checkout", {"headers": by_order[pending[i]]}
+
+            deadlocks = _deadlocks(engine)
+            result = drive(base_url, checkout, len(order_ids), args.concurrency)
+            failed = sum(count for status, count in result.statuses.items() if status >= 500)
+            retried, pending = 0, _open_carts(order_ids) if failed else []
+            for _ in range(args.retries):
+                if not pending:
+                    break
+                retried += len(pending)
+                drive(base_url, lambda i, pending=pending: checkout(i, pending), len(pending), args.concurrency)
+                pending = _open_carts(pending)
+            print_row(
+                f"{size} SKUs, {min(args.lines, size)} per cart",
+                result,
+                _deadlocks(engine) - deadlocks,
+                retried,
+                len(pending),
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import asyncio
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+
+import httpx
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL")
+if not BENCH_DATABASE_URL:
+    sys.exit("Set BENCH_DATABASE_URL to a disposable Postgres database (its tables are dropped).")
+
+# must be set before app.db.session is imported; servers started by serve() inherit them
+os.environ["DATABASE_URL"] = BENCH_DATABASE_URL
+os.environ["DATABASE_READ_URL"] = ""
+os.environ["PASSWORD_POOL_WORKERS"] = "0"
+os.environ["STOCK_HOLD_SWEEP_SECONDS"] = "0"
+# measure the database path, not the response cache
+os.environ.setdefault("CATALOG_RESPONSE_CACHE_SIZE", "0")
+os.environ.setdefault("SQL_INSTRUMENTATION", "false")
+
+
+def reset_database():
+    """Drop and recreate every table (as tests/conftest.py does); returns the engine."""
+    from sqlalchemy import text
+    from app.db.base import Base
+    from app.db.session import engine
+    from app.models.product import Product
+
+    with engine.begin() as conn:
+        try:
+            with conn.begin_nested():
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        except Exception:
+            Product.__table__.indexes = {i for i in Product.__table__.indexes if not i.name.endswith("_trgm")}
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO roles (id, role_name) VALUES (1, 'admin'), (2, 'seller'), (3, 'customer')"))
+    return engine
+
+
+def make_user(role_id: int):
+    """(user id, Authorization headers) for a new user with `role_id`."""
+    from app.core.security import create_access_token
+    from app.db.session import SessionLocal
+    from app.models.user import User
+
+    db = SessionLocal()
+    try:
+        user = User(email=f"{uuid.uuid4()}@example.com", hashed_password="x", role_id=role_id)
+        db.add(user)
+        db.commit()
+        return user.id, {"Authorization": f"Bearer {create_access_token(str(user.id))}"}
+    finally:
+        db.close()
+
+
+def seed_catalog(products: int, variants=("Red,S", "Blue,M"), stock: int = 1_000_000, names=None, descriptions=None):
+    """
+    Import `products` products for one new seller through CatalogImport, with
+    one variant per "colour,size" in `variants`. names(i) / descriptions(i)
+    override the generated text. Returns the seller's (user id, headers).
+    """
+    from sqlalchemy import text
+    from app.db.session import SessionLocal
+    from app.services.catalog_import import CATALOG_IMPORT_BATCH_ROWS, CatalogImport, CsvDecoder
+
+    seller_id, headers = make_user(2)
+    per_import = 50_000  # products per transaction; stays under CATALOG_IMPORT_MAX_ROWS
+    for start in range(0, products, per_import):
+        decoder = CsvDecoder()
+        db = SessionLocal()
+        try:
+            importer = CatalogImport(db, seller_id)
+            batch = decoder.feed(b"name,description,colour,size,unit_price,stock\n")
+            for i in range(start, min(start + per_import, products)):
+                name = names(i) if names else f"Product {i:07d}"
+                description = descriptions(i) if descriptions else ""
+                price = 5 + (i * 7919) % 500
+                lines = "".join(f'"{name}","{description}",{v},{price}.00,{stock}\n' for v in variants)
+                batch.extend(decoder.feed(lines.encode()))
+                if len(batch) >= CATALOG_IMPORT_BATCH_ROWS:
+                    importer.load_batch(batch)
+                    batch = []
+            batch.extend(decoder.feed(b"", final=True))
+            if batch:
+                importer.load_batch(batch)
+            importer.finish()
+        finally:
+            db.close()
+    with SessionLocal() as db:
+        db.execute(text("ANALYZE"))
+        db.commit()
+    return seller_id, headers
+
+
+def fill_carts(base_url: str, buyers, items_for, concurrency: int) -> list:
+    """
+    Open one cart per (user id, headers) in `buyers` and add items_for(i) to
+    the i-th through POST /orders/{id}/items/batch. Returns the order ids.
+    """
+    from app.db.session import SessionLocal
+    from app.models.order import Order
+
+    with SessionLocal() as db:
+        orders = [Order(user_id=user_id, status="cart") for user_id, _ in buyers]
+        db.add_all(orders)
+        db.commit()
+        order_ids = [order.id for order in orders]
+
+    def add(i):
+        return "POST", f"/orders/{order_ids[i]}/items/batch", {"json": {"items": items_for(i)}, "headers": buyers[i][1]}
+
+    result = drive(base_url, add, len(buyers), concurrency)
+    assert result.statuses == {200: len(buyers)}, result.statuses
+    return order_ids
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def serve(workers: int = 1, **env):
+    """Run the app under uvicorn with extra env vars; yields its base URL."""
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env={**os.environ, **{k: str(v) for k, v in env.items()}},
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                httpx.get(f"{base_url}/docs", timeout=1)
+                break
+            except httpx.TransportError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError("server did not start")
+                time.sleep(0.1)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+@dataclass
+class Result:
+    elapsed: float = 0.0
+    latencies: list = field(default_factory=list)
+    statuses: dict = field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        return len(self.latencies) / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, p: float) -> float:
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000 if ordered else 0.0
+
+
+def drive(base_url: str, make_request, total: int, concurrency: int) -> Result:
+    """
+    Send `total` requests from `concurrency` concurrent clients.
+    make_request(i) returns (method, path, kwargs) for httpx.
+    """
+    result = Result()
+
+    async def run():
+        counter = iter(range(total))
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            async def worker():
+                for i in counter:
+                    method, path, kwargs = make_request(i)
+                    started = time.perf_counter()
+                    response = await client.request(method, path, **kwargs)
+                    result.latencies.append(time.perf_counter() - started)
+                    result.statuses[response.status_code] = result.statuses.get(response.status_code, 0) + 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            result.elapsed = time.perf_counter() - started
+
+    asyncio.run(run())
+    return result
+
+
+def print_header(*extra: str) -> None:
+    print(f"{'':<34}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}  " + "".join(f"{name:>10}" for name in extra) + "  statuses")
+
+
+def print_row(label: str, result: Result, *extra) -> None:
+    print(
+        f"{label:<34}{result.throughput:>10.1f}{result.percentile(0.5):>10.1f}{result.percentile(0.99):>10.1f}  "
+        + "".join(f"{value:>10}" for value in extra)
+        + f"  {dict(sorted(result.statuses.items()))}"
+    )
@@ -0,0 +1,61 @@
+"""
+Latency of page 1 vs page 10,000 of GET /products (page_size=12): OFFSET
+paging against a keyset cursor at the same depth, for each sort key.
+
+    BENCH_DATABASE_URL=... python -m bench.deep_pages [--products 125000] [--page 10000] [--requests 50]
+"""
+import argparse
+
+from bench.common import drive, print_header, print_row, reset_database, seed_catalog, serve
+
+PAGE_SIZE = 12
+
+
+def _cursor_at(offset: int, sort_by: str) -> str:
+    """next_cursor of the page ending just before `offset` (descending sort)."""
+    from sqlalchemy import text
+    from app.api.routes.products import _encode_cursor
+    from app.db.session import engine
+
+    column = {"created_at": "p.created_at", "name": "p.name", "price": "s.min_price"}[sort_by]
+    with engine.connect() as conn:
+        row = conn.execute(
+            text(
+                f"SELECT {column} AS value, p.id FROM products p JOIN product_summaries s ON s.product_id = p.id"
+                f" WHERE p.is_active ORDER BY {column} DESC, p.id DESC OFFSET :offset LIMIT 1"
+            ),
+            {"offset": offset - 1},
+        ).one()
+    return _encode_cursor(sort_by, "desc", row.value, row.id)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=125_000)
+    parser.add_argument("--page", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+    if args.products < args.page * PAGE_SIZE:
+        parser.error("--products must cover --page")
+
+    reset_database()
+    seed_catalog(args.products, variants=("Red,S",))
+    offset = (args.page - 1) * PAGE_SIZE
+
+    print_header()
+    with serve() as base_url:
+        for sort_by in ("created_at", "name", "price"):
+            base = {"sort_by": sort_by, "page_size": PAGE_SIZE, "count": "none"}
+            cases = {
+                "page 1": base,
+                f"page {args.page} (offset)": {**base, "page": args.page},
+                f"page {args.page} (cursor)": {**base, "cursor": _cursor_at(offset, sort_by)},
+            }
+            for label, params in cases.items():
+                make_request = lambda i, params=params: ("GET", "/products", {"params": params})
+                drive(base_url, make_request, 5, 1)  # warm up
+                print_row(f"{sort_by} {label}", drive(base_url, make_request, args.requests, 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Single-SKU checkout throughput: every cart holds one unit of the same
+variant and all are checked out concurrently, with the variant's stock in
+the plain column (shards=0) and spread over 1, 4 and 16 shard rows (see
+app.services.stock_shards). Prints checkouts/s with p50/p99 per setting.
+
+    BENCH_DATABASE_URL=... python -m bench.hot_sku [--carts 2000] [--concurrency 32] [--shards 0,1,4,16]
+"""
+import argparse
+
+from bench.common import drive, fill_carts, make_user, print_header, print_row, reset_database, seed_catalog, serve
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--carts", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--shards", default="0,1,4,16", help="shard counts to try, comma separated")
+    args = parser.parse_args()
+
+    reset_database()
+    _, seller_headers = seed_catalog(1, variants=("Red,S",))
+    from app.db.session import SessionLocal
+    from app.models.product_variation import ProductVariation
+
+    with SessionLocal() as db:
+        variant_id, product_id = db.query(ProductVariation.id, ProductVariation.product_id).one()
+    item = {"product_id": str(product_id), "variant_id": str(variant_id), "quantity": 1}
+
+    print_header()
+    with serve() as base_url:
+        for shards in (int(n) for n in args.shards.split(",")):
+            response = drive(
+                base_url,
+                lambda i: ("PUT", f"/seller/variants/{variant_id}/shards", {"json": {"shards": shards}, "headers": seller_headers}),
+                1,
+                1,
+            )
+            assert response.statuses == {200: 1}, response.statuses
+
+            buyers = [make_user(3) for _ in range(args.carts)]
+            order_ids = fill_carts(base_url, buyers, lambda i: [item], args.concurrency)
+            result = drive(
+                base_url,
+                lambda i: ("POST", f"/orders/{order_ids[i]}/checkout", {"headers": buyers[i][1]}),
+                len(order_ids),
+                args.concurrency,
+            )
+            print_row(f"shards={shards}", result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Full-text search vs the ILIKE scan it replaced, on a large catalog: latency
+of the first page (12 rows, newest first) and of the match count, per query.
+Runs the predicates directly so it needs no pg_trgm; with pg_trgm installed
+it also times GET /products?q= end to end.
+
+    BENCH_DATABASE_URL=... python -m bench.search [--products 1000000] [--requests 30]
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import text
+
+from bench.common import Result, drive, print_header, print_row, reset_database, seed_catalog, serve
+
+WORDS = (
+    "leather suede canvas running trail hiking waterproof breathable classic slim relaxed cotton wool "
+    "linen denim boots shoes jacket shirt dress socks scarf belt bag black navy olive summer winter"
+).split()
+QUERIES = {"common word": "leather", "two words": "waterproof boots", "rare word": "model42"}
+
+FTS = "p.search_vector @@ websearch_to_tsquery('english', :q)"
+ILIKE = "(p.name ILIKE :pattern OR p.description ILIKE :pattern)"
+
+
+def _describe(i: int) -> str:
+    rng = random.Random(i)
+    return " ".join(rng.choice(WORDS) for _ in range(8)) + f" model{rng.randrange(1000)}"
+
+
+def _time_sql(conn, sql: str, params: dict, requests: int) -> Result:
+    result = Result()
+    started = time.perf_counter()
+    for _ in range(requests):
+        t = time.perf_counter()
+        conn.execute(text(sql), params).all()
+        result.latencies.append(time.perf_counter() - t)
+        result.statuses["ok"] = result.statuses.get("ok", 0) + 1
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--requests", type=int, default=30)
+    args = parser.parse_args()
+
+    engine = reset_database()
+    seed_catalog(
+        args.products,
+        variants=("Black,M",),
+        names=lambda i: f"{WORDS[i % len(WORDS)].title()} {WORDS[(i * 7) % len(WORDS)]} {i}",
+        descriptions=_describe,
+    )
+
+    print_header()
+    with engine.connect() as conn:
+        for label, q in QUERIES.items():
+            # ILIKE only matches the literal string, so give it each word of the query
+            words = q.split()
+            pattern_sql = " AND ".join(ILIKE.replace(":pattern", f":w{n}") for n in range(len(words)))
+            params = {"q": q, **{f"w{n}": f"%{word}%" for n, word in enumerate(words)}}
+            for name, predicate in (("fts", FTS), ("ilike", pattern_sql)):
+                page = f"SELECT p.id FROM products p WHERE p.is_active AND {predicate} ORDER BY p.created_at DESC, p.id DESC LIMIT 12"
+                count = f"SELECT count(*) FROM products p WHERE p.is_active AND {predicate}"
+                _time_sql(conn, page, params, 2)  # warm up
+                print_row(f"{label} {name} page", _time_sql(conn, page, params, args.requests))
+                print_row(f"{label} {name} count", _time_sql(conn, count, params, args.requests))
+
+        has_trgm = conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).scalar()
+    if not has_trgm:
+        print("pg_trgm is not installed; skipping GET /products?q=")
+        return
+    with serve() as base_url:
+        for label, q in QUERIES.items():
+            make_request = lambda i, q=q: ("GET", "/products", {"params": {"q": q}})
+            drive(base_url, make_request, 2, 1)
+            print_row(f"{label} GET /products?q=", drive(base_url, make_request, args.requests, 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Serialization cost of one GET /products page at page_size=100: the
+column-tuple payload rendered with pydantic_core.to_json (what the route does)
+against validating it into PaginatedProducts and dumping that, and against
+FastAPI's jsonable_encoder + json.dumps.
+
+    BENCH_DATABASE_URL=... python -m bench.serialization [--iterations 500]
+"""
+import argparse
+import json
+import time
+
+from bench.common import reset_database, seed_catalog
+
+
+def _time(fn, iterations: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    reset_database()
+    seed_catalog(300, variants=("Red,S", "Red,M", "Blue,M", "Blue,L"))
+
+    from fastapi.encoders import jsonable_encoder
+    from pydantic_core import to_json
+    from app.api.routes.products import _list_products
+    from app.db.session import SessionLocal
+    from app.schemas.product import PaginatedProducts, ProductListQuery
+
+    with SessionLocal() as db:
+        body, _ = _list_products(db, ProductListQuery(page_size=100, facets=True))
+    # the same Python objects (UUID, Decimal, datetime) the route hands to to_json
+    payload = PaginatedProducts.model_validate_json(body).model_dump()
+    assert to_json(payload) == body
+
+    cases = {
+        "to_json (route)": lambda: to_json(payload),
+        "model_validate + dump_json": lambda: PaginatedProducts.model_validate(payload).model_dump_json(),
+        "jsonable_encoder + json.dumps": lambda: json.dumps(jsonable_encoder(payload)),
+    }
+    print(f"page_size=100, {len(body)} bytes")
+    print(f"{'':<34}{'ms/page':>10}{'pages/s':>10}")
+    for label, fn in cases.items():
+        ms = _time(fn, args.iterations)
+        print(f"{label:<34}{ms:>10.3f}{1000 / ms:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
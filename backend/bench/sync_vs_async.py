@@ -0,0 +1,44 @@
+"""
+Sync (psycopg2 on the threadpool) vs DB_ASYNC (asyncpg) for the hot read
+endpoints: throughput and p50/p99 of GET /products and GET /products/{id}
+under concurrent load, with the response cache off.
+
+    BENCH_DATABASE_URL=... python -m bench.sync_vs_async [--products 5000] [--requests 4000] [--concurrency 64]
+"""
+import argparse
+import random
+
+from bench.common import drive, print_header, print_row, reset_database, seed_catalog, serve
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    reset_database()
+    seed_catalog(args.products)
+    from sqlalchemy import text
+    from app.db.session import engine
+
+    with engine.connect() as conn:
+        product_ids = [str(pid) for pid in conn.execute(text("SELECT id FROM products")).scalars()]
+    pages = max(1, args.products // 12)
+
+    endpoints = {
+        "list": lambda i: ("GET", "/products", {"params": {"page": random.randint(1, pages)}}),
+        "detail": lambda i: ("GET", f"/products/{random.choice(product_ids)}", {}),
+    }
+    print_header()
+    for mode in ("false", "true"):
+        with serve(DB_ASYNC=mode) as base_url:
+            for name, make_request in endpoints.items():
+                drive(base_url, make_request, min(200, args.requests), args.concurrency)  # warm up
+                result = drive(base_url, make_request, args.requests, args.concurrency)
+                print_row(f"{'async' if mode == 'true' else 'sync'} {name}", result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Integration tests. They need a disposable Postgres database: set
+TEST_DATABASE_URL (its tables are dropped and recreated), then run
+`python -m pytest tests` from backend/. Without it nothing is collected.
+Replica routing tests also need TEST_DATABASE_READ_URL: a replica of that
+database (or the same URL, which is enough to check the routing).
+"""
+import os
+import uuid
+
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+TEST_DATABASE_READ_URL = os.getenv("TEST_DATABASE_READ_URL")
+
+if not TEST_DATABASE_URL:
+    collect_ignore_glob = ["test_*.py"]
+else:
+    # must be set before app.db.session is imported
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+    os.environ["DATABASE_READ_URL"] = ""
+    os.environ["PASSWORD_POOL_WORKERS"] = "0"
+    os.environ["STOCK_HOLD_SWEEP_SECONDS"] = "0"
+
+
+@pytest.fixture(scope="session")
+def engine():
+    from sqlalchemy import text
+    from app.db.base import Base
+    from app.db.session import engine
+    from app.models.product import Product
+
+    with engine.begin() as conn:
+        try:
+            with conn.begin_nested():
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        except Exception:
+            # the trigram indexes are only accelerators; tests don't depend on them
+            Product.__table__.indexes = {i for i in Product.__table__.indexes if not i.name.endswith("_trgm")}
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO roles (id, role_name) VALUES (1, 'admin'), (2, 'seller'), (3, 'customer')"))
+    return engine
+
+
+@pytest.fixture(scope="session")
+def client(engine):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def replica(engine, monkeypatch):
+    """
+    Route reads to TEST_DATABASE_READ_URL for one test. The rest of the suite
+    runs without a replica, since replica reads skip the response cache right
+    after a change.
+    """
+    if not TEST_DATABASE_READ_URL:
+        pytest.skip("TEST_DATABASE_READ_URL is not set")
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.db.pool import pool_options
+
+    read_engine = create_engine(TEST_DATABASE_READ_URL, **pool_options("replica"))
+    read_sessions = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    for module in ("app.db.session", "app.api.deps", "app.api.routes.seller"):
+        monkeypatch.setattr(f"{module}.ReadSessionLocal", read_sessions)
+    yield read_engine
+    read_engine.dispose()
+
+
+@pytest.fixture
+def make_user(engine):
+    """make_user(role_id) -> (user id, Authorization headers)."""
+    from app.core.security import create_access_token
+    from app.db.session import SessionLocal
+    from app.models.user import User
+
+    def _make(role_id: int):
+        db = SessionLocal()
+        try:
+            user = User(email=f"{uuid.uuid4()}@example.com", hashed_password="x", role_id=role_id)
+            db.add(user)
+            db.commit()
+            return user.id, {"Authorization": f"Bearer {create_access_token(str(user.id))}"}
+        finally:
+            db.close()
+
+    return _make
+
+
+@pytest.fixture
+def make_product(client, make_user):
+    """make_product(csv rows "colour,size,unit_price,stock") -> (product, {colour: variant}, seller headers)."""
+    def _make(*rows: str):
+        _, headers = make_user(2)
+        name = f"Product {uuid.uuid4().hex[:8]}"
+        body = "name,colour,size,unit_price,stock\n" + "".join(f"{name},{row}\n" for row in rows)
+        response = client.post(
+            "/seller/products/import", content=body.encode(), headers={**headers, "Content-Type": "text/csv"}
+        )
+        assert response.status_code == 200, response.text
+        from app.db.session import SessionLocal
+        from app.models.product import Product
+        from app.models.product_variation import ProductVariation
+
+        db = SessionLocal()
+        try:
+            product = db.query(Product).filter(Product.name == name).one()
+            variants = {v.colour: v for v in db.query(ProductVariation).filter(ProductVariation.product_id == product.id)}
+            db.expunge_all()
+        finally:
+            db.close()
+        return product, variants, headers
+
+    return _make
@@ -0,0 +1,95 @@
+import ipaddress
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core import rate_limit
+from app.core.rate_limit import LoginThrottle, PostgresWindowLimiter, SlidingWindowLimiter
+from app.db.session import SessionLocal
+
+
+def _register(client, password="secret-1"):
+    email = f"{uuid.uuid4()}@example.com"
+    assert client.post("/register", json={"email": email, "password": password}).status_code == 200
+    token = client.post("/login", data={"username": email, "password": password}).json()["access_token"]
+    return email, {"Authorization": f"Bearer {token}"}
+
+
+def test_update_profile_changes_password(client):
+    email, headers = _register(client)
+    response = client.put("/update-profile", params={"password": "secret-2"}, headers=headers)
+    assert response.status_code == 200
+
+    assert client.post("/login", data={"username": email, "password": "secret-1"}).status_code == 401
+    assert client.post("/login", data={"username": email, "password": "secret-2"}).status_code == 200
+
+
+@pytest.fixture
+def throttle(monkeypatch):
+    """Fresh per-test limits: 3 attempts per IP, 2 per email."""
+    fresh = LoginThrottle(SlidingWindowLimiter(60, 1000), ip_limit=3, email_limit=2)
+    monkeypatch.setattr("app.api.routes.auth.login_throttle", fresh)
+    return fresh
+
+
+def _client_at(ip):
+    from app.main import app
+
+    return TestClient(app, client=(ip, 50000))
+
+
+def _attempt(client, email, headers=None):
+    return client.post("/login", data={"username": email, "password": "wrong"}, headers=headers or {})
+
+
+def test_login_is_throttled_per_email(engine, throttle):
+    email = f"{uuid.uuid4()}@example.com"
+    assert _attempt(_client_at("192.0.2.1"), email).status_code == 401
+    assert _attempt(_client_at("192.0.2.2"), email).status_code == 401
+    response = _attempt(_client_at("192.0.2.3"), email)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "60"
+    assert _attempt(_client_at("192.0.2.3"), f"{uuid.uuid4()}@example.com").status_code == 401
+
+
+def test_login_is_throttled_per_ip(engine, throttle):
+    client = _client_at("192.0.2.10")
+    for _ in range(3):
+        assert _attempt(client, f"{uuid.uuid4()}@example.com").status_code == 401
+    assert _attempt(client, f"{uuid.uuid4()}@example.com").status_code == 429
+    assert _attempt(_client_at("192.0.2.11"), f"{uuid.uuid4()}@example.com").status_code == 401
+    assert throttle.rejected == 1
+
+
+def test_forwarded_for_is_only_honoured_from_trusted_proxies(engine, throttle, monkeypatch):
+    monkeypatch.setattr(rate_limit, "TRUSTED_PROXIES", [ipaddress.ip_network("10.0.0.0/8")])
+    proxy = _client_at("10.0.0.5")
+    for n in range(4):
+        # a different client behind the proxy each time, plus a spoofed first hop
+        forwarded = {"X-Forwarded-For": f"203.0.113.99, 198.51.100.{n}, 10.0.0.7"}
+        assert _attempt(proxy, f"{uuid.uuid4()}@example.com", forwarded).status_code == 401
+
+    direct = _client_at("192.0.2.20")
+    for n in range(3):
+        forwarded = {"X-Forwarded-For": f"198.51.100.{n}"}
+        assert _attempt(direct, f"{uuid.uuid4()}@example.com", forwarded).status_code == 401
+    assert _attempt(direct, f"{uuid.uuid4()}@example.com", {"X-Forwarded-For": "198.51.100.9"}).status_code == 429
+
+
+def test_postgres_counters_are_shared_and_leave_the_session_alone(engine):
+    key = f"ip:{uuid.uuid4()}"
+    worker_a, worker_b = PostgresWindowLimiter(60), PostgresWindowLimiter(60)
+    db = SessionLocal()
+    try:
+        db.execute(text("CREATE TEMP TABLE caller_work (id int)"))
+        db.execute(text("INSERT INTO caller_work VALUES (1)"))
+        assert worker_a.hit(key, 2)
+        assert worker_b.hit(key, 2)
+        assert not worker_a.hit(key, 2)
+        db.rollback()
+        # the caller's transaction was still open, so its work rolled back with it
+        assert db.execute(text("SELECT to_regclass('pg_temp.caller_work')")).scalar() is None
+    finally:
+        db.close()
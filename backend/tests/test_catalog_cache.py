@@ -0,0 +1,115 @@
+import time
+
+from sqlalchemy import text
+
+from app.db.session import SessionLocal
+from app.services.catalog_cache import (
+    CATALOG_CHANNEL,
+    STOCK,
+    catalog_changed,
+    catalog_version,
+    response_cache,
+    stock_changed,
+)
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def _notify(engine, payload):
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CATALOG_CHANNEL, "payload": payload})
+
+
+def test_change_committed_by_another_worker_bumps_version(engine, client):
+    time.sleep(0.2)  # let the lifespan listener connect
+    before = catalog_version.current
+    _notify(engine, "another-worker")
+    assert _wait_for(lambda: catalog_version.current > before)
+
+
+def test_stock_change_from_another_worker_drops_only_that_product(engine, client):
+    time.sleep(0.2)
+    response_cache.store(("t", "a"), b"a", {"product-a"})
+    response_cache.store(("t", "b"), b"b", {"product-b"})
+    _notify(engine, "another-worker product-a")
+    assert _wait_for(lambda: response_cache.get(("t", "a")) is None)
+    assert response_cache.get(("t", "b")) is not None
+
+
+def test_change_takes_effect_on_commit_only(engine, client):
+    db = SessionLocal()
+    try:
+        before = catalog_version.current
+        catalog_changed(db)
+        db.rollback()
+        assert catalog_version.current == before
+
+        catalog_changed(db)
+        assert catalog_version.current == before
+        db.commit()
+        assert catalog_version.current == before + 1
+    finally:
+        db.close()
+
+
+def test_stock_change_drops_tagged_and_availability_filtered_entries(engine):
+    response_cache.store(("t", "shows p"), b"1", {"p", "q"})
+    response_cache.store(("t", "in stock only"), b"2", {"q", STOCK})
+    response_cache.store(("t", "other"), b"3", {"q"})
+    db = SessionLocal()
+    try:
+        before = catalog_version.current
+        stock_changed(db, ["p"])
+        assert response_cache.get(("t", "shows p")) is not None
+        db.commit()
+    finally:
+        db.close()
+    assert catalog_version.current == before
+    assert response_cache.get(("t", "shows p")) is None
+    assert response_cache.get(("t", "in stock only")) is None
+    assert response_cache.get(("t", "other")) is not None
+
+
+def test_read_that_raced_a_stock_change_is_not_cached(engine):
+    since = catalog_version.seq
+    db = SessionLocal()
+    try:
+        stock_changed(db, ["p"])
+        db.commit()
+    finally:
+        db.close()
+    response_cache.store(("t", "raced p"), b"1", {"p"}, since)
+    response_cache.store(("t", "raced q"), b"2", {"q"}, since)
+    assert response_cache.get(("t", "raced p")) is None
+    assert response_cache.get(("t", "raced q")) is not None
+
+
+def test_replica_reads_are_not_cached_right_after_a_change(engine):
+    catalog_version.bump()
+    since = catalog_version.seq
+    response_cache.store(("t", "replica"), b"1", {"p"}, since, lag_seconds=5)
+    response_cache.store(("t", "primary"), b"2", {"p"}, since)
+    assert response_cache.get(("t", "replica")) is None
+    assert response_cache.get(("t", "primary")) is not None
+
+
+def test_cart_hold_refreshes_only_the_held_product(client, make_user, make_product):
+    held, held_variants, _ = make_product("Red,S,10.00,5")
+    other, _, _ = make_product("Red,S,10.00,5")
+    assert client.get(f"/products/{held.id}").json()["total_stock"] == 5
+    client.get(f"/products/{other.id}")
+
+    _, headers = make_user(3)
+    order_id = client.post("/orders", headers=headers).json()["id"]
+    item = {"product_id": str(held.id), "variant_id": str(held_variants["Red"].id), "quantity": 2}
+    assert client.post(f"/orders/{order_id}/items", json=item, headers=headers).status_code == 200
+
+    hits = response_cache.hits
+    assert client.get(f"/products/{held.id}").json()["total_stock"] == 3
+    assert client.get(f"/products/{other.id}").status_code == 200
+    assert response_cache.hits == hits + 1
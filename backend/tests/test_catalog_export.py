@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+import time
+from datetime import datetime, timezone
+
+
+def _import(client, headers, body: str) -> None:
+    response = client.post("/seller/products/import", content=body.encode(), headers={**headers, "Content-Type": "text/csv"})
+    assert response.status_code == 200, response.text
+
+
+def _csv(client, headers, **params) -> list[dict]:
+    from app.services.catalog_export import CSV_HEADER
+
+    response = client.get("/seller/products/export", params={"format": "csv", **params}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/csv")
+    reader = csv.reader(io.StringIO(response.text))
+    assert next(reader) == CSV_HEADER
+    return [dict(zip(CSV_HEADER, row)) for row in reader]
+
+
+def test_csv_has_one_line_per_variant(client, make_user):
+    seller_id, headers = make_user(2)
+    _import(
+        client,
+        headers,
+        "name,description,colour,size,unit_price,stock\n"
+        'Boot,"Warm, ""waterproof""\nand light",Red,S,10.00,5\n'
+        "Boot,,Blue,M,12.50,0\n",
+    )
+    assert client.post("/seller/products", json={"name": "Empty"}, headers=headers).status_code == 200
+
+    rows = _csv(client, headers)
+    boots = sorted((r for r in rows if r["product_name"] == "Boot"), key=lambda r: r["variant_colour"])
+    assert [(r["variant_colour"], r["variant_unit_price"], r["variant_stock"]) for r in boots] == [
+        ("Blue", "12.50", "0"),
+        ("Red", "10.00", "5"),
+    ]
+    assert boots[0]["product_description"] == 'Warm, "waterproof"\nand light'
+    assert boots[0]["product_user_id"] == str(seller_id)
+    datetime.fromisoformat(boots[0]["product_created_at"])
+
+    # a product without variants still gets a line, with empty variant columns
+    (empty,) = [r for r in rows if r["product_name"] == "Empty"]
+    assert empty["variant_id"] == empty["variant_stock"] == ""
+
+
+def test_csv_is_the_same_however_it_is_chunked(client, make_user, monkeypatch):
+    _, headers = make_user(2)
+    _import(client, headers, "name,colour,size,unit_price,stock\n" + "".join(f"P{n},Red,S,1.00,{n}\n" for n in range(20)))
+    whole = _csv(client, headers)
+    monkeypatch.setattr("app.services.catalog_export.CATALOG_EXPORT_CHUNK_BYTES", 64)
+    assert _csv(client, headers) == whole
+    assert len(whole) == 20
+
+
+def test_sellers_export_only_their_own_catalog(client, make_user):
+    seller_id, headers = make_user(2)
+    other_id, other_headers = make_user(2)
+    _, admin_headers = make_user(1)
+    _import(client, headers, "name,colour,size,unit_price,stock\nMine,Red,S,1.00,1\n")
+    _import(client, other_headers, "name,colour,size,unit_price,stock\nTheirs,Red,S,1.00,1\n")
+
+    assert [r["product_name"] for r in _csv(client, headers)] == ["Mine"]
+    response = client.get("/seller/products/export", params={"format": "csv", "user_id": str(other_id)}, headers=headers)
+    assert response.status_code == 403
+    assert [r["product_name"] for r in _csv(client, admin_headers, user_id=str(other_id))] == ["Theirs"]
+
+
+def test_updated_since_and_active_only(client, make_user):
+    _, headers = make_user(2)
+    _import(client, headers, "name,colour,size,unit_price,stock\nOld,Red,S,1.00,1\nOld,Blue,S,1.00,1\n")
+    time.sleep(0.05)
+    since = datetime.now(timezone.utc)
+    _import(client, headers, "name,colour,size,unit_price,stock\nNew,Red,S,1.00,1\n")
+
+    assert {r["product_name"] for r in _csv(client, headers, updated_since=since.isoformat())} == {"New"}
+
+    rows = _csv(client, headers)
+    blue = next(r for r in rows if r["product_name"] == "Old" and r["variant_colour"] == "Blue")
+    response = client.post("/seller/batch", json={"variants": [{"id": blue["variant_id"], "is_active": False}]}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert {r["product_name"] for r in _csv(client, headers, updated_since=since.isoformat())} == {"New", "Old"}
+    active = _csv(client, headers, active_only="true")
+    assert sorted((r["product_name"], r["variant_colour"]) for r in active) == [("New", "Red"), ("Old", "Red")]
+
+
+def test_ndjson_nests_variants(client, make_user):
+    _, headers = make_user(2)
+    _import(client, headers, "name,colour,size,unit_price,stock\nBoot,Red,S,10.00,5\nBoot,Blue,S,10.00,5\n")
+    response = client.get("/seller/products/export", headers=headers)
+    assert response.status_code == 200, response.text
+    (product,) = [json.loads(line) for line in response.text.splitlines()]
+    assert product["name"] == "Boot"
+    assert sorted(v["colour"] for v in product["variants"]) == ["Blue", "Red"]
@@ -0,0 +1,133 @@
+import pytest
+
+from app.db.base import Product, ProductSummary, ProductVariation
+from app.db.session import SessionLocal
+from app.services.catalog_import import CatalogImportError, NdjsonDecoder, _RecordDecoder
+
+
+def test_record_decoder_requires_a_line_parser():
+    with pytest.raises(TypeError):
+        _RecordDecoder()
+
+
+def test_reimport_updates_existing_variants(client, make_product):
+    product, variants, headers = make_product("Red,S,10.00,5", "Blue,S,10.00,5")
+    body = f"name,colour,size,unit_price,stock,description\n{product.name},Red,S,12.00,3,Now in red\n{product.name},Blue,S,10.00,5,\n"
+
+    response = client.post("/seller/products/import", content=body.encode(), headers={**headers, "Content-Type": "text/csv"})
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["products_updated"], result["variants_updated"], result["variants_unchanged"]) == (1, 1, 1)
+
+    db = SessionLocal()
+    try:
+        red = db.get(ProductVariation, variants["Red"].id)
+        assert (str(red.unit_price), red.stock) == ("12.00", 3)
+        assert db.get(ProductSummary, product.id).total_stock == 8
+    finally:
+        db.close()
+
+
+def _post(client, headers, body, content_type="text/csv", **params):
+    return client.post(
+        "/seller/products/import", content=body, params=params, headers={**headers, "Content-Type": content_type}
+    )
+
+
+def _product_count(seller_id) -> int:
+    db = SessionLocal()
+    try:
+        return db.query(Product).filter(Product.user_id == seller_id).count()
+    finally:
+        db.close()
+
+
+def test_ndjson_import(client, make_user):
+    seller_id, headers = make_user(2)
+    body = (
+        '{"name": "Boot", "colour": "Red", "size": "S", "unit_price": "10.00", "stock": 5}\n'
+        "\n"
+        '{"name": "Boot", "colour": "Blue", "size": "S", "unit_price": 12, "stock": 1, "description": "Warm"}\n'
+        '{"name": "Sock", "colour": "Red", "size": "M", "unit_price": "2.50", "stock": 0}'
+    )
+    response = _post(client, headers, body.encode(), "application/x-ndjson")
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["rows_received"], result["rows_imported"], result["rows_rejected"]) == (3, 3, 0)
+    assert (result["products_created"], result["variants_created"]) == (2, 3)
+    assert _product_count(seller_id) == 2
+
+
+def test_invalid_rows_are_reported_and_skipped(client, make_user):
+    seller_id, headers = make_user(2)
+    body = (
+        "name,colour,size,unit_price,stock\n"
+        "Boot,Red,S,10.00,5\n"
+        "Boot,Red,M,free,5\n"
+        ",Red,L,10.00,-1\n"
+        "Boot,Red\n"
+        '"Boot, unterminated,Red,S,1,1\n'
+    )
+    response = _post(client, headers, body.encode())
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["rows_received"], result["rows_imported"], result["rows_rejected"]) == (5, 1, 4)
+    errors = {(e["row"], e["field"]) for e in result["errors"]}
+    assert errors == {(2, "unit_price"), (3, "name"), (3, "stock"), (4, None), (5, None)}
+    assert not result["errors_truncated"]
+    assert _product_count(seller_id) == 1
+
+    response = _post(client, headers, b'{"name": "Boot"\n[1, 2]\n', "application/x-ndjson")
+    assert [e["message"] for e in response.json()["errors"]] == ["Invalid JSON", "Expected one JSON object per line"]
+
+
+def test_row_cap_rejects_the_whole_import(client, make_user, monkeypatch):
+    monkeypatch.setattr("app.services.catalog_import.CATALOG_IMPORT_MAX_ROWS", 2)
+    seller_id, headers = make_user(2)
+    body = "name,colour,size,unit_price,stock\n" + "".join(f"P{n},Red,S,1.00,1\n" for n in range(3))
+    response = _post(client, headers, body.encode())
+    assert response.status_code == 413
+    assert _product_count(seller_id) == 0
+
+
+def test_malformed_utf8_is_rejected(client, make_user):
+    seller_id, headers = make_user(2)
+    body = "name,colour,size,unit_price,stock\nBoot,Red,S,1.00,1\n".encode() + b"Caf\xe9,Red,S,1.00,1\n"
+    response = _post(client, headers, body)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Body is not valid UTF-8"
+    assert _product_count(seller_id) == 0
+
+
+def test_overlong_lines_are_rejected(client, make_user, monkeypatch):
+    monkeypatch.setattr("app.services.catalog_import.CATALOG_IMPORT_MAX_LINE_LENGTH", 100)
+    _, headers = make_user(2)
+    long_name = "x" * 200
+    response = _post(client, headers, f"name,colour,size,unit_price,stock\n{long_name},Red,S,1.00,1\n".encode())
+    assert response.status_code == 413
+    # a quote that never closes keeps one CSV record open across lines
+    response = _post(client, headers, ('name,colour,size,unit_price,stock\n"' + "a\n" * 60).encode())
+    assert response.status_code == 413
+
+
+def test_line_without_newline_is_capped_while_streaming(monkeypatch):
+    monkeypatch.setattr("app.services.catalog_import.CATALOG_IMPORT_MAX_LINE_LENGTH", 1000)
+    decoder = NdjsonDecoder()
+    with pytest.raises(CatalogImportError) as error:
+        for _ in range(100):
+            assert decoder.feed(b"x" * 64) == []
+    assert error.value.status_code == 413
+
+
+def test_body_size_is_capped(client, make_user, monkeypatch):
+    monkeypatch.setattr("app.api.routes.seller.CATALOG_IMPORT_MAX_BYTES", 1000)
+    seller_id, headers = make_user(2)
+    body = "name,colour,size,unit_price,stock\n" + "".join(f"P{n},Red,S,1.00,1\n" for n in range(100))
+    assert _post(client, headers, body.encode()).status_code == 413
+
+    def chunked():  # no Content-Length
+        for n in range(0, len(body), 100):
+            yield body[n:n + 100].encode()
+
+    assert _post(client, headers, chunked()).status_code == 413
+    assert _product_count(seller_id) == 0
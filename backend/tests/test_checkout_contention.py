@@ -0,0 +1,61 @@
+import itertools
+import threading
+
+from sqlalchemy import text
+
+from app.db.base import Order, ProductVariation
+from app.db.session import SessionLocal
+
+
+def _deadlocks(engine) -> int:
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_stat_clear_snapshot()"))
+        return conn.execute(text("SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()")).scalar()
+
+
+def test_interleaved_carts_check_out_without_deadlocks(engine, client, make_user, make_product):
+    first, first_variants, _ = make_product("Red,S,10.00,100", "Blue,S,10.00,100")
+    second, second_variants, _ = make_product("Red,S,10.00,100", "Blue,S,10.00,100")
+    skus = [(first, v) for v in first_variants.values()] + [(second, v) for v in second_variants.values()]
+
+    # every cart holds the same SKUs, each added in a different order
+    carts = []
+    for order in itertools.islice(itertools.permutations(skus), 0, 24, 2):
+        _, headers = make_user(3)
+        order_id = client.post("/orders", headers=headers).json()["id"]
+        for product, variant in order:
+            item = {"product_id": str(product.id), "variant_id": str(variant.id), "quantity": 1}
+            assert client.post(f"/orders/{order_id}/items", json=item, headers=headers).status_code == 200
+        carts.append((headers, order_id))
+
+    deadlocks = _deadlocks(engine)
+    start = threading.Barrier(len(carts))
+    statuses, errors = [], []
+
+    def checkout(headers, order_id):
+        start.wait()
+        try:
+            statuses.append(client.post(f"/orders/{order_id}/checkout", headers=headers).status_code)
+        except Exception as exc:  # the test client re-raises server errors
+            errors.append(exc)
+
+    threads = [threading.Thread(target=checkout, args=cart) for cart in carts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert statuses == [200] * len(carts)
+    assert _deadlocks(engine) == deadlocks
+
+    db = SessionLocal()
+    try:
+        order_ids = [order_id for _, order_id in carts]
+        assert {status for (status,) in db.query(Order.status).filter(Order.id.in_(order_ids))} == {"paid"}
+        rows = db.query(ProductVariation.stock, ProductVariation.reserved).filter(
+            ProductVariation.id.in_([variant.id for _, variant in skus])
+        )
+        assert sorted(rows) == [(100 - len(carts), 0)] * len(skus)
+    finally:
+        db.close()
@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import text
+
+from app.core.user_cache import user_cache
+from app.db import instrumentation
+
+
+def test_failed_statement_does_not_leave_a_start_time(engine):
+    with engine.connect() as conn:
+        with pytest.raises(Exception):
+            conn.execute(text("SELECT * FROM no_such_table"))
+        conn.rollback()
+        assert conn.info.get("query_started") == []
+        conn.execute(text("SELECT 1"))
+        assert conn.info["query_started"] == []
+
+
+def test_hot_routes_stay_within_their_query_budgets(client, make_user, make_product, monkeypatch):
+    monkeypatch.setattr(instrumentation, "SQL_QUERY_BUDGET_STRICT", True)
+    product, variants, seller_headers = make_product("Red,S,10.00,50", "Blue,M,12.00,50")
+    _, headers = make_user(3)
+    order_id = client.post("/orders", headers=headers).json()["id"]
+    for variant in variants.values():
+        client.post(
+            f"/orders/{order_id}/items",
+            json={"product_id": str(product.id), "variant_id": str(variant.id), "quantity": 1},
+            headers=headers,
+        )
+    client.put(f"/seller/variants/{variants['Red'].id}/shards", json={"shards": 4}, headers=seller_headers)
+    user_cache.clear()
+
+    responses = [
+        client.get("/products", params={"colour": "red", "min_price": 1, "in_stock_only": True, "facets": True}),
+        client.get(f"/products/{product.id}"),
+        client.get("/orders/me", headers=headers),
+        client.get(f"/orders/{order_id}", headers=headers),
+        client.post(f"/orders/{order_id}/checkout", headers=headers),
+    ]
+    for response in responses:
+        assert response.status_code == 200, response.text
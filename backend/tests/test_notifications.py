@@ -0,0 +1,30 @@
+import asyncio
+import threading
+import time
+
+from app.db import notifications
+
+
+def test_listener_connects_without_blocking_the_event_loop(engine, monkeypatch):
+    connect = notifications._connect
+    threads = []
+
+    def slow_connect():
+        threads.append(threading.current_thread())
+        time.sleep(0.5)
+        return connect()
+
+    monkeypatch.setattr(notifications, "_connect", slow_connect)
+
+    async def run():
+        listener = asyncio.create_task(notifications.run_listener())
+        await asyncio.sleep(0)
+        started = time.monotonic()
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+        elapsed = time.monotonic() - started
+        listener.cancel()
+        return elapsed
+
+    assert asyncio.run(run()) < 0.4
+    assert threads and threads[0] is not threading.main_thread()
@@ -0,0 +1,111 @@
+from decimal import Decimal
+
+from app.db.base import OrderItem, ProductVariation, StockReservation
+from app.db.session import SessionLocal
+
+
+def _line(product, variant, quantity=1) -> dict:
+    return {"product_id": str(product.id), "variant_id": str(variant.id), "quantity": quantity}
+
+
+def _reserved(*variants) -> list[int]:
+    db = SessionLocal()
+    try:
+        return [db.get(ProductVariation, variant.id).reserved for variant in variants]
+    finally:
+        db.close()
+
+
+def test_batch_adds_every_line_and_holds_its_stock(client, make_user, make_product):
+    product, variants, _ = make_product("Red,S,10.00,5", "Blue,S,2.50,5")
+    red, blue = variants["Red"], variants["Blue"]
+    _, headers = make_user(3)
+    order_id = client.post("/orders", headers=headers).json()["id"]
+
+    # repeated variants are summed into one line
+    items = [_line(product, red, 2), _line(product, blue, 1), _line(product, red, 1)]
+    response = client.post(f"/orders/{order_id}/items/batch", json={"items": items}, headers=headers)
+    assert response.status_code == 200, response.text
+    cart = response.json()
+    assert sorted((item["variant_id"], item["quantity"]) for item in cart["items"]) == sorted(
+        [(str(red.id), 3), (str(blue.id), 1)]
+    )
+    assert Decimal(cart["total"]) == Decimal("32.50")
+    assert _reserved(red, blue) == [3, 1]
+
+
+def test_batch_merges_into_existing_lines_at_their_price(client, make_user, make_product):
+    product, variants, seller_headers = make_product("Red,S,10.00,5")
+    red = variants["Red"]
+    _, headers = make_user(3)
+    order_id = client.post("/orders", headers=headers).json()["id"]
+    assert client.post(f"/orders/{order_id}/items", json=_line(product, red), headers=headers).status_code == 200
+
+    response = client.post("/seller/batch", json={"variants": [{"id": str(red.id), "unit_price": "12.00"}]}, headers=seller_headers)
+    assert response.status_code == 200, response.text
+    response = client.post(f"/orders/{order_id}/items/batch", json={"items": [_line(product, red, 2)]}, headers=headers)
+    assert response.status_code == 200, response.text
+    (item,) = response.json()["items"]
+    assert (item["quantity"], Decimal(item["unit_price"])) == (3, Decimal("10.00"))
+    assert Decimal(response.json()["total"]) == Decimal("30.00")
+    assert _reserved(red) == [3]
+
+
+def test_batch_is_all_or_nothing(client, make_user, make_product):
+    product, variants, _ = make_product("Red,S,10.00,5", "Blue,S,10.00,1")
+    red, blue = variants["Red"], variants["Blue"]
+    _, headers = make_user(3)
+    order_id = client.post("/orders", headers=headers).json()["id"]
+
+    # each line fits on its own, but the summed Blue lines don't
+    items = [_line(product, red, 2), _line(product, blue, 1), _line(product, blue, 1)]
+    response = client.post(f"/orders/{order_id}/items/batch", json={"items": items}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == [
+        {"product_id": str(product.id), "variant_id": str(blue.id), "detail": "Not enough stock"}
+    ]
+
+    db = SessionLocal()
+    try:
+        assert db.query(OrderItem).filter(OrderItem.order_id == order_id).count() == 0
+        assert db.query(StockReservation).filter(StockReservation.order_id == order_id).count() == 0
+    finally:
+        db.close()
+    assert _reserved(red, blue) == [0, 0]
+
+
+def test_batch_reports_every_bad_line(client, make_user, make_product):
+    product, variants, seller_headers = make_product("Red,S,10.00,5", "Blue,S,10.00,5")
+    red, blue = variants["Red"], variants["Blue"]
+    other, other_variants, _ = make_product("Red,S,10.00,5")
+    response = client.post("/seller/batch", json={"variants": [{"id": str(blue.id), "is_active": False}]}, headers=seller_headers)
+    assert response.status_code == 200, response.text
+    _, headers = make_user(3)
+    order_id = client.post("/orders", headers=headers).json()["id"]
+
+    items = [
+        _line(product, red),
+        _line(product, blue),
+        _line(other, red),  # variant of another product
+        {"product_id": str(product.id), "quantity": 1},
+    ]
+    response = client.post(f"/orders/{order_id}/items/batch", json={"items": items}, headers=headers)
+    assert response.status_code == 400
+    problems = {(p["variant_id"], p["detail"]) for p in response.json()["detail"]}
+    assert problems == {
+        (str(blue.id), "Variant not found"),
+        (str(red.id), "Variant not found"),
+        (None, "variant_id is required for this product"),
+    }
+    assert _reserved(red, other_variants["Red"]) == [0, 0]
+
+
+def test_batch_only_edits_your_own_cart(client, make_user, make_product):
+    product, variants, _ = make_product("Red,S,10.00,5")
+    _, owner = make_user(3)
+    _, stranger = make_user(3)
+    order_id = client.post("/orders", headers=owner).json()["id"]
+
+    payload = {"items": [_line(product, variants["Red"])]}
+    assert client.post(f"/orders/{order_id}/items/batch", json=payload, headers=stranger).status_code == 404
+    assert client.post(f"/orders/{order_id}/items/batch", json={"items": []}, headers=owner).status_code == 422
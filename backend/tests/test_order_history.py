@@ -0,0 +1,107 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.db.base import Order
+from app.db.session import SessionLocal
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _orders(user_id, *specs) -> list[str]:
+    """Insert orders given as (minutes after BASE, status); returns their ids."""
+    db = SessionLocal()
+    try:
+        orders = [
+            Order(user_id=user_id, status=status, created_at=BASE + timedelta(minutes=minutes), item_count=1, subtotal=minutes)
+            for minutes, status in specs
+        ]
+        db.add_all(orders)
+        db.commit()
+        return [str(order.id) for order in orders]
+    finally:
+        db.close()
+
+
+def _walk(client, headers, page_size=2, between_pages=None, **params) -> list[dict]:
+    items, cursor = [], None
+    while True:
+        query = {"page_size": page_size, **params, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/orders/me", params=query, headers=headers)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page["items"]) <= page_size
+        items.extend(page["items"])
+        cursor = page["next_cursor"]
+        assert page["has_more"] is bool(cursor)
+        if not cursor:
+            return items
+        if between_pages:
+            between_pages()
+            between_pages = None
+
+
+def test_history_is_newest_first_with_id_tie_breaks(client, make_user):
+    user_id, headers = make_user(3)
+    # three orders share one created_at, so the id decides their order
+    _orders(user_id, (1, "paid"), (5, "paid"), (5, "shipped"), (5, "delivered"), (9, "paid"))
+
+    walked = _walk(client, headers)
+    ids = [item["id"] for item in walked]
+    assert len(ids) == len(set(ids)) == 5
+    expected = sorted(walked, key=lambda item: (item["created_at"], item["id"]), reverse=True)
+    assert ids == [item["id"] for item in expected]
+    assert [Decimal(item["total"]) for item in walked] == [9, 5, 5, 5, 1]
+    assert {item["item_count"] for item in walked} == {1}
+
+
+def test_pages_stay_stable_when_orders_are_added(client, make_user):
+    user_id, headers = make_user(3)
+    older = _orders(user_id, *((minutes, "paid") for minutes in range(5)))
+
+    walked = _walk(client, headers, between_pages=lambda: _orders(user_id, (60, "paid"), (61, "paid")))
+    assert sorted(item["id"] for item in walked) == sorted(older)
+
+
+def test_status_filter_and_other_users(client, make_user):
+    user_id, headers = make_user(3)
+    other_id, _ = make_user(3)
+    paid = _orders(user_id, (1, "paid"), (2, "shipped"), (3, "paid"), (4, "paid"))
+    _orders(other_id, (5, "paid"))
+
+    walked = _walk(client, headers, status="paid")
+    assert [item["id"] for item in walked] == [paid[3], paid[2], paid[0]]
+    assert len(_walk(client, headers, page_size=100)) == 4
+
+
+def test_last_full_page_has_no_cursor(client, make_user):
+    user_id, headers = make_user(3)
+    _orders(user_id, (1, "paid"), (2, "paid"))
+    response = client.get("/orders/me", params={"page_size": 2}, headers=headers)
+    assert response.status_code == 200, response.text
+    page = response.json()
+    assert (len(page["items"]), page["has_more"], page["next_cursor"]) == (2, False, None)
+
+
+def _cursor(**data) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor",
+        _cursor(c="yesterday", id="00000000-0000-0000-0000-000000000000"),
+        _cursor(c="2026-01-01T00:00:00+00:00", id="not-a-uuid"),
+        _cursor(c="2026-01-01T00:00:00+00:00"),
+        _cursor(c=7, id="00000000-0000-0000-0000-000000000000"),
+    ],
+)
+def test_tampered_cursors_are_rejected(client, make_user, cursor):
+    _, headers = make_user(3)
+    response = client.get("/orders/me", params={"cursor": cursor}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,94 @@
+from decimal import Decimal
+
+import pytest
+
+from app.db.base import Order
+from app.db.session import SessionLocal
+
+
+def _clean(client, admin) -> None:
+    """Repair whatever other tests left behind, so drift counts below are this test's own."""
+    assert client.post("/stats/order-totals/repair", headers=admin).status_code == 200
+    assert _drift(client, admin)["drifted"] == 0
+
+
+def _drift(client, admin) -> dict:
+    response = client.get("/stats/order-totals", headers=admin)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _cart(client, make_user, product, variants, *colours):
+    _, headers = make_user(3)
+    order_id = client.post("/orders", headers=headers).json()["id"]
+    items = [{"product_id": str(product.id), "variant_id": str(variants[c].id), "quantity": 2} for c in colours]
+    response = client.post(f"/orders/{order_id}/items/batch", json={"items": items}, headers=headers)
+    assert response.status_code == 200, response.text
+    return order_id, headers, response.json()["items"]
+
+
+def _stored(order_id) -> tuple:
+    db = SessionLocal()
+    try:
+        order = db.get(Order, order_id)
+        return order.subtotal, order.item_count
+    finally:
+        db.close()
+
+
+def _set(order_id, **values) -> None:
+    db = SessionLocal()
+    try:
+        db.query(Order).filter(Order.id == order_id).update(values)
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_cart_edits_and_checkout_leave_no_drift(client, make_user, make_product):
+    _, admin = make_user(1)
+    _clean(client, admin)
+    product, variants, _ = make_product("Red,S,10.00,50", "Blue,S,2.50,50")
+
+    order_id, headers, items = _cart(client, make_user, product, variants, "Red", "Blue")
+    red_item = next(item["id"] for item in items if item["variant_id"] == str(variants["Red"].id))
+    assert client.delete(f"/orders/{order_id}/items/{red_item}", headers=headers).status_code == 200
+    assert _stored(order_id) == (Decimal("5.00"), 2)
+    assert client.post(f"/orders/{order_id}/checkout", headers=headers).status_code == 200
+    _cart(client, make_user, product, variants, "Red")
+
+    report = _drift(client, admin)
+    assert report["drifted"] == 0
+    assert report["checked"] >= 2
+
+
+def test_drift_is_reported_and_repaired(client, make_user, make_product):
+    _, admin = make_user(1)
+    _clean(client, admin)
+    product, variants, _ = make_product("Red,S,10.00,50", "Blue,S,2.50,50")
+    order_id, _, _ = _cart(client, make_user, product, variants, "Red", "Blue")
+    empty_id = client.post("/orders", headers=make_user(3)[1]).json()["id"]
+    _set(order_id, subtotal=Decimal("1.00"))
+    _set(empty_id, item_count=3)
+
+    report = _drift(client, admin)
+    assert (report["drifted"], report["repaired"]) == (2, 0)
+    samples = {sample["id"]: sample for sample in report["samples"]}
+    assert (Decimal(samples[order_id]["subtotal"]), Decimal(samples[order_id]["actual_subtotal"])) == (1, 25)
+    assert (samples[empty_id]["item_count"], samples[empty_id]["actual_item_count"]) == (3, 0)
+    # checking alone changes nothing
+    assert _stored(order_id) == (Decimal("1.00"), 4)
+
+    response = client.post("/stats/order-totals/repair", headers=admin)
+    assert response.status_code == 200, response.text
+    assert (response.json()["drifted"], response.json()["repaired"]) == (2, 2)
+    assert _stored(order_id) == (Decimal("25.00"), 4)
+    assert _stored(empty_id) == (Decimal("0.00"), 0)
+    assert _drift(client, admin)["drifted"] == 0
+
+
+@pytest.mark.parametrize("role_id", [2, 3])
+def test_order_totals_are_admin_only(client, make_user, role_id):
+    _, headers = make_user(role_id)
+    assert client.get("/stats/order-totals", headers=headers).status_code == 403
+    assert client.post("/stats/order-totals/repair", headers=headers).status_code == 403
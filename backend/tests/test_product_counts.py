@@ -0,0 +1,55 @@
+from sqlalchemy import text
+
+from app.services.catalog_cache import count_cache
+
+
+def _import(client, headers, *names: str) -> None:
+    body = "name,colour,size,unit_price,stock\n" + "".join(f"{name},Red,S,10.00,5\n" for name in names)
+    response = client.post("/seller/products/import", content=body.encode(), headers={**headers, "Content-Type": "text/csv"})
+    assert response.status_code == 200, response.text
+
+
+def _totals(client, **params):
+    response = client.get("/products", params=params)
+    assert response.status_code == 200, response.text
+    page = response.json()
+    return page["total"], page["total_is_exact"]
+
+
+def test_count_none_skips_the_total(client, make_user):
+    seller_id, headers = make_user(2)
+    _import(client, headers, "A", "B")
+    assert _totals(client, user_id=str(seller_id), count="none") == (None, False)
+
+
+def test_exact_count_is_cached_until_the_catalog_changes(client, make_user):
+    seller_id, headers = make_user(2)
+    _import(client, headers, "A", "B", "C")
+    assert _totals(client, user_id=str(seller_id)) == (3, True)
+
+    hits = count_cache.hits
+    # another page is another response, but the same filter set and count
+    assert _totals(client, user_id=str(seller_id), page=2) == (3, True)
+    assert count_cache.hits == hits + 1
+
+    _import(client, headers, "D")
+    assert _totals(client, user_id=str(seller_id), page=3) == (4, True)
+
+
+def test_estimated_count_falls_back_to_exact_when_filtered(client, make_user):
+    seller_id, headers = make_user(2)
+    _import(client, headers, "A", "B")
+    assert _totals(client, user_id=str(seller_id), count="estimated") == (2, True)
+    assert _totals(client, count="estimated", sort_by="price")[1] is True
+
+
+def test_estimated_count_uses_the_planner_for_broad_listings(engine, client, make_user):
+    _, headers = make_user(2)
+    _import(client, headers, *(f"Item {n}" for n in range(40)))
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE products"))
+        actual = conn.execute(text("SELECT count(*) FROM products WHERE is_active")).scalar()
+
+    total, is_exact = _totals(client, count="estimated", page_size=1)
+    assert not is_exact
+    assert abs(total - actual) <= max(5, actual // 5)
@@ -0,0 +1,72 @@
+from app.db.base import ProductVariation
+from app.db.session import SessionLocal
+
+
+def _import(client, headers, *rows: str) -> None:
+    body = "name,colour,size,unit_price,stock\n" + "".join(f"{row}\n" for row in rows)
+    response = client.post("/seller/products/import", content=body.encode(), headers={**headers, "Content-Type": "text/csv"})
+    assert response.status_code == 200, response.text
+
+
+def _facets(client, **params) -> dict:
+    response = client.get("/products", params={"facets": "true", **params})
+    assert response.status_code == 200, response.text
+    facets = response.json()["facets"]
+    return {
+        "colour": [(f["value"], f["count"]) for f in facets["colour"]],
+        "size": [(f["value"], f["count"]) for f in facets["size"]],
+        "price": [(f["min"], f["max"], f["count"]) for f in facets["price"]],
+    }
+
+
+def _seed(client, make_user):
+    seller_id, headers = make_user(2)
+    _import(
+        client,
+        headers,
+        "A,Red,S,10.00,5",
+        "A, red ,M,30.00,5",
+        "B,Red,S,60.00,5",
+        "B,Blue,S,60.00,5",
+        "C,Blue,L,250.00,0",
+    )
+    return seller_id, headers
+
+
+def test_facets_count_distinct_products(client, make_user):
+    seller_id, _ = _seed(client, make_user)
+    assert _facets(client, user_id=str(seller_id)) == {
+        # two Red rows of product A are one product; colour keys ignore case and spacing
+        "colour": [("blue", 2), ("red", 2)],
+        "size": [("s", 2), ("l", 1), ("m", 1)],
+        "price": [(None, "25", 1), ("25", "50", 1), ("50", "100", 1), ("200", None, 1)],
+    }
+
+
+def test_facets_follow_the_filters(client, make_user):
+    seller_id, _ = _seed(client, make_user)
+    # products with a red variant, counted over all their active variants
+    assert _facets(client, user_id=str(seller_id), colour="red") == {
+        "colour": [("red", 2), ("blue", 1)],
+        "size": [("s", 2), ("m", 1)],
+        "price": [(None, "25", 1), ("25", "50", 1), ("50", "100", 1)],
+    }
+    assert _facets(client, user_id=str(seller_id), in_stock_only="true")["colour"] == [("red", 2), ("blue", 1)]
+
+
+def test_inactive_variants_are_not_counted(client, make_user):
+    seller_id, headers = _seed(client, make_user)
+    with SessionLocal() as db:
+        blue_ids = [
+            str(v.id)
+            for v in db.query(ProductVariation).filter(ProductVariation.colour == "Blue")
+            if str(v.product.user_id) == str(seller_id)
+        ]
+    response = client.post(
+        "/seller/batch", json={"variants": [{"id": vid, "is_active": False} for vid in blue_ids]}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+
+    facets = _facets(client, user_id=str(seller_id))
+    assert facets["colour"] == [("red", 2)]
+    assert ("l", 1) not in facets["size"]
@@ -0,0 +1,93 @@
+import base64
+import json
+import uuid
+
+import pytest
+
+
+def _import(client, headers, *rows: str) -> None:
+    body = "name,colour,size,unit_price,stock\n" + "".join(f"{row}\n" for row in rows)
+    response = client.post("/seller/products/import", content=body.encode(), headers={**headers, "Content-Type": "text/csv"})
+    assert response.status_code == 200, response.text
+
+
+def _walk(client, seller_id, sort_by, sort_dir, between_pages=None) -> list[dict]:
+    """Every item of the seller's listing, two per page, following next_cursor."""
+    params = {"user_id": str(seller_id), "sort_by": sort_by, "sort_dir": sort_dir, "page_size": 2, "count": "none"}
+    items, cursor = [], None
+    while True:
+        response = client.get("/products", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        page = response.json()
+        items.extend(page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            assert not page["has_more"]
+            return items
+        if between_pages:
+            between_pages()
+            between_pages = None
+
+
+def _expected(items, key, sort_dir) -> list[str]:
+    ordered = sorted(items, key=lambda item: (key(item), uuid.UUID(item["id"])), reverse=sort_dir == "desc")
+    return [item["id"] for item in ordered]
+
+
+def test_cursor_pages_stay_stable_across_inserts(client, make_user):
+    seller_id, headers = make_user(2)
+    _import(client, headers, *(f"Item {n},Red,S,10.00,5" for n in range(7)))
+
+    def insert_newer():
+        _import(client, headers, "Newer 1,Red,S,10.00,5", "Newer 2,Red,S,10.00,5")
+
+    # one import shares created_at, so the order rests on the id tie-breaker
+    walked = _walk(client, seller_id, "created_at", "desc", between_pages=insert_newer)
+    ids = [item["id"] for item in walked]
+    assert len(ids) == len(set(ids)) == 7
+    assert all(item["name"].startswith("Item") for item in walked)
+    assert ids == _expected(walked, lambda item: item["created_at"], "desc")
+
+
+@pytest.mark.parametrize("sort_dir", ["asc", "desc"])
+def test_name_ties_break_on_id(client, make_user, sort_dir):
+    seller_id, headers = make_user(2)
+    for name in ("Beta", "Alpha", "Beta", "Alpha", "Beta"):
+        assert client.post("/seller/products", json={"name": name}, headers=headers).status_code == 200
+
+    walked = _walk(client, seller_id, "name", sort_dir)
+    assert len(walked) == 5
+    assert [item["id"] for item in walked] == _expected(walked, lambda item: item["name"], sort_dir)
+
+
+@pytest.mark.parametrize("sort_dir", ["asc", "desc"])
+def test_price_ties_break_on_id(client, make_user, sort_dir):
+    seller_id, headers = make_user(2)
+    _import(client, headers, *(f"Item {n},Red,S,{10 + n % 2}.00,5" for n in range(6)))
+
+    walked = _walk(client, seller_id, "price", sort_dir)
+    assert len(walked) == 6
+    assert [item["id"] for item in walked] == _expected(walked, lambda item: float(item["min_price"]), sort_dir)
+
+
+def _cursor(**data) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize(
+    "cursor, sort_by",
+    [
+        ("not a cursor", "created_at"),
+        (_cursor(s="name", d="desc", v="Alpha", id=str(uuid.uuid4())), "created_at"),  # other sort
+        (_cursor(s="created_at", d="asc", v="2024-01-01T00:00:00", id=str(uuid.uuid4())), "created_at"),  # other dir
+        (_cursor(s="created_at", d="desc", v="yesterday", id=str(uuid.uuid4())), "created_at"),
+        (_cursor(s="price", d="desc", v="cheap", id=str(uuid.uuid4())), "price"),
+        (_cursor(s="name", d="desc", v="Alpha", id="not-a-uuid"), "name"),
+        (_cursor(s="name", d="desc", v=7, id=str(uuid.uuid4())), "name"),
+        (_cursor(s="name", d="desc", v="Alpha"), "name"),
+    ],
+)
+def test_tampered_cursors_are_rejected(client, cursor, sort_by):
+    response = client.get("/products", params={"sort_by": sort_by, "cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor for this sort order"
@@ -0,0 +1,74 @@
+import pytest
+from sqlalchemy import text
+
+
+def test_search_vector_follows_name_and_description(engine, client, make_product):
+    product, _, seller_headers = make_product("Red,S,10.00,5")
+
+    def vector():
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT search_vector::text FROM products WHERE id = :id"), {"id": product.id}).scalar()
+
+    assert f"'{product.name.split()[0].lower()}'" in vector()
+
+    resp = client.put(f"/seller/products/{product.id}", json={"description": "Trail running shoe"}, headers=seller_headers)
+    assert resp.status_code == 200, resp.text
+    assert "'running':" in vector()
+
+
+def test_colour_and_size_filters_ignore_case_and_spacing(client, make_product):
+    product, _, _ = make_product(" Navy ,XL,10.00,5")
+
+    resp = client.get("/products", params={"colour": "NAVY", "size": " xl", "user_id": str(product.user_id)})
+    assert resp.status_code == 200, resp.text
+    assert [item["id"] for item in resp.json()["items"]] == [str(product.id)]
+
+
+@pytest.fixture
+def trigram(engine):
+    with engine.connect() as conn:
+        if not conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).scalar():
+            pytest.skip("q= search needs the pg_trgm extension")
+
+
+def test_snippet_escapes_product_text(client):
+    from app.api.routes.products import _MATCH_START, _MATCH_STOP, _render_snippet
+
+    snippet = f'<img src=x onerror=alert(1)> "a" & {_MATCH_START}trail{_MATCH_STOP}'
+    assert _render_snippet(snippet) == "&lt;img src=x onerror=alert(1)&gt; &quot;a&quot; &amp; <mark>trail</mark>"
+    assert _render_snippet(None) is None
+
+
+def test_search_snippet_is_html_safe(client, make_product, trigram):
+    product, _, seller_headers = make_product("Red,S,10.00,5")
+    description = 'Trail shoe <img src=x onerror=alert(1)> for "mud" & rocks \x02</mark><script>'
+    resp = client.put(f"/seller/products/{product.id}", json={"description": description}, headers=seller_headers)
+    assert resp.status_code == 200, resp.text
+
+    resp = client.get("/products", params={"q": "trail", "user_id": str(product.user_id)})
+    assert resp.status_code == 200, resp.text
+    snippet = resp.json()["items"][0]["snippet"]
+    assert "<mark>Trail</mark>" in snippet
+    assert snippet.replace("<mark>", "").replace("</mark>", "").count("<") == 0
+    assert snippet.count("<mark>") == snippet.count("</mark>") == 1
+
+
+def test_relevance_sort_needs_q_and_offset_paging(client):
+    resp = client.get("/products", params={"sort_by": "relevance"})
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "sort_by=relevance requires q"
+
+    resp = client.get("/products", params={"sort_by": "relevance", "q": "shoe", "cursor": "abc"})
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Cursor pagination is not supported for sort_by=relevance"
+
+
+def test_relevance_pages_carry_no_cursor(client, make_user, trigram):
+    _, headers = make_user(2)
+    body = "name,colour,size,unit_price,stock\n" + "".join(f"Trail shoe {n},Red,S,10.00,5\n" for n in range(3))
+    resp = client.post("/seller/products/import", content=body.encode(), headers={**headers, "Content-Type": "text/csv"})
+    assert resp.status_code == 200, resp.text
+
+    resp = client.get("/products", params={"q": "trail shoe", "sort_by": "relevance", "page_size": 1})
+    assert resp.status_code == 200, resp.text
+    assert resp.json()["has_more"] and resp.json()["next_cursor"] is None
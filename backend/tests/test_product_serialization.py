@@ -0,0 +1,22 @@
+from app.schemas.product import PaginatedProducts, ProductOut
+
+
+def test_listing_bytes_match_the_response_model(client, make_product):
+    product, _, _ = make_product("Red,S,10.50,5", "Blue,M,1234.00,0")
+    response = client.get("/products", params={"user_id": str(product.user_id), "facets": "true"})
+    assert response.status_code == 200, response.text
+    assert PaginatedProducts.model_validate_json(response.content).model_dump_json().encode() == response.content
+
+
+def test_listing_bytes_match_without_a_count(client, make_product):
+    product, _, _ = make_product("Red,S,10.00,5")
+    response = client.get("/products", params={"user_id": str(product.user_id), "count": "none", "page_size": 100})
+    assert response.status_code == 200, response.text
+    assert PaginatedProducts.model_validate_json(response.content).model_dump_json().encode() == response.content
+
+
+def test_detail_bytes_match_the_response_model(client, make_product):
+    product, _, _ = make_product("Red,S,10.00,5", "Red,L,12.00,0")
+    response = client.get(f"/products/{product.id}")
+    assert response.status_code == 200, response.text
+    assert ProductOut.model_validate_json(response.content).model_dump_json().encode() == response.content
@@ -0,0 +1,58 @@
+import threading
+import time
+
+from sqlalchemy import update
+
+from app.db.base import ProductSummary, ProductVariation
+from app.db.session import SessionLocal
+from app.services.product_summary import refresh_product_summaries
+
+
+def _set_stock(db, variant_id, stock):
+    db.execute(update(ProductVariation).where(ProductVariation.id == variant_id).values(stock=stock))
+
+
+def test_concurrent_refreshes_of_one_product_keep_both_changes(make_product):
+    product, variants, _ = make_product("Red,S,10.00,5", "Blue,S,10.00,5")
+    first_refreshed = threading.Event()
+    errors = []
+
+    def first():
+        db = SessionLocal()
+        try:
+            _set_stock(db, variants["Red"].id, 0)
+            refresh_product_summaries(db, [product.id])
+            first_refreshed.set()
+            time.sleep(0.3)  # the second transaction refreshes while we still hold our changes
+            db.commit()
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            first_refreshed.set()
+            db.close()
+
+    def second():
+        first_refreshed.wait()
+        db = SessionLocal()
+        try:
+            _set_stock(db, variants["Blue"].id, 0)
+            refresh_product_summaries(db, [product.id])
+            db.commit()
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=first), threading.Thread(target=second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+    db = SessionLocal()
+    try:
+        summary = db.get(ProductSummary, product.id)
+        assert (summary.total_stock, summary.in_stock) == (0, False)
+    finally:
+        db.close()
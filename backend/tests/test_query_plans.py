@@ -0,0 +1,88 @@
+"""
+EXPLAIN checks that the hot read routes' real statements can use the indexes
+added for them. Test tables are tiny, so sequential scans are disabled: the
+check is that the index fits the query shape, not what the planner would pick.
+"""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.core.user_cache import user_cache
+from app.services.catalog_cache import catalog_version
+
+
+@contextmanager
+def captured_selects(engine):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def plans(engine, statements) -> list[str]:
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SET enable_seqscan = off")
+        out = [
+            "\n".join(row[0] for row in conn.exec_driver_sql("EXPLAIN " + statement, parameters))
+            for statement, parameters in statements
+        ]
+        conn.rollback()
+    return out
+
+
+def uses_index(engine, statements, index_name: str) -> bool:
+    return any(index_name in plan for plan in plans(engine, statements))
+
+
+def test_listing_uses_active_created_at_and_variant_indexes(engine, client, make_product):
+    make_product("Red,S,10.00,5")
+    catalog_version.bump()  # skip the response cache
+    with captured_selects(engine) as statements:
+        assert client.get("/products", params={"sort_by": "created_at", "count": "none"}).status_code == 200
+    assert uses_index(engine, statements, "ix_products_active_created_at")
+    assert uses_index(engine, statements, "uq_product_colour_size") or uses_index(
+        engine, statements, "ix_product_variations_active_product_price"
+    )
+
+
+def test_price_filter_uses_active_product_price_index(engine, client, make_product):
+    make_product("Red,S,10.00,5")
+    catalog_version.bump()
+    with captured_selects(engine) as statements:
+        response = client.get("/products", params={"min_price": 1, "max_price": 50, "count": "none"})
+        assert response.status_code == 200
+    assert uses_index(engine, statements, "ix_product_variations_active_product_price")
+
+
+def test_seller_listing_uses_user_id_index(engine, client, make_product):
+    product, _, _ = make_product("Red,S,10.00,5")
+    with captured_selects(engine) as statements:
+        assert client.get("/products", params={"user_id": str(product.user_id), "count": "none"}).status_code == 200
+    assert uses_index(engine, statements, "ix_products_user_id")
+
+
+def test_order_history_and_items_use_their_indexes(engine, client, make_user, make_product):
+    product, variants, _ = make_product("Red,S,10.00,5")
+    _, headers = make_user(3)
+    order_id = client.post("/orders", headers=headers).json()["id"]
+    client.post(
+        f"/orders/{order_id}/items",
+        json={"product_id": str(product.id), "variant_id": str(variants["Red"].id), "quantity": 1},
+        headers=headers,
+    )
+    user_cache.clear()
+
+    with captured_selects(engine) as statements:
+        assert client.get("/orders/me", params={"status": "cart"}, headers=headers).status_code == 200
+    assert uses_index(engine, statements, "ix_orders_user_id_created_at_id")
+
+    with captured_selects(engine) as statements:
+        assert client.get(f"/orders/{order_id}", headers=headers).status_code == 200
+    assert uses_index(engine, statements, "ix_order_items_order_id")
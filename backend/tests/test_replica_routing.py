@@ -0,0 +1,44 @@
+from app.db.pool import pool_metrics
+from app.db.session import READ_YOUR_WRITES_COOKIE, recent_writers, write_marker
+
+
+def _replica_checkouts() -> int:
+    metrics = pool_metrics.get("replica")  # created on the first checkout
+    return metrics.checkouts if metrics else 0
+
+
+def _reads_from_replica(client, headers, marker=None) -> bool:
+    client.cookies.clear()
+    if marker:
+        headers = {**headers, "Cookie": f"{READ_YOUR_WRITES_COOKIE}={marker}"}
+    before = _replica_checkouts()
+    assert client.get("/orders/me", headers=headers).status_code == 200
+    return _replica_checkouts() > before
+
+
+def test_reads_go_to_the_replica(replica, client, make_user):
+    _, headers = make_user(3)
+    assert _reads_from_replica(client, headers)
+
+
+def test_writer_stays_on_the_primary_in_every_worker(replica, client, make_user):
+    user_id, headers = make_user(3)
+    response = client.post("/orders", headers=headers)
+    assert response.status_code == 200
+    marker = response.cookies[READ_YOUR_WRITES_COOKIE]
+    assert not _reads_from_replica(client, headers)
+
+    # another worker never saw the commit, only the cookie
+    recent_writers._last_write.pop(str(user_id))
+    assert not _reads_from_replica(client, headers, marker)
+    assert _reads_from_replica(client, headers)
+
+
+def test_forged_or_expired_markers_are_ignored(replica, client, make_user):
+    user_id, headers = make_user(3)
+    other_id, _ = make_user(3)
+    name, _, signature = write_marker(user_id, 4102444800).rpartition(".")
+    assert _reads_from_replica(client, headers, f"{name}.{'0' * len(signature)}")
+    assert _reads_from_replica(client, headers, write_marker(other_id, 4102444800))
+    assert _reads_from_replica(client, headers, write_marker(user_id, 1))
+    assert not _reads_from_replica(client, headers, write_marker(user_id, 4102444800))
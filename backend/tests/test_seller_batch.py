@@ -0,0 +1,44 @@
+import threading
+
+from app.db.base import Product, ProductSummary, ProductVariation
+from app.db.session import SessionLocal
+
+
+def test_concurrent_batches_in_opposite_orders_all_apply(client, make_product):
+    first, first_variants, headers = make_product("Red,S,10.00,50", "Blue,S,10.00,50")
+    second, second_variants, _ = make_product("Red,S,10.00,50")
+    # same seller for both products, so either batch may touch everything
+    db = SessionLocal()
+    try:
+        db.query(Product).filter(Product.id == second.id).update({"user_id": first.user_id})
+        db.commit()
+    finally:
+        db.close()
+
+    variant_ids = [str(v.id) for v in (*first_variants.values(), *second_variants.values())]
+    product_ids = [str(first.id), str(second.id)]
+    statuses = []
+
+    def run(reverse):
+        order = -1 if reverse else 1
+        for _ in range(10):
+            payload = {
+                "variants": [{"id": vid, "stock_delta": -1} for vid in variant_ids[::order]],
+                "products": [{"id": pid, "is_active": True} for pid in product_ids[::order]],
+            }
+            statuses.append(client.post("/seller/batch", json=payload, headers=headers).status_code)
+
+    threads = [threading.Thread(target=run, args=(reverse,)) for reverse in (False, True)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert statuses == [200] * 20
+
+    db = SessionLocal()
+    try:
+        stocks = db.query(ProductVariation.stock).filter(ProductVariation.id.in_(variant_ids)).all()
+        assert sorted(stock for stock, in stocks) == [30, 30, 30]
+        assert db.get(ProductSummary, first.id).total_stock == 60
+    finally:
+        db.close()
@@ -0,0 +1,32 @@
+from app.core.user_cache import user_cache
+from app.db.pool import pool_metrics
+
+
+def _checkouts() -> int:
+    return pool_metrics["primary"].checkouts
+
+
+def test_read_route_with_auth_checks_out_one_connection(client, make_user):
+    _, headers = make_user(3)
+    order_id = client.post("/orders", headers=headers).json()["id"]
+    user_cache.clear()  # make auth hit the database as well
+
+    before = _checkouts()
+    assert client.get(f"/orders/{order_id}", headers=headers).status_code == 200
+    assert _checkouts() - before == 1
+
+
+def test_write_route_with_auth_checks_out_one_connection(client, make_user, make_product):
+    product, variants, _ = make_product("Red,S,10.00,5")
+    _, headers = make_user(3)
+    order_id = client.post("/orders", headers=headers).json()["id"]
+    user_cache.clear()
+
+    before = _checkouts()
+    response = client.post(
+        f"/orders/{order_id}/items",
+        json={"product_id": str(product.id), "variant_id": str(variants["Red"].id), "quantity": 1},
+        headers=headers,
+    )
+    assert response.status_code == 200, response.text
+    assert _checkouts() - before == 1
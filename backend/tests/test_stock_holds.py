@@ -0,0 +1,181 @@
+from sqlalchemy import text
+
+from app.db.base import ProductVariation, StockReservation
+from app.db.session import SessionLocal
+
+
+def _cart(client, headers, product, variant, quantity=1):
+    order_id = client.post("/orders", headers=headers).json()["id"]
+    item = {"product_id": str(product.id), "variant_id": str(variant.id), "quantity": quantity}
+    response = client.post(f"/orders/{order_id}/items", json=item, headers=headers)
+    assert response.status_code == 200, response.text
+    return order_id, response.json()["id"]
+
+
+def _stock(variant) -> tuple[int, int]:
+    db = SessionLocal()
+    try:
+        row = db.get(ProductVariation, variant.id)
+        return row.stock, row.reserved
+    finally:
+        db.close()
+
+
+def _holds(order_id) -> list[int]:
+    db = SessionLocal()
+    try:
+        return [hold.quantity for hold in db.query(StockReservation).filter(StockReservation.order_id == order_id)]
+    finally:
+        db.close()
+
+
+def _expire(order_id) -> None:
+    db = SessionLocal()
+    try:
+        db.query(StockReservation).filter(StockReservation.order_id == order_id).update(
+            {"expires_at": text("now() - interval '1 minute'")}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _shown_stock(client, product) -> int:
+    response = client.get(f"/products/{product.id}")
+    assert response.status_code == 200, response.text
+    return response.json()["variants"][0]["stock"]
+
+
+def test_cart_lines_hold_stock_from_other_shoppers(client, make_user, make_product):
+    product, variants, _ = make_product("Red,S,10.00,5")
+    red = variants["Red"]
+    order_id, _ = _cart(client, make_user(3)[1], product, red, quantity=3)
+    assert _stock(red) == (5, 3)
+    assert _holds(order_id) == [3]
+    assert _shown_stock(client, product) == 2
+
+    other = make_user(3)[1]
+    other_order = client.post("/orders", headers=other).json()["id"]
+    item = {"product_id": str(product.id), "variant_id": str(red.id), "quantity": 3}
+    response = client.post(f"/orders/{other_order}/items", json=item, headers=other)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Not enough stock"
+    assert _stock(red) == (5, 3)
+
+
+def test_removing_a_line_releases_its_hold(client, make_user, make_product):
+    product, variants, _ = make_product("Red,S,10.00,5", "Blue,S,10.00,5")
+    headers = make_user(3)[1]
+    order_id, red_item = _cart(client, headers, product, variants["Red"], quantity=2)
+    item = {"product_id": str(product.id), "variant_id": str(variants["Blue"].id), "quantity": 1}
+    assert client.post(f"/orders/{order_id}/items", json=item, headers=headers).status_code == 200
+
+    assert client.delete(f"/orders/{order_id}/items/{red_item}", headers=headers).status_code == 200
+    assert _stock(variants["Red"]) == (5, 0)
+    assert _stock(variants["Blue"]) == (5, 1)
+    assert _holds(order_id) == [1]
+
+
+def test_sweeper_releases_only_expired_holds(client, make_user, make_product):
+    from app.services.reservations import sweep_expired_holds
+
+    product, variants, _ = make_product("Red,S,10.00,5")
+    red = variants["Red"]
+    expired = [_cart(client, make_user(3)[1], product, red)[0] for _ in range(3)]
+    live, _ = _cart(client, make_user(3)[1], product, red)
+    for order_id in expired:
+        _expire(order_id)
+
+    # batch by batch until a short batch
+    assert sweep_expired_holds(batch_size=2) == 3
+    assert _stock(red) == (5, 1)
+    assert [_holds(order_id) for order_id in expired] == [[], [], []]
+    assert _holds(live) == [1]
+    assert _shown_stock(client, product) == 4
+    assert sweep_expired_holds() == 0
+
+
+def test_sweeper_skips_variants_locked_by_a_checkout(client, make_user, make_product):
+    from app.services.reservations import lock_variants, sweep_expired_holds
+
+    product, variants, _ = make_product("Red,S,10.00,5")
+    red = variants["Red"]
+    order_id, _ = _cart(client, make_user(3)[1], product, red)
+    _expire(order_id)
+
+    db = SessionLocal()
+    try:
+        lock_variants(db, [red.id])
+        assert sweep_expired_holds() == 0
+    finally:
+        db.rollback()
+        db.close()
+    assert sweep_expired_holds() == 1
+    assert _stock(red) == (5, 0)
+
+
+def test_checkout_after_the_hold_expired_takes_the_unheld_remainder(client, make_user, make_product):
+    from app.services.reservations import sweep_expired_holds
+
+    product, variants, _ = make_product("Red,S,10.00,5")
+    red = variants["Red"]
+    headers = make_user(3)[1]
+    order_id, _ = _cart(client, headers, product, red, quantity=2)
+    _expire(order_id)
+    assert sweep_expired_holds() == 1
+
+    assert client.post(f"/orders/{order_id}/checkout", headers=headers).status_code == 200
+    assert _stock(red) == (3, 0)
+
+
+def test_checkout_fails_when_the_unheld_remainder_is_gone(client, make_user, make_product):
+    from app.services.reservations import sweep_expired_holds
+
+    product, variants, _ = make_product("Red,S,10.00,5")
+    red = variants["Red"]
+    headers = make_user(3)[1]
+    order_id, _ = _cart(client, headers, product, red, quantity=2)
+    _expire(order_id)
+    assert sweep_expired_holds() == 1
+    # someone else holds 4 of the 5 while this cart's hold is gone
+    _cart(client, make_user(3)[1], product, red, quantity=4)
+
+    response = client.post(f"/orders/{order_id}/checkout", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Insufficient stock during checkout"
+    assert _stock(red) == (5, 4)
+
+
+def test_seller_batch_cannot_take_stock_below_held_units(client, make_user, make_product):
+    product, variants, seller_headers = make_product("Red,S,10.00,5")
+    red = variants["Red"]
+    headers = make_user(3)[1]
+    order_id, _ = _cart(client, headers, product, red, quantity=3)
+
+    for change in ({"stock": 2}, {"stock_delta": -3}):
+        response = client.post("/seller/batch", json={"variants": [{"id": str(red.id), **change}]}, headers=seller_headers)
+        assert response.status_code == 200, response.text
+        assert response.json()["variants"][0]["status"] == "insufficient_stock"
+    response = client.post("/seller/batch", json={"variants": [{"id": str(red.id), "stock": 3}]}, headers=seller_headers)
+    assert response.json()["variants"][0] == {"id": str(red.id), "status": "updated", "stock": 3, "unit_price": "10.00", "is_active": True}
+
+    # the held cart still checks out
+    assert client.post(f"/orders/{order_id}/checkout", headers=headers).status_code == 200
+    assert _stock(red) == (0, 0)
+
+
+def test_import_raises_stock_to_held_units(client, make_user, make_product):
+    product, variants, seller_headers = make_product("Red,S,10.00,5")
+    red = variants["Red"]
+    headers = make_user(3)[1]
+    order_id, _ = _cart(client, headers, product, red, quantity=3)
+
+    body = f"name,colour,size,unit_price,stock\n{product.name},Red,S,10.00,1\n"
+    response = client.post(
+        "/seller/products/import", content=body.encode(), headers={**seller_headers, "Content-Type": "text/csv"}
+    )
+    assert response.status_code == 200, response.text
+    assert _stock(red) == (3, 3)
+
+    assert client.post(f"/orders/{order_id}/checkout", headers=headers).status_code == 200
+    assert _stock(red) == (0, 0)
@@ -0,0 +1,84 @@
+import json
+import threading
+
+from sqlalchemy import text
+
+from app.db.base import ProductSummary, StockShard
+from app.db.session import SessionLocal
+
+
+def _shard(client, headers, variant_id, shards):
+    response = client.put(f"/seller/variants/{variant_id}/shards", json={"shards": shards}, headers=headers)
+    assert response.status_code == 200, response.text
+
+
+def _cart(client, headers, product, variant, quantity=1):
+    order_id = client.post("/orders", headers=headers).json()["id"]
+    item = {"product_id": str(product.id), "variant_id": str(variant.id), "quantity": quantity}
+    response = client.post(f"/orders/{order_id}/items", json=item, headers=headers)
+    assert response.status_code == 200, response.text
+    return order_id
+
+
+def _shard_total(variant_id):
+    db = SessionLocal()
+    try:
+        return sum(shard.stock for shard in db.query(StockShard).filter(StockShard.variant_id == variant_id))
+    finally:
+        db.close()
+
+
+def test_concurrent_checkouts_of_a_hot_sku_never_oversell(client, make_user, make_product):
+    product, variants, seller_headers = make_product("Red,S,10.00,5")
+    red = variants["Red"]
+    _shard(client, seller_headers, red.id, 4)
+
+    buyers = [make_user(3)[1] for _ in range(8)]
+    carts = [(headers, _cart(client, headers, product, red)) for headers in buyers]
+    statuses = []
+
+    def checkout(headers, order_id):
+        statuses.append(client.post(f"/orders/{order_id}/checkout", headers=headers).status_code)
+
+    threads = [threading.Thread(target=checkout, args=cart) for cart in carts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(statuses) == [200] * 5 + [400] * 3
+    assert _shard_total(red.id) == 0
+
+
+def test_adding_a_sharded_line_leaves_the_summary_alone(client, make_user, make_product):
+    product, variants, seller_headers = make_product("Red,S,10.00,5")
+    _shard(client, seller_headers, variants["Red"].id, 2)
+    db = SessionLocal()
+    try:
+        before = db.get(ProductSummary, product.id).updated_at
+        _cart(client, make_user(3)[1], product, variants["Red"])
+        db.expire_all()
+        assert db.get(ProductSummary, product.id).updated_at == before
+    finally:
+        db.close()
+
+
+def test_incremental_export_includes_shard_only_stock_changes(engine, client, make_user, make_product):
+    product, variants, seller_headers = make_product("Red,S,10.00,5")
+    _shard(client, seller_headers, variants["Red"].id, 2)
+    with engine.connect() as conn:
+        since = conn.execute(text("SELECT clock_timestamp()")).scalar()
+
+    def exported():
+        response = client.get("/seller/products/export", params={"updated_since": since.isoformat()}, headers=seller_headers)
+        assert response.status_code == 200, response.text
+        return [json.loads(line) for line in response.text.splitlines()]
+
+    assert exported() == []
+    buyer = make_user(3)[1]
+    order_id = _cart(client, buyer, product, variants["Red"], quantity=2)
+    assert client.post(f"/orders/{order_id}/checkout", headers=buyer).status_code == 200
+
+    rows = exported()
+    assert [row["id"] for row in rows] == [str(product.id)]
+    assert rows[0]["variants"][0]["stock"] == 3
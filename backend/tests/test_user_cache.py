@@ -0,0 +1,64 @@
+import time
+
+from sqlalchemy import text
+
+from app.core.user_cache import USER_CHANNEL, UserIdentityCache, user_cache, user_changed
+from app.db.session import SessionLocal
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_hit_and_miss():
+    cache = UserIdentityCache(10, 60)
+    assert cache.get_user("u1") is None
+    cache.put_user("u1", {"name": "a"}, time.time() + 60)
+    assert cache.get_user("u1") == {"name": "a"}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_entries_expire_with_ttl_or_token():
+    cache = UserIdentityCache(10, 1)
+    cache.put_user("ttl", {"name": "a"}, time.time() + 60)
+    cache.put_user("token", {"name": "b"}, time.time() - 1)
+    assert cache.get_user("token") is None
+    assert cache.get_user("ttl") is not None
+    time.sleep(1.1)
+    assert cache.get_user("ttl") is None
+
+
+def test_profile_update_drops_the_cached_user(client, make_user):
+    user_id, headers = make_user(3)
+    assert client.get("/me", headers=headers).json()["name"] is None
+    assert user_cache.get_user(str(user_id)) is not None
+
+    response = client.put("/update-profile", params={"name": "New name"}, headers=headers)
+    assert response.status_code == 200
+    assert user_cache.get_user(str(user_id)) is None
+    assert client.get("/me", headers=headers).json()["name"] == "New name"
+
+
+def test_rolled_back_change_keeps_the_cached_user(client, make_user):
+    user_id, headers = make_user(3)
+    client.get("/me", headers=headers)
+    db = SessionLocal()
+    try:
+        user_changed(db, user_id)
+        db.rollback()
+    finally:
+        db.close()
+    assert user_cache.get_user(str(user_id)) is not None
+
+
+def test_change_committed_by_another_worker_drops_the_cached_user(engine, client, make_user):
+    time.sleep(0.2)  # let the lifespan listener connect
+    user_id, headers = make_user(3)
+    client.get("/me", headers=headers)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": USER_CHANNEL, "payload": str(user_id)})
+    assert _wait_for(lambda: user_cache.get_user(str(user_id)) is None)